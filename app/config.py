@@ -20,6 +20,65 @@ class Settings(BaseSettings):
         validate_default=False,
         description="Logging level for the application",
     )
+    log_queue_capacity: int = Field(
+        default=10_000,
+        validate_default=False,
+        description="Maximum number of log records waiting to be written (per worker)",
+        example=10_000,
+    )
+    log_queue_policy: str = Field(
+        default="drop_newest",
+        validate_default=False,
+        description="What to do when the log queue is full: drop_newest, drop_oldest or sample",
+        example="drop_newest",
+    )
+    log_queue_sample_rate: int = Field(
+        default=10,
+        validate_default=False,
+        description="With the sample policy, keep 1 of every N records while the queue is full",
+        example=10,
+    )
+    log_sink: str = Field(
+        default="stdout",
+        validate_default=False,
+        description="Where log records are written: stdout, file or unix (socket)",
+        example="stdout",
+    )
+    log_file_path: str = Field(
+        default="app.log",
+        validate_default=False,
+        description="Log file used by the file sink; each worker writes to <name>.<pid><ext>",
+    )
+    log_file_max_bytes: int = Field(
+        default=100 * 1024 * 1024,
+        validate_default=False,
+        description="Rotate the log file when it reaches this size (0 disables)",
+    )
+    log_file_rotate_seconds: float = Field(
+        default=0,
+        validate_default=False,
+        description="Rotate the log file after this many seconds (0 disables)",
+    )
+    log_file_backup_count: int = Field(
+        default=5,
+        validate_default=False,
+        description="Number of rotated log files kept",
+    )
+    log_socket_path: str = Field(
+        default="/tmp/log.sock",
+        validate_default=False,
+        description="Unix socket used by the unix sink",
+    )
+    log_flush_interval: float = Field(
+        default=0.05,
+        validate_default=False,
+        description="Maximum time in seconds a log record waits in the writer before being flushed",
+    )
+    log_flush_bytes: int = Field(
+        default=64 * 1024,
+        validate_default=False,
+        description="Flush the writer as soon as this many bytes are pending",
+    )
     endpoint_otel: str = Field(
         default="http://localhost:4317",
         validate_default=False,
@@ -38,14 +97,119 @@ class Settings(BaseSettings):
         validate_default=False,
         description="Enable or disable metrics collection",
     )
+    enable_latency_histograms: bool = Field(
+        default=False,
+        validate_default=False,
+        description="Record per-route latency histograms and serve /admin/latency",
+    )
+    latency_slot_seconds: int = Field(
+        default=10,
+        validate_default=False,
+        description="Length in seconds of each slot of the sliding latency windows",
+    )
+    latency_slots: int = Field(
+        default=30,
+        validate_default=False,
+        description="Number of latency slots kept (slots x slot seconds is the longest window)",
+    )
+    latency_merge_ttl: float = Field(
+        default=1.0,
+        validate_default=False,
+        description="Seconds a merged latency report is reused before merging the workers again",
+    )
+    enable_runtime_monitor: bool = Field(
+        default=False,
+        validate_default=False,
+        description="Monitor event loop lag, slow callbacks, GC pauses and active tasks",
+    )
+    runtime_monitor_interval: float = Field(
+        default=0.1,
+        validate_default=False,
+        description="Period in seconds of the event loop lag timer",
+    )
+    loop_lag_threshold: float = Field(
+        default=0.1,
+        validate_default=False,
+        description="Loop lag in seconds above which a slow callback is recorded and logged",
+    )
+    gc_pause_threshold: float = Field(
+        default=0.05,
+        validate_default=False,
+        description="GC pause in seconds above which the collection is logged",
+    )
+    runtime_log_interval: float = Field(
+        default=10.0,
+        validate_default=False,
+        description="Minimum seconds between two logs of the same runtime event (the rest are counted)",
+    )
+    metrics_cache_ttl: float = Field(
+        default=1.0,
+        validate_default=False,
+        description="Seconds a /metrics scrape result is reused before aggregating again",
+    )
     enable_logger: bool = Field(
         default=False,
         validate_default=False,
         description="Enable or disable logging middleware",
     )
+    access_log_sample_rate: int = Field(
+        default=1,
+        validate_default=False,
+        description="Log 1 of every N successful, fast requests (1 logs every request)",
+        example=1,
+    )
+    access_log_slow_threshold: float = Field(
+        default=0.5,
+        validate_default=False,
+        description="Requests slower than this many seconds are always logged",
+        example=0.5,
+    )
     enable_swagger: bool = Field(
         default=False, validate_default=False, description="Enable or disable Swagger UI"
     )
+    openapi_file: str | None = Field(
+        default=None,
+        validate_default=False,
+        description="Prebuilt OpenAPI document (python -m app.core.openapi_export) served instead of generating it",
+    )
+    enable_compression: bool = Field(
+        default=False,
+        validate_default=False,
+        description="Enable or disable response compression (gzip, plus zstd/brotli when installed)",
+    )
+    compression_minimum_size: int = Field(
+        default=1024,
+        validate_default=False,
+        description="Minimum response body size in bytes to be compressed",
+        example=1024,
+    )
+    compression_threadpool_size: int = Field(
+        default=65_536,
+        validate_default=False,
+        description="Response bodies of at least this size are compressed in a worker thread",
+        example=65_536,
+    )
+    compression_gzip_level: int = Field(
+        default=6, validate_default=False, description="gzip compression level (1-9)"
+    )
+    compression_brotli_quality: int = Field(
+        default=4, validate_default=False, description="brotli compression quality (0-11)"
+    )
+    compression_zstd_level: int = Field(
+        default=3, validate_default=False, description="zstd compression level (1-22)"
+    )
+    response_cache_max_entries: int = Field(
+        default=10_000,
+        validate_default=False,
+        description="Maximum number of responses kept by the in-process response cache (per worker)",
+        example=10_000,
+    )
+    response_cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024,
+        validate_default=False,
+        description="Maximum total body bytes kept by the in-process response cache (per worker)",
+        example=64 * 1024 * 1024,
+    )
     enable_trace_ratio_based: bool = Field(
         default=False,
         validate_default=False,
@@ -77,6 +241,24 @@ class Settings(BaseSettings):
         description="Time-to-live for Redis keys in seconds",
         example=1,
     )
+    max_body_size: int = Field(
+        default=1_048_576,
+        validate_default=False,
+        description="Maximum request body size in bytes - larger bodies are answered with 413",
+        example=1_048_576,
+    )
+    stream_chunk_size: int = Field(
+        default=65_536,
+        validate_default=False,
+        description="Size in bytes of the chunks sent by streaming responses",
+        example=65_536,
+    )
+    stream_batch_size: int = Field(
+        default=1_000,
+        validate_default=False,
+        description="Number of documents fetched per MongoDB batch by streaming exports",
+        example=1_000,
+    )
     worker: int = Field(
         default=1,
         validate1default=False,
@@ -1,34 +1,154 @@
+from app.core import latency
+from app.core.compression import precompressed_response
+from app.core.context import REQUEST_CONTEXT, bind_request_context
+from app.core.etag import conditional_static_response, with_etag
 from app.core.exception import AppException
-from app.core.routing import openapi_spec, routes_by_method, routes
+from app.core.radix import RadixRouter
+from app.core.routing import openapi_json, routes_by_method
 from app.config import get_settings
-from app.core.swagger import serve_swagger_ui
-from app.infra.lifespan import lifespan
-from app.core.utils import send_response, json_response, text_html_response
+from app.core import swagger
+from app.infra.lifespan import lifespan, on_startup
+from app.core.utils import (
+    _build_headers,
+    fixed_response,
+    send_response,
+    json_response,
+    text_html_response,
+)
 
 
 settings = get_settings()
 
 # --- Pré-processamento para performance ---
-# 1. Pré-compilar rotas por método em uppercase
-ROUTES_BY_METHOD = {method.upper(): lst for method, lst in routes_by_method.items()}
+# 1. Tabela de rotas congelada (radix tree) gerada por compile_app() no startup
+ROUTER = None
+NOT_FOUND = None
+_MIDDLEWARES = []
 
-# 2. Pré-gerar HTML do Swagger
-SWAGGER_UI_HTML = None
-if settings.enable_swagger:
-    import asyncio
+# 2. HTML do Swagger (estático); o OpenAPI é gerado só no primeiro acesso
+SWAGGER_UI_HTML = swagger.SWAGGER_UI_HTML if settings.enable_swagger else None
 
-    SWAGGER_UI_HTML = asyncio.run(serve_swagger_ui())  # roda uma vez na inicialização
+
+def add_middleware(middleware, **options):
+    """
+    Register an ASGI middleware bound to every route at compile time.
+    Middlewares are applied in registration order (the first one registered
+    is the outermost) and receive the route endpoint as their app.
+    """
+    if ROUTER is not None:
+        raise RuntimeError("Application already compiled, middlewares cannot be added.")
+    _MIDDLEWARES.append((middleware, options))
 
 
 # --- Middleware para tratamento de exceções ---
-async def handle_app_exceptions(scope, receive, send, handler):
-    try:
-        await handler(scope, receive, send)
-    except AppException as ex:
-        await send_response(
-            send,
-            json_response(data=ex.detail, status=ex.status_code, headers=ex.headers),
+def handle_app_exceptions(handler):
+    """Bind AppException handling around a route handler, once per route."""
+
+    async def endpoint(scope, receive, send):
+        try:
+            return await handler(scope, receive, send)
+        except AppException as ex:
+            await send_response(
+                send,
+                json_response(data=ex.detail, status=ex.status_code, headers=ex.headers),
+            )
+
+    return endpoint
+
+
+def _static_endpoint(response):
+    """
+    Pre-rendered endpoint with its ETag computed once, compressed once at
+    startup when compression is enabled.
+    """
+    response = with_etag(response)
+    if settings.enable_compression:
+        # Cada variante responde o próprio 304, com o ETag e o Vary dela
+        return precompressed_response(response, conditional_static_response)
+    return conditional_static_response(response, fixed_response(response))
+
+
+def _lazy_static_endpoint(render):
+    """
+    Static endpoint rendered on its first request, then served like
+    _static_endpoint. Used for documents too costly to build at startup.
+    """
+    endpoint = None
+
+    async def lazy(scope, receive, send):
+        nonlocal endpoint
+        if endpoint is None:
+            endpoint = _static_endpoint(render())
+        return await endpoint(scope, receive, send)
+
+    return lazy
+
+
+def _openapi_response():
+    body = openapi_json()
+    return 200, _build_headers(b"application/json", None, len(body)), [body]
+
+
+def _bind_middlewares(endpoint):
+    for middleware, options in reversed(_MIDDLEWARES):
+        endpoint = middleware(endpoint, **options)
+    return endpoint
+
+
+@on_startup
+def compile_app():
+    """
+    Freeze the route table and prebuild one dispatch callable per route.
+    Exception handling and the middleware chain are bound here, once, so the
+    request path is a single router lookup followed by a single call. With
+    enable_latency_histograms, this worker's latency recorder is created here
+    and each route is wrapped with its timer.
+    """
+    global ROUTER, NOT_FOUND
+
+    router = RadixRouter()
+    # Rotas internas primeiro: uma rota registrada pela aplicação as sobrescreve
+    router.add(
+        "GET",
+        "/openapi.json",
+        _bind_middlewares(_lazy_static_endpoint(_openapi_response)),
+    )
+    if SWAGGER_UI_HTML:
+        router.add(
+            "GET",
+            "/docs",
+            _bind_middlewares(
+                _static_endpoint(text_html_response(SWAGGER_UI_HTML, status=200))
+            ),
+        )
+
+    bound = [
+        (method, path_template, handler)
+        for method, entries in routes_by_method.items()
+        for _, path_template, handler in entries
+        if handler is not None
+    ]
+    # Latência por rota medida aqui, fora dos middlewares, até o último chunk
+    if settings.enable_latency_histograms:
+        latency.start_recorder(
+            [(method, path_template) for method, path_template, _ in bound],
+            latency.recorder_directory(),
         )
+    for index, (method, path_template, handler) in enumerate(bound):
+        endpoint = _bind_middlewares(handle_app_exceptions(handler))
+        if settings.enable_latency_histograms:
+            endpoint = latency.timed_endpoint(endpoint, index)
+        router.add(method, path_template, endpoint)
+
+    router.freeze()
+    for node in router.nodes():
+        node.method_not_allowed = _bind_middlewares(node.method_not_allowed)
+
+    NOT_FOUND = _bind_middlewares(
+        fixed_response(json_response({"error": "Not found"}, 404))
+    )
+    ROUTER = router
+    return router
 
 
 # --- Função principal ASGI ---
@@ -36,45 +156,38 @@ async def app(scope, receive, send):
     """
     ASGI application callable.
     This function handles incoming requests and routes them to the appropriate handler.
-    It also manages the lifespan of the application and handles exceptions.
+    It also manages the lifespan of the application.
     The function takes the ASGI scope, receive channel, and send channel as input.
     It first checks if the scope type is "lifespan" and calls the lifespan function.
-    Then, it retrieves the HTTP method and path from the scope.
-    It checks for an exact route match, a regex route match, and handles OpenAPI JSON and Swagger UI requests.
-    If no match is found, it returns a 404 Not Found response.
-    If an AppException is raised, it returns the error message and status code.
+    Then, it resolves the path in the frozen route table built by compile_app()
+    and calls the prebuilt endpoint, which already carries exception handling
+    and the middleware chain. OpenAPI JSON and Swagger UI are regular routes.
+    If the path exists for another method it returns 405 with the Allow header,
+    and if no match is found, it returns a 404 Not Found response.
+    The route is resolved once: its template ("route", None when unmatched),
+    the dispatched "endpoint" and "path_params" are stored in the scope
+    before any middleware runs, and the request context used by the logs is
+    bound around the endpoint call.
     """
 
     # Lifespan
     if scope["type"] == "lifespan":
         return await lifespan(scope, receive, send)
 
-    method = scope["method"].upper()
-    path = scope["path"]
-
-    async def route_handler(scope, receive, send):
-        # 1. Rotas estáticas
-        if handler := routes.get((path, method)):
-            return await handler(scope, receive, send)
-
-        # 2. Rotas dinâmicas com regex
-        for regex, path_template, handler in ROUTES_BY_METHOD.get(method, []):
-            if match := regex.match(path):
-                scope["path_params"] = match.groupdict()
-                return await handler(scope, receive, send)
-
-        # 3. OpenAPI JSON
-        if path == "/openapi.json":
-            return await send_response(send, json_response(openapi_spec))
-
-        # 4. Swagger UI
-        if path == "/docs" and SWAGGER_UI_HTML:
-            return await send_response(
-                send, text_html_response(SWAGGER_UI_HTML, status=200)
-            )
-
-        # 5. 404 Not Found
-        return await send_response(send, json_response({"error": "Not found"}, 404))
-
-    # Executa handler com middleware de exceções
-    await handle_app_exceptions(scope, receive, send, route_handler)
+    # Rota resolvida uma única vez: métricas, tracing e logs leem do scope
+    node, path_params = (ROUTER or compile_app()).match(scope["path"])
+    if node is None:
+        endpoint = NOT_FOUND
+        scope["route"] = None
+    else:
+        endpoint = node.handlers.get(scope["method"]) or node.method_not_allowed
+        scope["route"] = node.template
+        scope["path_params"] = path_params
+    scope["endpoint"] = endpoint
+
+    # Contexto da requisição (request id, rota, trace id) lido pelos logs
+    token = bind_request_context(scope)
+    try:
+        return await endpoint(scope, receive, send)
+    finally:
+        REQUEST_CONTEXT.reset(token)
@@ -0,0 +1,76 @@
+import msgspec
+
+from bson import ObjectId
+
+
+def _enc_hook(obj):
+    # Documentos do Mongo trazem ObjectId, que o msgspec não conhece
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise NotImplementedError(f"Objects of type {type(obj)} are not supported")
+
+
+# O Encoder do msgspec não depende do tipo: Structs são serializados direto,
+# então um único Encoder (com o enc_hook) atende todas as respostas
+ENCODER = msgspec.json.Encoder(enc_hook=_enc_hook)
+MSGPACK_ENCODER = msgspec.msgpack.Encoder(enc_hook=_enc_hook)
+_DECODERS: dict[type, msgspec.json.Decoder] = {}
+_MSGPACK_DECODERS: dict[type, msgspec.msgpack.Decoder] = {}
+
+
+def register_codec(struct_type) -> msgspec.json.Decoder:
+    """Create (once) the typed JSON and MessagePack decoders for a Struct type."""
+    decoder = _DECODERS.get(struct_type)
+    if decoder is None:
+        decoder = _DECODERS[struct_type] = msgspec.json.Decoder(struct_type)
+        _MSGPACK_DECODERS[struct_type] = msgspec.msgpack.Decoder(struct_type)
+    return decoder
+
+
+def register_codecs(*struct_types) -> None:
+    """Register several Struct types; called at the bottom of DTO/model modules."""
+    for struct_type in struct_types:
+        register_codec(struct_type)
+
+
+def get_decoder(struct_type) -> msgspec.json.Decoder:
+    """Typed decoder of the registry; types not registered at import are added lazily."""
+    return _DECODERS.get(struct_type) or register_codec(struct_type)
+
+
+def get_msgpack_decoder(struct_type) -> msgspec.msgpack.Decoder:
+    """Typed MessagePack decoder of the registry."""
+    decoder = _MSGPACK_DECODERS.get(struct_type)
+    if decoder is None:
+        register_codec(struct_type)
+        decoder = _MSGPACK_DECODERS[struct_type]
+    return decoder
+
+
+def encode(obj) -> bytes:
+    """Encode a Struct (or any msgspec-supported value) straight to JSON bytes."""
+    return ENCODER.encode(obj)
+
+
+def encode_into(obj, buffer: bytearray, offset: int = -1) -> None:
+    """Encode into a caller-owned buffer, reusing its allocation (offset -1 appends)."""
+    ENCODER.encode_into(obj, buffer, offset)
+
+
+def decode(data, struct_type=None):
+    """Decode JSON bytes into struct_type using its cached decoder (or into builtins)."""
+    if struct_type is None:
+        return msgspec.json.decode(data)
+    return get_decoder(struct_type).decode(data)
+
+
+def encode_msgpack(obj) -> bytes:
+    """Encode a Struct (or any msgspec-supported value) straight to MessagePack."""
+    return MSGPACK_ENCODER.encode(obj)
+
+
+def decode_msgpack(data, struct_type=None):
+    """Decode MessagePack bytes into struct_type using its cached decoder (or into builtins)."""
+    if struct_type is None:
+        return msgspec.msgpack.decode(data)
+    return get_msgpack_decoder(struct_type).decode(data)
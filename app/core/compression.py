@@ -0,0 +1,244 @@
+import asyncio
+import gzip
+
+from functools import lru_cache
+
+from app.config import get_settings
+from app.core.utils import fixed_response
+
+settings = get_settings()
+
+try:  # brotli é opcional
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:  # zstd é opcional (stdlib a partir do Python 3.14 ou pacote zstandard)
+    from compression import zstd as _zstd
+
+    def _zstd_compress(data: bytes) -> bytes:
+        return _zstd.compress(data, level=settings.compression_zstd_level)
+except ImportError:
+    try:
+        import zstandard as _zstd
+
+        def _zstd_compress(data: bytes) -> bytes:
+            return _zstd.ZstdCompressor(level=settings.compression_zstd_level).compress(data)
+    except ImportError:  # pragma: no cover - depende do ambiente
+        _zstd_compress = None
+
+
+COMPRESSIBLE_TYPES = (
+    b"application/json",
+    b"application/x-ndjson",
+    b"application/javascript",
+    b"application/xml",
+    b"text/",
+)
+
+
+def _gzip_compress(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=settings.compression_gzip_level, mtime=0)
+
+
+def _brotli_compress(data: bytes) -> bytes:
+    return brotli.compress(data, quality=settings.compression_brotli_quality)
+
+
+# Ordem de preferência quando o cliente aceita mais de uma codificação
+COMPRESSORS = {
+    name: compress
+    for name, compress in (
+        ("zstd", _zstd_compress),
+        ("br", _brotli_compress if brotli is not None else None),
+        ("gzip", _gzip_compress),
+    )
+    if compress is not None
+}
+
+
+@lru_cache(maxsize=256)
+def negotiate_encoding(accept_encoding: bytes) -> str | None:
+    """Pick the preferred supported encoding for an Accept-Encoding header value."""
+    accepted = {}
+    for part in accept_encoding.decode("latin-1").split(","):
+        token, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token.strip().lower()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    for name in COMPRESSORS:
+        if accepted.get(name, wildcard) > 0:
+            return name
+    return None
+
+
+def _accept_encoding(scope) -> bytes | None:
+    for name, value in scope.get("headers", ()):
+        if name == b"accept-encoding":
+            return value
+    return None
+
+
+def _vary_accept_encoding(headers) -> bytes:
+    """Existing Vary values plus accept-encoding (once)."""
+    values = [v for k, v in headers if k == b"vary"]
+    names = {name.strip().lower() for value in values for name in value.split(b",")}
+    if b"*" in names or b"accept-encoding" in names:
+        return b", ".join(values)
+    return b", ".join([*values, b"accept-encoding"])
+
+
+def _weak_etag_headers(headers) -> list:
+    return [
+        # ETag forte vira fraco: a representação comprimida não é byte a byte igual
+        (k, b"W/" + v) if k == b"etag" and not v.startswith(b"W/") else (k, v)
+        for k, v in headers
+        if k not in (b"content-length", b"content-encoding", b"vary")
+    ]
+
+
+def _not_modified_headers(headers) -> list:
+    """304 headers matching the ones a compressed 200 would carry."""
+    result = _weak_etag_headers(headers)
+    result.append((b"vary", _vary_accept_encoding(headers)))
+    return result
+
+
+def _compressed_headers(headers, encoding: str, size: int) -> list:
+    result = _weak_etag_headers(headers)
+    result.append((b"content-encoding", encoding.encode("latin-1")))
+    result.append((b"vary", _vary_accept_encoding(headers)))
+    result.append((b"content-length", str(size).encode("latin-1")))
+    return result
+
+
+def _is_compressible(headers) -> bool:
+    content_type = None
+    for name, value in headers:
+        if name == b"content-encoding":
+            return False
+        if name == b"content-type":
+            content_type = value
+    return content_type is not None and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def precompressed_response(response, wrap=None):
+    """
+    Build an endpoint for a static response compressed once, at startup.
+    Every supported encoding is rendered ahead of time and the variant is
+    picked per request from the Accept-Encoding header. wrap, when given, is
+    called as wrap(variant_response, variant_endpoint) for every variant.
+    """
+    status, headers, body_chunks = response
+    body = b"".join(body_chunks)
+    responses = {None: (status, [*headers, (b"vary", b"accept-encoding")], [body])}
+    for name, compress in COMPRESSORS.items():
+        data = compress(body)
+        responses[name] = (status, _compressed_headers(headers, name, len(data)), [data])
+    variants = {
+        name: wrap(variant, fixed_response(variant)) if wrap else fixed_response(variant)
+        for name, variant in responses.items()
+    }
+    identity = variants.pop(None)
+
+    async def endpoint(scope, receive, send):
+        accept_encoding = _accept_encoding(scope)
+        encoding = negotiate_encoding(accept_encoding) if accept_encoding else None
+        return await (variants[encoding] if encoding else identity)(scope, receive, send)
+
+    return endpoint
+
+
+class _CompressionResponder:
+    """Buffers the response start so the body can be compressed before sending."""
+
+    __slots__ = ("send", "encoding", "minimum_size", "threadpool_size", "start")
+
+    def __init__(self, send, encoding, minimum_size, threadpool_size):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.threadpool_size = threadpool_size
+        self.start = None
+
+    async def __call__(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # 304 sem corpo: só alinha ETag e Vary com o 200 comprimido
+            if message["status"] == 304:
+                headers = _not_modified_headers(message.get("headers", ()))
+                return await self.send({**message, "headers": headers})
+            if _is_compressible(message.get("headers", ())):
+                self.start = message
+                return
+            return await self.send(message)
+
+        if message_type != "http.response.body" or self.start is None:
+            return await self.send(message)
+
+        start, self.start = self.start, None
+        body = message.get("body", b"")
+        # Streaming ou corpo pequeno: envia sem compressão
+        if message.get("more_body", False) or len(body) < self.minimum_size:
+            await self.send(start)
+            return await self.send(message)
+
+        compress = COMPRESSORS[self.encoding]
+        if len(body) >= self.threadpool_size:
+            body = await asyncio.to_thread(compress, body)
+        else:
+            body = compress(body)
+
+        await self.send(
+            {
+                "type": "http.response.start",
+                "status": start["status"],
+                "headers": _compressed_headers(start.get("headers", ()), self.encoding, len(body)),
+            }
+        )
+        await self.send({"type": "http.response.body", "body": body})
+
+
+class CompressionMiddleware:
+    """
+    Middleware that compresses responses negotiated via Accept-Encoding.
+    gzip is always available; zstd and brotli are used when installed.
+    Bodies smaller than minimum_size and streaming responses are sent as is,
+    and bodies of at least threadpool_size bytes are compressed in a worker
+    thread so the event loop is not blocked.
+    """
+
+    def __init__(self, app, minimum_size=None, threadpool_size=None):
+        self.app = app
+        self.minimum_size = (
+            settings.compression_minimum_size if minimum_size is None else minimum_size
+        )
+        self.threadpool_size = (
+            settings.compression_threadpool_size
+            if threadpool_size is None
+            else threadpool_size
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        accept_encoding = _accept_encoding(scope)
+        if not accept_encoding or (encoding := negotiate_encoding(accept_encoding)) is None:
+            return await self.app(scope, receive, send)
+
+        return await self.app(
+            scope,
+            receive,
+            _CompressionResponder(send, encoding, self.minimum_size, self.threadpool_size),
+        )
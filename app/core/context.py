@@ -0,0 +1,59 @@
+import itertools
+import os
+from contextvars import ContextVar
+
+# Id gerado: prefixo aleatório por processo + contador, sem uuid4 por requisição
+_ID_PREFIX = os.urandom(4).hex() + "-"
+_ID_COUNTER = itertools.count(1)
+_MAX_REQUEST_ID_LENGTH = 128
+
+REQUEST_ID_HEADER = b"x-request-id"
+TRACEPARENT_HEADER = b"traceparent"
+
+
+class RequestContext:
+    """Request-scoped data attached to every log record emitted while handling it."""
+
+    __slots__ = ("request_id", "route", "trace_id")
+
+    def __init__(self, request_id: str, route: str | None, trace_id: str | None):
+        self.request_id = request_id
+        self.route = route
+        self.trace_id = trace_id
+
+
+REQUEST_CONTEXT: ContextVar[RequestContext | None] = ContextVar(
+    "request_context", default=None
+)
+
+
+def new_request_id() -> str:
+    """Cheap unique id: process prefix plus a hexadecimal counter."""
+    return f"{_ID_PREFIX}{next(_ID_COUNTER):x}"
+
+
+def bind_request_context(scope):
+    """
+    Set the request context for the current task from the ASGI scope: the
+    route template resolved by the dispatcher (scope["route"]), an inbound
+    X-Request-ID (or a generated one) and the trace id of a W3C traceparent
+    header. Returns the token for REQUEST_CONTEXT.reset.
+    """
+    request_id = trace_id = None
+    for key, value in scope.get("headers", ()):
+        if key == REQUEST_ID_HEADER:
+            if 0 < len(value) <= _MAX_REQUEST_ID_LENGTH:
+                request_id = value.decode("latin-1")
+        elif key == TRACEPARENT_HEADER:
+            # version-trace_id-parent_id-flags: 00-<32 hex>-<16 hex>-<2 hex>
+            if len(value) >= 55 and value[2:3] == b"-":
+                trace_id = value[3:35].decode("latin-1")
+    return REQUEST_CONTEXT.set(
+        RequestContext(request_id or new_request_id(), scope.get("route"), trace_id)
+    )
+
+
+def current_request_id() -> str | None:
+    """Request id of the request being handled, if any."""
+    context = REQUEST_CONTEXT.get()
+    return context.request_id if context is not None else None
@@ -0,0 +1,134 @@
+import zlib
+
+from app.core.utils import fixed_response
+
+# Documentos estáticos: o cliente sempre revalida, mas com 304 barato
+STATIC_CACHE_CONTROL = "no-cache"
+
+# Cabeçalhos do 200 repetidos no 304 (RFC 9110, seção 15.4.5)
+_NOT_MODIFIED_HEADERS = (b"etag", b"cache-control", b"vary")
+
+
+def compute_etag(body: bytes) -> bytes:
+    """Cheap, non-cryptographic strong ETag: body length plus CRC32."""
+    return b'"%x-%08x"' % (len(body), zlib.crc32(body))
+
+
+def _opaque_tag(tag: bytes) -> bytes:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith(b"W/") else tag
+
+
+def etag_matches(if_none_match: bytes, etag: bytes) -> bool:
+    """Weak comparison of an If-None-Match header value against an ETag."""
+    if if_none_match.strip() == b"*":
+        return True
+    opaque = _opaque_tag(etag)
+    return any(_opaque_tag(tag) == opaque for tag in if_none_match.split(b","))
+
+
+def _if_none_match(scope) -> bytes | None:
+    for name, value in scope.get("headers", ()):
+        if name == b"if-none-match":
+            return value
+    return None
+
+
+def _validator_headers(etag: bytes, cache_control: bytes | None) -> list:
+    headers = [(b"etag", etag)]
+    if cache_control:
+        headers.append((b"cache-control", cache_control))
+    return headers
+
+
+def with_etag(response, cache_control: str | None = STATIC_CACHE_CONTROL):
+    """Return the response tuple with its ETag (and Cache-Control) headers added."""
+    status, headers, body_chunks = response
+    etag = compute_etag(b"".join(body_chunks))
+    cache_control = cache_control.encode("latin-1") if cache_control else None
+    return status, [*headers, *_validator_headers(etag, cache_control)], body_chunks
+
+
+def conditional_static_response(response, endpoint):
+    """
+    Wrap the endpoint of a static response (already passed through with_etag)
+    so If-None-Match hits are answered with a pre-rendered 304.
+    """
+    _, headers, _ = response
+    etag = next(v for k, v in headers if k == b"etag")
+    not_modified = fixed_response(
+        (304, [(k, v) for k, v in headers if k in _NOT_MODIFIED_HEADERS], [b""])
+    )
+
+    async def conditional(scope, receive, send):
+        if_none_match = _if_none_match(scope)
+        if if_none_match is not None and etag_matches(if_none_match, etag):
+            return await not_modified(scope, receive, send)
+        return await endpoint(scope, receive, send)
+
+    return conditional
+
+
+class _ConditionalResponder:
+    """Buffers the response start to add the ETag computed over the body."""
+
+    __slots__ = ("send", "if_none_match", "cache_control", "compute", "start")
+
+    def __init__(self, send, if_none_match, cache_control, compute):
+        self.send = send
+        self.if_none_match = if_none_match
+        self.cache_control = cache_control
+        self.compute = compute
+        self.start = None
+
+    async def __call__(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            if message["status"] == 200:
+                self.start = message
+                return
+            return await self.send(message)
+
+        if message_type != "http.response.body" or self.start is None:
+            return await self.send(message)
+
+        start, self.start = self.start, None
+        # Streaming: não há corpo completo para calcular o ETag
+        if message.get("more_body", False) or not self.compute:
+            await self.send(self._with_headers(start, start["status"], None))
+            return await self.send(message)
+
+        etag = compute_etag(message.get("body", b""))
+        if self.if_none_match is not None and etag_matches(self.if_none_match, etag):
+            await self.send(self._with_headers(start, 304, etag, keep=False))
+            return await self.send({"type": "http.response.body", "body": b""})
+
+        await self.send(self._with_headers(start, start["status"], etag))
+        return await self.send(message)
+
+    def _with_headers(self, start, status, etag, keep=True):
+        headers = start.get("headers", ())
+        headers = list(headers) if keep else [(k, v) for k, v in headers if k == b"vary"]
+        if etag is not None:
+            headers.append((b"etag", etag))
+        if self.cache_control:
+            headers.append((b"cache-control", self.cache_control))
+        return {"type": "http.response.start", "status": status, "headers": headers}
+
+
+def conditional_endpoint(endpoint, etag: bool = True, cache_control: str | None = None):
+    """
+    Wrap a route endpoint with ETag / conditional GET support.
+    When etag is True a strong ETag is computed over the encoded body of 200
+    responses and If-None-Match hits are answered with 304 without a body.
+    cache_control, when given, is added to 200 and 304 responses.
+    """
+    cache_control = cache_control.encode("latin-1") if cache_control else None
+
+    async def conditional(scope, receive, send):
+        if_none_match = _if_none_match(scope) if etag else None
+        return await endpoint(
+            scope, receive, _ConditionalResponder(send, if_none_match, cache_control, etag)
+        )
+
+    return conditional
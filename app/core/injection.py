@@ -0,0 +1,322 @@
+import inspect
+
+import msgspec
+
+from jsonschema import ValidationError
+
+from app.core.codec import ENCODER
+from app.core.exception import AppException
+from app.core.utils import (
+    _VARY_ACCEPT,
+    _build_headers,
+    is_msgpack_request,
+    msgpack_response,
+    parse_query,
+    read_raw_body,
+    validate_schema,
+    wants_msgpack,
+)
+
+_RAW_SIGNATURE = ("scope", "receive", "send")
+_MISSING = object()
+
+# Conversores por type_field declarado em QueryParams/PathParams/HeaderParams
+_TRUE_VALUES = frozenset({"true", "1", "yes", "on"})
+_FALSE_VALUES = frozenset({"false", "0", "no", "off"})
+
+
+def _to_bool(value: str) -> bool:
+    lowered = value.lower()
+    if lowered in _TRUE_VALUES:
+        return True
+    if lowered in _FALSE_VALUES:
+        return False
+    raise ValueError(f"invalid boolean value: {value!r}")
+
+
+TYPE_FIELD_CASTS = {
+    "string": str,
+    "integer": int,
+    "number": float,
+    "boolean": _to_bool,
+}
+
+
+def is_typed_handler(func) -> bool:
+    """A coroutine handler is typed when its signature is not the raw (scope, receive, send)."""
+    return (
+        inspect.iscoroutinefunction(func)
+        and tuple(inspect.signature(func).parameters) != _RAW_SIGNATURE
+    )
+
+
+def _validation_error(campo: str, mensagem: str, validador: str, body=None):
+    return AppException(
+        {
+            "error": {
+                "detalhes": [
+                    {"campo": campo, "mensagem": mensagem, "validador": validador}
+                ],
+                "body": body,
+            }
+        },
+        status_code=422,
+    )
+
+
+def _param_default(declared, parameter):
+    if parameter.default is not inspect.Parameter.empty:
+        return parameter.default
+    if declared.default is not None:
+        return declared.default
+    return _MISSING
+
+
+class _ParamSpec:
+    """Pre-resolved extraction rule for one handler parameter."""
+
+    __slots__ = ("name", "source", "key", "cast", "default", "required")
+
+    def __init__(self, name, source, key=None, cast=None, default=_MISSING, required=False):
+        self.name = name
+        self.source = source
+        self.key = key
+        self.cast = cast
+        self.default = default
+        self.required = required
+
+    def resolve(self, raw, fallback=None):
+        """Coerce a raw string value; missing values use the default or raise 422."""
+        if raw is None:
+            if self.default is not _MISSING:
+                return self.default
+            if self.required:
+                raise _validation_error(
+                    self.key, f"O parâmetro {self.key} é obrigatório", "required"
+                )
+            return fallback
+        try:
+            return self.cast(raw)
+        except (TypeError, ValueError) as e:
+            raise _validation_error(self.key, str(e), "type") from None
+
+
+def _build_specs(func, route_info: dict):
+    request_model = route_info.get("request_model")
+    declared = {}
+    for source, params in (
+        ("path", route_info.get("path_params")),
+        ("query", route_info.get("query_params")),
+        ("header", route_info.get("headers")),
+        ("cookie", route_info.get("cookie_params")),
+    ):
+        for param in params or ():
+            attr = param.name.lower().replace("-", "_")
+            declared[attr] = (source, param)
+
+    specs = []
+    for name, parameter in inspect.signature(func).parameters.items():
+        if name in _RAW_SIGNATURE:
+            specs.append(_ParamSpec(name, name))
+        elif request_model is not None and (
+            parameter.annotation is request_model or name == "body"
+        ):
+            specs.append(_ParamSpec(name, "body", cast=request_model))
+        elif name in declared:
+            source, param = declared[name]
+            key = param.name.lower() if source == "header" else param.name
+            specs.append(
+                _ParamSpec(
+                    name,
+                    source,
+                    key=key,
+                    cast=TYPE_FIELD_CASTS.get(param.type_field, str),
+                    default=_param_default(param, parameter),
+                    required=param.required,
+                )
+            )
+        else:
+            raise TypeError(
+                f"Handler '{func.__name__}' parameter '{name}' is not declared in the route "
+                "(request_model, path_params, query_params, headers or cookie_params)."
+            )
+    return tuple(specs)
+
+
+def build_query_specs(query_params) -> dict[str, _ParamSpec]:
+    """Coercion rules of the declared QueryParams, keyed by param name."""
+    return {param.name: _param_spec("query", param) for param in query_params or ()}
+
+
+def _param_spec(source, param) -> _ParamSpec:
+    return _ParamSpec(
+        param.name,
+        source,
+        key=param.name.lower() if source == "header" else param.name,
+        cast=TYPE_FIELD_CASTS.get(param.type_field, str),
+        default=param.default if param.default is not None else _MISSING,
+        required=param.required,
+    )
+
+
+def _parse_cookies(value: bytes, wanted, found: dict) -> None:
+    for pair in value.decode("latin-1").split(";"):
+        name, sep, raw = pair.strip().partition("=")
+        if sep and name in wanted and name not in found:
+            found[name] = raw.strip().strip('"')
+
+
+class HeaderIndex:
+    """
+    Per-route index of the declared header and cookie names.
+    extract() walks the raw ASGI header list once, keeps only the declared
+    values and returns them decoded and coerced by type_field; a missing
+    required header or cookie raises the 422 AppException right away.
+    """
+
+    __slots__ = ("header_specs", "cookie_specs")
+
+    def __init__(self, headers=None, cookie_params=None):
+        # Nomes de header no ASGI já chegam em minúsculas
+        self.header_specs = {
+            param.name.lower().encode("latin-1"): _param_spec("header", param)
+            for param in headers or ()
+        }
+        self.cookie_specs = {
+            param.name: _param_spec("cookie", param) for param in cookie_params or ()
+        }
+
+    def extract(self, scope) -> tuple[dict, dict]:
+        header_specs = self.header_specs
+        cookie_specs = self.cookie_specs
+        raw_headers = {}
+        raw_cookies = {}
+        for name, value in scope.get("headers", ()):
+            if name in header_specs:
+                raw_headers.setdefault(name, value)
+            elif name == b"cookie" and cookie_specs:
+                _parse_cookies(value, cookie_specs, raw_cookies)
+
+        headers = {}
+        for name, spec in header_specs.items():
+            raw = raw_headers.get(name)
+            headers[spec.key] = spec.resolve(raw.decode("latin-1") if raw is not None else None)
+        cookies = {
+            name: spec.resolve(raw_cookies.get(name)) for name, spec in cookie_specs.items()
+        }
+        return headers, cookies
+
+
+def build_header_index(headers=None, cookie_params=None) -> HeaderIndex | None:
+    if not headers and not cookie_params:
+        return None
+    return HeaderIndex(headers, cookie_params)
+
+
+def with_body_limit(endpoint, max_body_size: int):
+    """
+    Wrap a raw endpoint so the route's max_body_size reaches read_raw_body
+    and read_body through scope["max_body_size"].
+    """
+
+    async def limited(scope, receive, send):
+        scope["max_body_size"] = max_body_size
+        return await endpoint(scope, receive, send)
+
+    return limited
+
+
+def with_request_params(endpoint, query_params=None, headers=None, cookie_params=None):
+    """
+    Wrap a raw endpoint with the route's declared query, header and cookie params.
+    The query string is parsed lazily, on the first get_query_param call. The
+    declared headers and cookies are extracted in one pass before the handler
+    runs (so required checks happen before the body is read) and exposed in
+    scope["request_headers"] (by lowercase name) and scope["cookies"].
+    """
+    query_specs = build_query_specs(query_params) if query_params else None
+    index = build_header_index(headers, cookie_params)
+
+    async def params_endpoint(scope, receive, send):
+        if query_specs is not None:
+            scope["query_specs"] = query_specs
+        # O cache de resposta pode já ter extraído (e validado) os headers
+        if index is not None and "request_headers" not in scope:
+            scope["request_headers"], scope["cookies"] = index.extract(scope)
+        return await endpoint(scope, receive, send)
+
+    return params_endpoint
+
+
+def build_typed_endpoint(func, route_info: dict):
+    """
+    Build the raw ASGI endpoint for a typed handler.
+    The handler signature is inspected once, at registration: each parameter
+    is bound to the request body (decoded into request_model), a path, query,
+    header or cookie value coerced to the declared type_field, or to
+    scope/receive/send.
+    The returned value (typically a Struct) is encoded straight to bytes by
+    the shared encoder of app.core.codec, as JSON or as MessagePack when the
+    Accept header asks for it; MessagePack request bodies are decoded with the
+    same request_model.
+    """
+    specs = _build_specs(func, route_info)
+    sources = {spec.source for spec in specs}
+    needs_query = "query" in sources
+    index = build_header_index(route_info.get("headers"), route_info.get("cookie_params"))
+    max_body_size = route_info.get("max_body_size")
+
+    async def endpoint(scope, receive, send):
+        query = parse_query(scope) if needs_query else None
+        # Headers/cookies obrigatórios são validados antes de ler o corpo
+        if index is None:
+            request_headers, cookies = {}, {}
+        elif "request_headers" in scope:
+            request_headers, cookies = scope["request_headers"], scope["cookies"]
+        else:
+            request_headers, cookies = index.extract(scope)
+
+        kwargs = {}
+        for spec in specs:
+            source = spec.source
+            if source == "path":
+                value = spec.resolve(scope["path_params"].get(spec.key))
+            elif source == "query":
+                value = spec.resolve(query.get(spec.key, (None,))[0])
+            elif source == "header" or source == "cookie":
+                value = (request_headers if source == "header" else cookies).get(spec.key)
+                if value is None:
+                    value = spec.resolve(None)
+            elif source == "body":
+                msgpack_body = is_msgpack_request(scope)
+                try:
+                    value = await validate_schema(
+                        await read_raw_body(receive, max_body_size, scope),
+                        spec.cast,
+                        msgpack=msgpack_body,
+                    )
+                except ValidationError as e:
+                    raise AppException({"error": e.message}, status_code=422) from None
+                except msgspec.DecodeError as e:
+                    raise _validation_error(
+                        "body", str(e), "msgpack" if msgpack_body else "json"
+                    ) from None
+            elif source == "scope":
+                value = scope
+            elif source == "receive":
+                value = receive
+            else:
+                value = send
+            kwargs[spec.name] = value
+
+        result = await func(**kwargs)
+        if wants_msgpack(scope):
+            _, headers, (body,) = msgpack_response(result)
+        else:
+            body = ENCODER.encode(result)
+            headers = _build_headers(b"application/json", None, len(body), _VARY_ACCEPT)
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    endpoint.__wrapped__ = func
+    return endpoint
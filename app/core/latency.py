@@ -0,0 +1,345 @@
+import array
+import asyncio
+import glob
+import math
+import mmap
+import os
+import struct
+import time
+from itertools import compress
+from operator import add
+
+import orjson
+from prometheus_client.core import GaugeMetricFamily
+
+from app.config import get_settings
+from app.core.routing import get
+from app.core.utils import json_response, send_response
+
+settings = get_settings()
+
+# Histograma log-linear (estilo HDR) em microssegundos: valores < 64 us são
+# exatos e cada potência de 2 acima é dividida em 32 sub-buckets (erro < 3.2%)
+SUB_BUCKET_BITS = 5
+MAX_MICROS = (1 << 26) - 1  # ~67 s; valores maiores caem no último bucket
+QUANTILES = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("p99_9", 0.999))
+REPORT_WINDOWS = (60, 300)
+FILE_PATTERN = "latency_*.hist"
+
+
+def bucket_index(micros: int) -> int:
+    """Index of the log-linear bucket holding micros."""
+    shift = micros.bit_length() - SUB_BUCKET_BITS - 1
+    if shift <= 0:
+        return micros
+    return (shift << SUB_BUCKET_BITS) + (micros >> shift)
+
+
+def bucket_value(index: int) -> float:
+    """Representative value (midpoint, in microseconds) of a bucket."""
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    if shift <= 0:
+        return float(index)
+    low = (index - (shift << SUB_BUCKET_BITS)) << shift
+    return low + ((1 << shift) - 1) / 2
+
+
+BUCKETS = bucket_index(MAX_MICROS) + 1
+# Cada linha (rota, slot): contagem por bucket + soma dos valores no fim
+ROW = BUCKETS + 1
+_ZERO_ROW = memoryview(bytes(ROW * 8)).cast("Q")
+_ZERO_BYTES = bytes(ROW * 8)
+_INDEXES = list(range(ROW))
+
+
+def _data_offset(header_length: int) -> int:
+    # Cabeçalho: tamanho (u64) + JSON com rotas e janelas, alinhado a 8 bytes
+    return 8 + (header_length + 7) // 8 * 8
+
+
+class LatencyRecorder:
+    """
+    Per-worker latency histograms, one per route, kept for `slots` time
+    slots of `slot_seconds` each (a ring indexed by wall-clock epoch, so
+    every worker rotates in step). Counters live in an mmap: a file under
+    the multiprocess directory when path is given, so other workers can
+    merge it without any IPC, or anonymous memory otherwise. Only the owning
+    worker writes, from the event loop, so recording takes no lock.
+    """
+
+    __slots__ = ("routes", "slot_seconds", "slots", "epochs", "counts", "_mmap")
+
+    def __init__(self, routes, slot_seconds: int, slots: int, path: str | None = None):
+        self.routes = list(routes)
+        self.slot_seconds = slot_seconds
+        self.slots = slots
+        header = orjson.dumps(
+            {"routes": self.routes, "slot_seconds": slot_seconds, "slots": slots}
+        )
+        offset = _data_offset(len(header))
+        size = offset + (slots + len(self.routes) * slots * ROW) * 8
+        if path is None:
+            self._mmap = mmap.mmap(-1, size)
+        else:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.ftruncate(fd, size)
+                self._mmap = mmap.mmap(fd, size)
+            finally:
+                os.close(fd)
+        self._mmap[:8] = struct.pack("<Q", len(header))
+        self._mmap[8 : 8 + len(header)] = header
+        data = memoryview(self._mmap)[offset:].cast("Q")
+        self.epochs = data[:slots]
+        self.counts = data[slots:]
+
+    def record(self, route_index: int, micros: int) -> None:
+        epoch = int(time.time()) // self.slot_seconds
+        slot = epoch % self.slots
+        if self.epochs[slot] != epoch:
+            self._rotate(slot, epoch)
+        base = (route_index * self.slots + slot) * ROW
+        counts = self.counts
+        counts[base + bucket_index(micros if micros < MAX_MICROS else MAX_MICROS)] += 1
+        counts[base + BUCKETS] += micros
+
+    def _rotate(self, slot: int, epoch: int) -> None:
+        # O slot guardava uma janela antiga: zera a linha de todas as rotas
+        counts = self.counts
+        for route_index in range(len(self.routes)):
+            base = (route_index * self.slots + slot) * ROW
+            counts[base : base + ROW] = _ZERO_ROW
+        self.epochs[slot] = epoch
+
+    def buffer(self):
+        return self._mmap
+
+    def close(self) -> None:
+        self.epochs.release()
+        self.counts.release()
+        self._mmap.close()
+
+
+def merge_windows(buffers, windows=REPORT_WINDOWS, now: float | None = None) -> dict:
+    """
+    Merge the recorders stored in buffers (mmaps written by LatencyRecorder)
+    into {window: {(method, route): row}}, where each row holds the bucket
+    counts plus the sum of the values, over the last `window` seconds.
+    Empty (route, slot) rows are skipped with a memcmp, only the non-zero
+    buckets of the others are added, and each row is added once: the
+    windows are nested, so a larger window starts from the smaller one.
+    """
+    now = time.time() if now is None else now
+    merged = {window: {} for window in windows}
+    # Janelas da menor para a maior
+    ordered = sorted(windows)
+    for buffer in buffers:
+        try:
+            (header_length,) = struct.unpack_from("<Q", buffer, 0)
+            header = orjson.loads(bytes(buffer[8 : 8 + header_length]))
+        except (struct.error, orjson.JSONDecodeError):
+            # Worker ainda criando o arquivo: entra no próximo relatório
+            continue
+        slot_seconds, slots = header["slot_seconds"], header["slots"]
+        raw = memoryview(buffer)[_data_offset(header_length) :]
+        epochs = raw[: slots * 8].cast("Q").tolist()
+        counts = raw[slots * 8 :]
+        current = int(now) // slot_seconds
+        spans = [min(slots, math.ceil(window / slot_seconds)) for window in ordered]
+        # Slots da maior janela, do mais recente ao mais antigo
+        ages = sorted(
+            (current - epoch, slot)
+            for slot, epoch in enumerate(epochs)
+            if 0 <= current - epoch < spans[-1]
+        )
+        row_bytes = ROW * 8
+        for route_index, key in enumerate(map(tuple, header["routes"])):
+            row = None
+            pending = iter(ages)
+            age_slot = next(pending, None)
+            for window, span in zip(ordered, spans):
+                while age_slot is not None and age_slot[0] < span:
+                    start = (route_index * slots + age_slot[1]) * row_bytes
+                    values = bytes(counts[start : start + row_bytes])
+                    if values != _ZERO_BYTES:
+                        values = array.array("Q", values)
+                        if row is None:
+                            row = [0] * ROW
+                        for index in compress(_INDEXES, values):
+                            row[index] += values[index]
+                    age_slot = next(pending, None)
+                if row is None:
+                    continue
+                target = merged[window]
+                if (previous := target.get(key)) is None:
+                    target[key] = row.copy()
+                else:
+                    target[key] = list(map(add, previous, row))
+    return merged
+
+
+def percentiles(row) -> dict:
+    """Count, mean and p50/p90/p99/p99.9 (milliseconds) of a merged row."""
+    total = sum(row[:BUCKETS])
+    result = {"count": total}
+    if not total:
+        return result
+    result["mean_ms"] = row[BUCKETS] / total / 1000
+    pending = iter(QUANTILES)
+    name, quantile = next(pending)
+    seen = 0
+    for index in range(BUCKETS):
+        seen += row[index]
+        while seen >= max(1, math.ceil(quantile * total)):
+            result[f"{name}_ms"] = bucket_value(index) / 1000
+            name, quantile = next(pending, (None, None))
+            if name is None:
+                return result
+    return result
+
+
+# Criado no startup por start_recorder (ver application.compile_app)
+RECORDER = None
+DIRECTORY = None
+
+
+def recorder_directory() -> str | None:
+    """Prometheus multiprocess directory when that mode is on, else None."""
+    if not settings.prometheus_multiproc_dir:
+        return None
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or settings.prometheus_multiproc_dir
+
+
+def start_recorder(routes, directory: str | None = None) -> LatencyRecorder:
+    """
+    Create this worker's recorder for the given (method, route) pairs. With
+    a directory (the Prometheus multiprocess dir) its file is shared with the
+    other workers; otherwise only this worker's data is reported.
+    """
+    global RECORDER, DIRECTORY
+    path = os.path.join(directory, f"latency_{os.getpid()}.hist") if directory else None
+    RECORDER = LatencyRecorder(
+        routes, settings.latency_slot_seconds, settings.latency_slots, path
+    )
+    DIRECTORY = directory
+    return RECORDER
+
+
+class _TimedResponder:
+    """Records the request latency when the last body chunk has been sent."""
+
+    __slots__ = ("send", "route_index", "start_time")
+
+    def __init__(self, send, route_index, start_time):
+        self.send = send
+        self.route_index = route_index
+        self.start_time = start_time
+
+    async def __call__(self, message):
+        await self.send(message)
+        if message["type"] == "http.response.body" and not message.get("more_body"):
+            if RECORDER is not None:
+                RECORDER.record(
+                    self.route_index, (time.perf_counter_ns() - self.start_time) // 1000
+                )
+
+
+def timed_endpoint(endpoint, route_index: int):
+    """
+    Wrap a dispatch endpoint so its full latency (until the final body
+    chunk, not the first byte) is recorded in the route_index row of
+    this worker's recorder. Bound once per route by compile_app.
+    """
+
+    async def timed(scope, receive, send):
+        return await endpoint(
+            scope, receive, _TimedResponder(send, route_index, time.perf_counter_ns())
+        )
+
+    return timed
+
+
+def _open_buffers():
+    buffers = []
+    for filename in glob.glob(os.path.join(DIRECTORY, FILE_PATTERN)):
+        try:
+            with open(filename, "rb") as file:
+                buffers.append(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+        except (OSError, ValueError):
+            # Arquivo removido (ou ainda vazio) entre o glob e a abertura
+            continue
+    return buffers
+
+
+def _merge_recorders(windows) -> dict:
+    if DIRECTORY is None:
+        return merge_windows([RECORDER.buffer()] if RECORDER is not None else [], windows)
+    buffers = _open_buffers()
+    try:
+        return merge_windows(buffers, windows)
+    finally:
+        for buffer in buffers:
+            buffer.close()
+
+
+# Último merge: (recorder, diretório, janelas) -> (expira em, resultado)
+_MERGED = {}
+
+
+def collect_windows(windows=REPORT_WINDOWS) -> dict:
+    """
+    Merge every worker's recorder; blocking, meant to run in a thread.
+    The result is reused for latency_merge_ttl seconds, so scrapes and
+    /admin/latency calls within that interval share a single merge.
+    """
+    key = (RECORDER, DIRECTORY, tuple(windows))
+    now = time.monotonic()
+    cached = _MERGED.get(key)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    merged = _merge_recorders(windows)
+    _MERGED.clear()
+    _MERGED[key] = (now + settings.latency_merge_ttl, merged)
+    return merged
+
+
+def latency_report(windows=REPORT_WINDOWS) -> dict:
+    merged = collect_windows(windows)
+    return {
+        f"{window}s": [
+            {"method": method, "route": route, **percentiles(row)}
+            for (method, route), row in sorted(merged[window].items())
+        ]
+        for window in windows
+    }
+
+
+class LatencyCollector:
+    """Exports the merged window percentiles as Prometheus gauges."""
+
+    def collect(self):
+        family = GaugeMetricFamily(
+            "http_request_latency_window_seconds",
+            "Request latency percentiles over a sliding window, merged across workers",
+            labels=["method", "path", "window", "quantile"],
+        )
+        for window, rows in collect_windows().items():
+            for (method, route), row in rows.items():
+                stats = percentiles(row)
+                for name, quantile in QUANTILES:
+                    if f"{name}_ms" in stats:
+                        family.add_metric(
+                            [method, route, f"{window}s", str(quantile)],
+                            stats[f"{name}_ms"] / 1000,
+                        )
+        yield family
+
+
+async def admin_latency(scope, receive, send):
+    report = await asyncio.to_thread(latency_report)
+    return await send_response(send, json_response(report))
+
+
+def register_latency_route(path: str = "/admin/latency") -> None:
+    """Expose the merged window percentiles at path; call before the app is compiled."""
+    get(path, summary="LATENCY", tags=["ADMIN"], response_model=None)(admin_latency)
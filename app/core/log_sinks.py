@@ -0,0 +1,158 @@
+import os
+import socket
+import sys
+import time
+
+# Máximo de buffers por chamada de writev
+try:
+    IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):  # pragma: no cover - depende da plataforma
+    IOV_MAX = 1024
+
+
+def writev_all(fd: int, buffers: list) -> None:
+    """Write every buffer with os.writev, resuming after partial writes."""
+    while buffers:
+        chunk = buffers[:IOV_MAX]
+        written = os.writev(fd, chunk)
+        index = 0
+        while index < len(chunk) and written >= len(chunk[index]):
+            written -= len(chunk[index])
+            index += 1
+        rest = buffers[IOV_MAX:]
+        if index < len(chunk):
+            # Escrita parcial: retoma do meio do buffer interrompido
+            buffers = [memoryview(chunk[index])[written:], *chunk[index + 1:], *rest]
+        else:
+            buffers = rest
+
+
+class StdoutSink:
+    """Writes log batches to the process stdout file descriptor."""
+
+    def __init__(self, fd: int | None = None):
+        self.fd = sys.stdout.fileno() if fd is None else fd
+
+    def write(self, buffers: list) -> None:
+        writev_all(self.fd, buffers)
+
+    def close(self) -> None:
+        pass
+
+
+class RotatingFileSink:
+    """
+    Appends log batches to a file, rotating it when it reaches max_bytes or
+    when it is older than rotate_seconds (0 disables either rule). Rotated
+    files are kept as path.1 ... path.<backup_count>.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 0,
+        rotate_seconds: float = 0,
+        backup_count: int = 5,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+        self.fd = None
+        self._open()
+
+    def _open(self) -> None:
+        self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self.size = os.fstat(self.fd).st_size
+        self.opened_at = time.monotonic()
+
+    def _should_rotate(self, incoming: int) -> bool:
+        if self.max_bytes and self.size and self.size + incoming > self.max_bytes:
+            return True
+        return (
+            bool(self.rotate_seconds)
+            and time.monotonic() - self.opened_at >= self.rotate_seconds
+        )
+
+    def _rotate(self) -> None:
+        os.close(self.fd)
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def write(self, buffers: list) -> None:
+        incoming = sum(len(buffer) for buffer in buffers)
+        if self._should_rotate(incoming):
+            self._rotate()
+        writev_all(self.fd, buffers)
+        self.size += incoming
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class UnixSocketSink:
+    """
+    Streams log batches to a Unix domain socket (e.g. a local log shipper).
+    The connection is opened lazily and reopened on the next batch after a
+    failure; a batch that cannot be sent raises OSError and is dropped by
+    the writer.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.sock = None
+
+    def write(self, buffers: list) -> None:
+        if self.sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self.sock = sock
+        try:
+            writev_all(self.sock.fileno(), buffers)
+        except OSError:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+def worker_log_path(path: str, pid: int | None = None) -> str:
+    """Per-worker log file: app.log becomes app.<pid>.log."""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{pid or os.getpid()}{ext}"
+
+
+def build_sink(settings):
+    """
+    Create the sink selected by settings.log_sink (stdout, file or unix).
+    The file sink writes to a per-worker path, so each worker owns the
+    rotation of its own file.
+    """
+    if settings.log_sink == "file":
+        return RotatingFileSink(
+            worker_log_path(settings.log_file_path),
+            max_bytes=settings.log_file_max_bytes,
+            rotate_seconds=settings.log_file_rotate_seconds,
+            backup_count=settings.log_file_backup_count,
+        )
+    if settings.log_sink == "unix":
+        return UnixSocketSink(settings.log_socket_path)
+    if settings.log_sink == "stdout":
+        return StdoutSink()
+    raise ValueError(f"Unknown log sink: {settings.log_sink!r}")
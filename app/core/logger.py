@@ -1,19 +1,112 @@
-import contextlib
+import itertools
 import logging
 import sys
+import threading
 import orjson
 import time
 
+from collections import deque
+from collections.abc import Mapping
 from functools import lru_cache
 
+from prometheus_client import Counter, Gauge
+
 from app.config import get_settings
+from app.core.context import REQUEST_CONTEXT
+from app.core.log_sinks import build_sink
 
 import asyncio
 
 
 settings = get_settings()
-_LOG_QUEUE = asyncio.Queue()
-_SHUTDOWN = object()
+# Criados no startup do lifespan (ver start_logging)
+_LOG_QUEUE = None
+_LOG_WRITER = None
+
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total",
+    "Log records dropped (full queue, sink error or formatting error)",
+    ["policy"],
+)
+LOG_QUEUE_DEPTH = Gauge(
+    "log_queue_depth",
+    "Log records waiting to be written",
+    multiprocess_mode="livesum",
+)
+
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+SAMPLE = "sample"
+LOG_QUEUE_POLICIES = (DROP_NEWEST, DROP_OLDEST, SAMPLE)
+
+
+class LogRingBuffer:
+    """
+    Bounded queue of encoded log records.
+    When full, the policy decides what is lost: drop_newest discards the
+    incoming record, drop_oldest evicts the oldest queued one and sample
+    keeps 1 of every sample_rate incoming records (evicting the oldest).
+    Dropped records are counted in log_records_dropped_total. put() never
+    blocks, so a slow sink can only cost records, never stall the loop.
+    """
+
+    __slots__ = (
+        "capacity",
+        "policy",
+        "sample_rate",
+        "records",
+        "ready",
+        "closed",
+        "_seen",
+        "_dropped",
+    )
+
+    def __init__(self, capacity: int, policy: str = DROP_NEWEST, sample_rate: int = 10):
+        if policy not in LOG_QUEUE_POLICIES:
+            raise ValueError(f"Unknown log queue policy: {policy!r}")
+        self.capacity = capacity
+        self.policy = policy
+        self.sample_rate = max(1, sample_rate)
+        # maxlen: o append descarta o mais antigo atomicamente, sem popleft
+        # concorrente com o drain() da thread do writer
+        self.records = deque(maxlen=capacity)
+        # Acorda a thread do writer; o loop nunca espera por ela
+        self.ready = threading.Event()
+        self.closed = False
+        self._seen = 0
+        self._dropped = LOG_RECORDS_DROPPED.labels(policy=policy)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def put(self, record) -> bool:
+        """Enqueue a record without blocking; returns False when it was dropped."""
+        records = self.records
+        if len(records) >= self.capacity:
+            if self.policy == DROP_NEWEST:
+                self._dropped.inc()
+                return False
+            if self.policy == SAMPLE:
+                self._seen += 1
+                if self._seen % self.sample_rate:
+                    self._dropped.inc()
+                    return False
+            self._dropped.inc()
+        records.append(record)
+        if not self.ready.is_set():
+            self.ready.set()
+        return True
+
+    def drain(self, limit: int) -> list:
+        # Só esta thread remove; o append do loop nunca reduz o tamanho
+        records = self.records
+        return [records.popleft() for _ in range(min(limit, len(records)))]
+
+    def close(self) -> None:
+        self.closed = True
+        self.ready.set()
+
+
 _STANDARD_KEYS = frozenset(
     logging.LogRecord("", "", "", "", "", "", "", "").__dict__.keys()
 )
@@ -52,44 +145,185 @@ class OrjsonFormatter(logging.Formatter):
         return orjson.dumps(log_record, option=orjson.OPT_APPEND_NEWLINE)
 
 
-async def _log_writer():
-    stream = sys.stdout.buffer
-    write = stream.write
-    flush = stream.flush
+_FORMATTER = OrjsonFormatter()
 
-    BATCH_SIZE = 100
-    FLUSH_INTERVAL = 0.05  # segundos
 
-    buffer = []
+def format_entry(entry) -> bytes:
+    """
+    Serialize a queued log entry: either the minimal tuple enqueued by
+    QueueLogger or a LogRecord from other loggers. Runs in the writer
+    thread, in batches, never on the request path.
+    """
+    if type(entry) is not tuple:
+        return _FORMATTER.format(entry)
+
+    created, level, name, msg, args, extra, exc_info, context = entry
+    message = str(msg)
+    if args:
+        # Mesma regra do LogRecord: um único mapping é o próprio mapping
+        if len(args) == 1 and isinstance(args[0], Mapping) and args[0]:
+            args = args[0]
+        message = message % args
+    log_record = {
+        "time": created,
+        "level": logging.getLevelName(level),
+        "message": message,
+        "logger": name,
+    }
+    if exc_info:
+        log_record["exception"] = _FORMATTER.formatException(exc_info)
+        log_record["exception_type"] = exc_info[0].__name__
+    if context is not None:
+        log_record["request_id"] = context.request_id
+        if context.route is not None:
+            log_record["route"] = context.route
+        if context.trace_id is not None:
+            log_record["trace_id"] = context.trace_id
+    if extra:
+        for key, value in extra.items():
+            if key not in log_record:
+                log_record[key] = value
+    return orjson.dumps(log_record, option=orjson.OPT_APPEND_NEWLINE, default=str)
+
+
+_FORMAT_ERRORS = LOG_RECORDS_DROPPED.labels(policy="format_error")
+
+
+def _format_entries(batch) -> list:
+    chunks = []
+    for entry in batch:
+        try:
+            chunks.append(format_entry(entry))
+        except Exception:  # noqa: B902 - um registro inválido não derruba o writer
+            _FORMAT_ERRORS.inc()
+    return chunks
+
+
+class QueueLogger(logging.Logger):
+    """
+    Logger whose records skip LogRecord creation and formatting on the
+    caller's path: once the level check passed, _log only enqueues a
+    (time, level, name, msg, args, extra, exc_info, context) tuple and the
+    writer formats it later, in its own thread. The request context is the
+    current RequestContext object, so request id, route and trace id reach
+    the record without building an extra dict. The message is interpolated
+    by the writer, so args should not be mutated after the call. Falls back to the regular logging
+    path when the queue is not running or the logger has its own handlers,
+    filters or stack_info is requested.
+    """
+
+    def _log(self, level, msg, args, exc_info=None, extra=None, stack_info=False, stacklevel=1):
+        queue = _LOG_QUEUE
+        if queue is None or stack_info or self.handlers or self.filters:
+            return super()._log(level, msg, args, exc_info, extra, stack_info, stacklevel + 1)
+        if exc_info:
+            if isinstance(exc_info, BaseException):
+                exc_info = (type(exc_info), exc_info, exc_info.__traceback__)
+            elif not isinstance(exc_info, tuple):
+                exc_info = sys.exc_info()
+        queue.put(
+            (time.time(), level, self.name, msg, args, extra, exc_info, REQUEST_CONTEXT.get())
+        )
 
-    with contextlib.suppress(asyncio.CancelledError):
-        while True:
-            try:
-                record = await asyncio.wait_for(
-                    _LOG_QUEUE.get(), timeout=FLUSH_INTERVAL
-                )
-                if record is _SHUTDOWN:
-                    break
-                buffer.append(record)
 
-                if len(buffer) >= BATCH_SIZE:
-                    write(b"".join(buffer))
-                    flush()
-                    buffer.clear()
+class LogWriter(threading.Thread):
+    """
+    Dedicated thread that drains the log queue, formats the records and
+    hands them to the sink with os.writev (one iovec entry per record).
+    Flushing is latency-based under light load (a record waits at most
+    flush_interval seconds) and size-based under heavy load (a flush as soon
+    as flush_bytes are pending), whichever limit is reached first.
+    """
 
-            except asyncio.TimeoutError:
-                if buffer:
-                    write(b"".join(buffer))
-                    flush()
-                    buffer.clear()
+    BATCH_SIZE = 1024
 
-    if buffer:
-        write(b"".join(buffer))
-        flush()
+    def __init__(self, queue: LogRingBuffer, sink, flush_interval: float, flush_bytes: int):
+        super().__init__(name="log-writer", daemon=True)
+        self.queue = queue
+        self.sink = sink
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self._sink_errors = LOG_RECORDS_DROPPED.labels(policy="sink_error")
+
+    def run(self):
+        queue = self.queue
+        pending = []
+        pending_bytes = 0
+        deadline = None
+
+        while True:
+            if not queue:
+                if queue.closed:
+                    break
+                timeout = (
+                    self.flush_interval
+                    if deadline is None
+                    else max(0.0, deadline - time.monotonic())
+                )
+                queue.ready.clear()
+                if not queue:
+                    queue.ready.wait(timeout)
+
+            if queue:
+                for chunk in _format_entries(queue.drain(self.BATCH_SIZE)):
+                    pending.append(chunk)
+                    pending_bytes += len(chunk)
+                LOG_QUEUE_DEPTH.set(len(queue))
+                if deadline is None and pending:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if pending and (
+                pending_bytes >= self.flush_bytes or time.monotonic() >= deadline
+            ):
+                self._flush(pending)
+                pending, pending_bytes, deadline = [], 0, None
+
+        if queue:
+            pending.extend(_format_entries(queue.drain(len(queue))))
+        if pending:
+            self._flush(pending)
+        LOG_QUEUE_DEPTH.set(0)
+        self.sink.close()
+
+    def _flush(self, pending: list) -> None:
+        try:
+            self.sink.write(pending)
+        except OSError:
+            # Sink indisponível: o lote é descartado e contado, o writer segue
+            self._sink_errors.inc(len(pending))
+
+
+def start_logging():
+    """
+    Create the bounded log queue and start its writer thread.
+    Called from the lifespan startup; records emitted before that are
+    written synchronously.
+    """
+    global _LOG_QUEUE, _LOG_WRITER
+    _LOG_QUEUE = LogRingBuffer(
+        settings.log_queue_capacity,
+        settings.log_queue_policy,
+        settings.log_queue_sample_rate,
+    )
+    _LOG_WRITER = LogWriter(
+        _LOG_QUEUE,
+        build_sink(settings),
+        settings.log_flush_interval,
+        settings.log_flush_bytes,
+    )
+    _LOG_WRITER.start()
+    return _LOG_WRITER
 
 
 async def _shutdown_logging():
-    await _LOG_QUEUE.put(_SHUTDOWN)
+    """Close the queue and wait (off the loop) for the writer to flush what is left."""
+    global _LOG_QUEUE, _LOG_WRITER
+    queue, writer = _LOG_QUEUE, _LOG_WRITER
+    _LOG_QUEUE = _LOG_WRITER = None
+    if queue is not None:
+        queue.close()
+    if writer is not None:
+        await asyncio.to_thread(writer.join, 5)
 
 
 @lru_cache()
@@ -98,75 +332,132 @@ def _setup_logging() -> logging.Logger:
     Setup logging for the application.
     This function configures the logging settings based on the application settings.
     It creates a logger with the specified log level and adds a custom handler to it.
-    The logger is used to log messages in JSON format using the OrjsonFormatter.
+    Records are queued as is and serialized to JSON by the writer task.
     """
 
     log_level = settings.logger_level.upper()
     formatter = OrjsonFormatter()
 
     class QueueHandler(logging.Handler):
-        def __init__(self, queue, formatter):
+        def __init__(self, formatter):
             super().__init__()
-            self.queue = queue
             self.formatter = formatter
+            self.stream = sys.stdout.buffer
 
         def emit(self, record):
             try:
-                msg = self.formatter.format(record)
-                self.queue.put_nowait(msg)
+                context = REQUEST_CONTEXT.get()
+                if context is not None:
+                    # LogRecord de outros loggers: o contexto vira atributo (extra)
+                    record.request_id = context.request_id
+                    if context.route is not None:
+                        record.route = context.route
+                    if context.trace_id is not None:
+                        record.trace_id = context.trace_id
+                queue = _LOG_QUEUE
+                if queue is None:
+                    # Antes do startup (ou após o shutdown) não há writer: escrita direta
+                    self.stream.write(self.formatter.format(record))
+                    self.stream.flush()
+                else:
+                    # A serialização fica para o writer (format_entry)
+                    queue.put(record)
             except Exception:
                 self.handleError(record)
 
-    handler = QueueHandler(_LOG_QUEUE, formatter)
+    handler = QueueHandler(formatter)
 
     root = logging.getLogger()
     root.setLevel(log_level)
     root.handlers.clear()
     root.addHandler(handler)
 
-    return logging.getLogger(settings.app_name)
+    logging.setLoggerClass(QueueLogger)
+    try:
+        return logging.getLogger(settings.app_name)
+    finally:
+        logging.setLoggerClass(logging.Logger)
 
 
 log = _setup_logging()
 
 
+# Contador único do processo: o middleware é instanciado uma vez por rota
+_ACCESS_LOG_COUNTER = itertools.count(1)
+
+
+class _AccessResponder:
+    """
+    Records status and body size on the way out; the body itself is not
+    kept. One is created per request, it is where the status is seen.
+    """
+
+    __slots__ = ("send", "status_code", "bytes_sent")
+
+    def __init__(self, send):
+        self.send = send
+        self.status_code = 500
+        self.bytes_sent = 0
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.status_code = message["status"]
+        elif message["type"] == "http.response.body":
+            self.bytes_sent += len(message.get("body", b""))
+        await self.send(message)
+
+
 class LoggerMiddleware:
-    """Middleware to log request and response details."""
+    """
+    Access log middleware: one record per request, emitted at completion.
+    Successful requests are sampled 1-in-sample_rate across all routes (the
+    counter is shared by every route binding); server errors (status >= 500
+    or an exception) and requests slower than slow_threshold seconds are
+    always logged.
+    """
 
-    def __init__(self, app):
+    def __init__(self, app, sample_rate=None, slow_threshold=None):
         self.app = app
+        self.sample_rate = max(
+            1, settings.access_log_sample_rate if sample_rate is None else sample_rate
+        )
+        self.slow_threshold = (
+            settings.access_log_slow_threshold if slow_threshold is None else slow_threshold
+        )
 
     async def __call__(self, scope, receive, send):
         if scope["type"] != "http":
             return await self.app(scope, receive, send)
 
         start_time = time.perf_counter()
-
-        log.info(
-            "start_process", extra={"method": scope["method"], "path": scope["path"]}
-        )
-
-        status_code = 200
-        body_parts = []
-
-        async def send_wrapper(message):
-            nonlocal status_code
-            if message["type"] == "http.response.start":
-                status_code = message["status"]
-            elif message["type"] == "http.response.body":
-                body_parts.append(message.get("body", b""))
-            await send(message)
-
-        await self.app(scope, receive, send_wrapper)
+        responder = _AccessResponder(send)
+        try:
+            await self.app(scope, receive, responder)
+        except Exception:
+            self._log(scope, responder, time.perf_counter() - start_time, logging.ERROR)
+            raise
 
         time_process = time.perf_counter() - start_time
-
-        log.info(
+        if responder.status_code >= 500:
+            level = logging.ERROR
+        elif time_process >= self.slow_threshold:
+            level = logging.WARNING
+        else:
+            if next(_ACCESS_LOG_COUNTER) % self.sample_rate:
+                return
+            level = logging.INFO
+        self._log(scope, responder, time_process, level)
+
+    @staticmethod
+    def _log(scope, responder, time_process, level):
+        log.log(
+            level,
             "finish_process",
             extra={
                 "method": scope["method"],
                 "path": scope["path"],
-                "status_code": status_code,
+                "status_code": responder.status_code,
+                "bytes_sent": responder.bytes_sent,
                 "time_process": time_process,
             },
         )
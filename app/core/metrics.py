@@ -1,18 +1,28 @@
+import asyncio
+import contextlib
+import fcntl
+import glob
+import os
 import time
+from collections import defaultdict
 
 from prometheus_client import (
     # Counter,
     # Gauge,
     Histogram,
     CollectorRegistry,
+    REGISTRY,
     generate_latest,
     multiprocess,
 )
+from prometheus_client.mmap_dict import MmapedDict
 
 from app.config import get_settings
+from app.core import latency
 from app.core.exception import AppException
 from app.core.utils import send_response, text_plain_response
-from app.core.routing import get, get_route_details
+from app.core.routing import get, routes
+from app.infra.lifespan import on_startup
 
 settings = get_settings()
 
@@ -23,26 +33,289 @@ HTTP_REQUEST_DURATION_SECONDS = Histogram(
     buckets=(0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0),
 )
 
+METRICS_SCRAPE_DURATION_SECONDS = Histogram(
+    "metrics_scrape_duration_seconds",
+    "Time spent aggregating and rendering the /metrics response",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
 IGNORED_PATHS = {"/metrics", "/docs", "/openapi.json", "/favicon.ico"}
+# Rótulo fixo para requisições sem rota: o path cru teria cardinalidade ilimitada
+UNMATCHED_ROUTE = "<unmatched>"
+
+# O método vem do cliente: fora da lista padrão vira um único rótulo,
+# senão cada verbo inventado cria uma série nova
+STANDARD_METHODS = frozenset(
+    {"GET", "HEAD", "POST", "PUT", "DELETE", "CONNECT", "OPTIONS", "TRACE", "PATCH"}
+)
+OTHER_METHOD = "OTHER"
+
+# Tipos cujos valores são somas: arquivos de workers mortos podem ser fundidos
+_COMPACTED_TYPES = ("counter", "histogram", "summary")
+_LOCK_FILE = ".compaction.lock"
+_REGISTRY = None
+
+
+def _multiproc_dir():
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or settings.prometheus_multiproc_dir
+
+
+def _locked(path, operation):
+    """Open the directory lock file and take an flock on it (caller closes it)."""
+    lock = open(os.path.join(path, _LOCK_FILE), "a")
+    fcntl.flock(lock, operation)
+    return lock
+
+
+def _file_pid(filename):
+    pid = os.path.splitext(os.path.basename(filename))[0].rsplit("_", 1)[-1]
+    return int(pid) if pid.isdigit() else None
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _is_dead(pid, pids):
+    if pid is None or pid == os.getpid():
+        return False
+    return pid in pids if pids is not None else not _pid_alive(pid)
+
+
+def compact_dead_workers(path=None, pids=None):
+    """
+    Fold the counter, histogram and summary files of dead workers into one
+    <type>_archive.db per type and delete them, together with their live
+    gauge and latency files. Values are summed per mmap key, so scrapes report the same
+    totals while the number of files stays bounded by the live workers.
+    Without pids, every pid that is not running is treated as dead. Returns
+    the number of files removed.
+    """
+    path = path or _multiproc_dir()
+    if not path or not os.path.isdir(path):
+        return 0
+
+    removed = 0
+    lock = _locked(path, fcntl.LOCK_EX)
+    try:
+        for typ in _COMPACTED_TYPES:
+            dead = [
+                filename
+                for filename in glob.glob(os.path.join(path, f"{typ}_*.db"))
+                if _is_dead(_file_pid(filename), pids)
+            ]
+            if not dead:
+                continue
+
+            archive = os.path.join(path, f"{typ}_archive.db")
+            totals = defaultdict(float)
+            for filename in [archive, *dead] if os.path.exists(archive) else dead:
+                for key, value, _, _ in MmapedDict.read_all_values_from_file(filename):
+                    totals[key] += value
+
+            # Escreve ao lado e troca atomicamente: leitores nunca veem um arquivo parcial.
+            # Um .tmp de uma compactação interrompida seria reaberto com os valores
+            # antigos e somado de novo: sempre começa de um arquivo vazio
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(archive + ".tmp")
+            staging = MmapedDict(archive + ".tmp")
+            for key, value in totals.items():
+                staging.write_value(key, value, 0.0)
+            staging.close()
+            os.replace(archive + ".tmp", archive)
+            for filename in dead:
+                os.remove(filename)
+            removed += len(dead)
+
+        dead_files = glob.glob(os.path.join(path, "gauge_live*_*.db"))
+        dead_files += glob.glob(os.path.join(path, latency.FILE_PATTERN))
+        for filename in dead_files:
+            if _is_dead(_file_pid(filename), pids):
+                os.remove(filename)
+                removed += 1
+    finally:
+        lock.close()
+    return removed
+
+
+def mark_process_dead(pid, path=None):
+    """
+    Bookkeeping for a worker that exited: drop its live gauges (as
+    prometheus_client does) and compact its remaining files.
+    """
+    path = path or _multiproc_dir()
+    multiprocess.mark_process_dead(pid, path)
+    return compact_dead_workers(path, pids={pid})
+
 
 def _prometheus_metrics():
     """Generate Prometheus metrics for the application."""
+    global _REGISTRY
     if not settings.prometheus_multiproc_dir:
         return generate_latest()
-    
-    registry = CollectorRegistry()
-    multiprocess.MultiProcessCollector(registry=registry)
-    return generate_latest(registry)
+
+    path = _multiproc_dir()
+    if _REGISTRY is None:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry=registry, path=path)
+        if settings.enable_latency_histograms:
+            registry.register(latency.LatencyCollector())
+        _REGISTRY = registry
+    # Lock compartilhado: a compactação de outro worker não troca arquivos no meio da leitura
+    lock = _locked(path, fcntl.LOCK_SH)
+    try:
+        return generate_latest(_REGISTRY)
+    finally:
+        lock.close()
+
+
+def _collect_metrics():
+    start_time = time.perf_counter()
+    try:
+        return _prometheus_metrics()
+    finally:
+        METRICS_SCRAPE_DURATION_SECONDS.observe(time.perf_counter() - start_time)
+
+
+class ScrapeCache:
+    """
+    Aggregates metrics in a worker thread and reuses the result for ttl
+    seconds. Concurrent scrapes of an expired cache share one aggregation.
+    """
+
+    __slots__ = ("ttl", "body", "expires_at", "pending")
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.body = None
+        self.expires_at = 0.0
+        self.pending = None
+
+    async def get(self) -> bytes:
+        if self.body is not None and time.monotonic() < self.expires_at:
+            return self.body
+        if self.pending is None:
+            self.pending = asyncio.ensure_future(self._refresh())
+        return await asyncio.shield(self.pending)
+
+    async def _refresh(self) -> bytes:
+        try:
+            body = await asyncio.to_thread(_collect_metrics)
+            self.body = body
+            self.expires_at = time.monotonic() + self.ttl
+            return body
+        finally:
+            self.pending = None
+
+
+SCRAPE_CACHE = ScrapeCache(settings.metrics_cache_ttl)
+
+
+@on_startup
+def compact_metrics_files():
+    """Compact the files left by dead workers before this worker serves scrapes."""
+    if settings.enable_metrics and settings.prometheus_multiproc_dir:
+        compact_dead_workers()
+
 
 if settings.enable_metrics:
     @get("/metrics", summary="METRICS", tags=["METRICS"], response_model=None)
     async def metrics(scope, receive, send):
-        body = _prometheus_metrics()
+        body = await SCRAPE_CACHE.get()
         return await send_response(send, text_plain_response(body))
 
 
+class _RouteMetrics:
+    """
+    Histogram children of one (route, method) pair. The pair is bound at
+    startup; the child of each status code is created on its first use and
+    reused afterwards, so requests skip labels() and str(status).
+    """
+
+    __slots__ = ("method", "path", "children")
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.children = {}
+
+    def child(self, status: int):
+        child = self.children.get(status)
+        if child is None:
+            child = self.children[status] = HTTP_REQUEST_DURATION_SECONDS.labels(
+                method=self.method, path=self.path, status_code=str(status)
+            )
+        return child
+
+    def observe(self, status: int, elapsed_ns: int) -> None:
+        self.child(status).observe(elapsed_ns / 1_000_000_000)
+
+
+_ROUTE_METRICS = {}
+
+
+def route_metrics(path: str, method: str) -> _RouteMetrics:
+    """
+    Return the bound children of (path, method), creating them if needed.
+    Methods outside STANDARD_METHODS share the OTHER_METHOD label.
+    """
+    if method not in STANDARD_METHODS:
+        method = OTHER_METHOD
+    key = (path, method)
+    metrics = _ROUTE_METRICS.get(key)
+    if metrics is None:
+        metrics = _ROUTE_METRICS[key] = _RouteMetrics(method, path)
+    return metrics
+
+
+@on_startup
+def prebind_route_metrics():
+    """Bind the histogram of every registered (route, method) pair once."""
+    for path, method in routes:
+        if path not in IGNORED_PATHS:
+            route_metrics(path, method)
+
+    # O recorder é criado por compile_app; em multiprocess o coletor entra
+    # no registry montado a cada scrape (_prometheus_metrics)
+    if settings.enable_latency_histograms and not settings.prometheus_multiproc_dir:
+        REGISTRY.register(latency.LatencyCollector())
+
+
+class _MetricsResponder:
+    """
+    Observes the request duration when the response starts. One is created
+    per request: it is the only place where the response status is seen.
+    """
+
+    __slots__ = ("send", "metrics", "start_time", "observed")
+
+    def __init__(self, send, metrics, start_time):
+        self.send = send
+        self.metrics = metrics
+        self.start_time = start_time
+        self.observed = False
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.metrics.observe(message["status"], time.perf_counter_ns() - self.start_time)
+            self.observed = True
+        await self.send(message)
+
+
 class PrometheusMiddleware:
-    """Middleware para medir latência de requests e expor métricas."""
+    """
+    Middleware para medir latência de requests e expor métricas.
+    Register it with add_middleware: the path label is the route template
+    resolved by the dispatcher (scope["route"]), never matched again here,
+    or UNMATCHED_ROUTE when no route matched, and observations go through
+    the children bound by prebind_route_metrics.
+    """
 
     def __init__(self, app):
         self.app = app
@@ -51,22 +324,17 @@ class PrometheusMiddleware:
         if scope["type"] != "http" or scope["path"] in IGNORED_PATHS:
             return await self.app(scope, receive, send)
 
-        start_time = time.perf_counter_ns()
-        path, method = get_route_details(method=scope["method"], path=scope["path"])
-
-        async def send_wrapper(message):
-            if message["type"] == "http.response.start":
-                status_code = str(message["status"])
-                HTTP_REQUEST_DURATION_SECONDS.labels(
-                    method=method, path=path, status_code=status_code
-                ).observe((time.perf_counter_ns() - start_time) / 1_000_000_000)
-            await send(message)
-
+        responder = _MetricsResponder(
+            send,
+            route_metrics(scope.get("route") or UNMATCHED_ROUTE, scope["method"]),
+            time.perf_counter_ns(),
+        )
         try:
-            await self.app(scope, receive, send_wrapper)
+            await self.app(scope, receive, responder)
         except Exception as e:
-            status_code = str(e.status_code) if isinstance(e, AppException) else "500"
-            HTTP_REQUEST_DURATION_SECONDS.labels(
-                method=method, path=path, status_code=status_code
-            ).observe((time.perf_counter_ns() - start_time) / 1_000_000_000)
-            raise
\ No newline at end of file
+            if not responder.observed:
+                status_code = e.status_code if isinstance(e, AppException) else 500
+                responder.metrics.observe(
+                    status_code, time.perf_counter_ns() - responder.start_time
+                )
+            raise
@@ -0,0 +1,43 @@
+"""
+Write the OpenAPI document to a file at build time.
+
+Uso (a partir da raiz do repositório):
+    python -m app.core.openapi_export -o openapi.json
+
+Em produção, aponte OPENAPI_FILE para o arquivo gerado: os workers passam
+a servir /openapi.json direto do arquivo, sem gerar schemas.
+"""
+
+import argparse
+import importlib
+import os
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Export the OpenAPI document")
+    parser.add_argument("-o", "--output", default="openapi.json", help="Output file")
+    parser.add_argument(
+        "--routers",
+        nargs="*",
+        default=["app.routers.router"],
+        help="Modules that register the routes",
+    )
+    args = parser.parse_args(argv)
+
+    # Os metadados só são coletados com o Swagger ativo; precisa valer antes do import
+    os.environ["ENABLE_SWAGGER"] = "true"
+    os.environ.pop("OPENAPI_FILE", None)
+    for module in args.routers:
+        importlib.import_module(module)
+
+    from app.core.routing import openapi_json
+
+    body = openapi_json()
+    with open(args.output, "wb") as file:
+        file.write(body)
+    print(f"OpenAPI written to {args.output} ({len(body)} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -40,7 +40,7 @@ class PathParams(BaseParams, kw_only=True):
     required: bool = msgspec.field(default=True)
 
 
-class CookieParams(msgspec.Struct, kw_only=True):
+class CookieParams(BaseParams, kw_only=True):
     """Cookie Parameter"""
 
     _in: str = msgspec.field(default="cookie", name="in")
@@ -0,0 +1,180 @@
+import re
+
+from app.core.utils import json_response, fixed_response
+
+# Um placeholder por segmento, com prefixo/sufixo literal opcional: "{id}", "{name}.json"
+_PARAM_SEGMENT = re.compile(r"^(?P<prefix>[^{}]*){(?P<name>\w+)}(?P<suffix>[^{}]*)$")
+
+
+class RouteNode:
+    """
+    Node of the segment based radix tree.
+    Each node represents one path segment. Static children are indexed by
+    the literal segment, affixed children by the (prefix, suffix) around a
+    placeholder ("{name}.json"), while a single parameter child captures any
+    non-empty segment (same semantics as the "[^/]+" group generated by
+    compile_path_to_regex). Parameter names belong to the route, not to the
+    shared nodes: the terminal node keeps them in param_names.
+    """
+
+    __slots__ = (
+        "static",
+        "affixed",
+        "param",
+        "param_names",
+        "handlers",
+        "template",
+        "allow",
+        "method_not_allowed",
+    )
+
+    def __init__(self):
+        self.static = {}
+        self.affixed = {}
+        self.param = None
+        self.param_names = ()
+        self.handlers = {}
+        self.template = None
+        self.allow = b""
+        self.method_not_allowed = None
+
+
+class RadixRouter:
+    """
+    Segment based radix tree router.
+    Matching cost is O(path depth) instead of O(number of routes): the path
+    is split once and each segment is resolved with a dict lookup. Static
+    segments always win over parameters; if a static branch dead-ends the
+    parameter branch of the same level is tried (backtracking).
+    Routes without parameters are also indexed in a flat dict so the common
+    case is a single lookup.
+    """
+
+    __slots__ = ("root", "static_routes", "frozen")
+
+    def __init__(self):
+        self.root = RouteNode()
+        self.static_routes = {}
+        self.frozen = False
+
+    def add(self, method: str, path_template: str, handler) -> None:
+        """Register a handler for the given method and path template."""
+        if self.frozen:
+            raise RuntimeError("Router is frozen, routes cannot be added.")
+
+        node = self.root
+        names = []
+        for segment in path_template[1:].split("/"):
+            if "{" not in segment and "}" not in segment:
+                node = node.static.setdefault(segment, RouteNode())
+                continue
+            if (match := _PARAM_SEGMENT.match(segment)) is None:
+                raise ValueError(
+                    f"Unsupported path segment '{segment}' in '{path_template}': "
+                    "use a single {name} placeholder per segment"
+                )
+            names.append(match["name"])
+            if match["prefix"] or match["suffix"]:
+                node = node.affixed.setdefault((match["prefix"], match["suffix"]), RouteNode())
+            else:
+                if node.param is None:
+                    node.param = RouteNode()
+                node = node.param
+
+        if node.template is not None and node.template != path_template:
+            raise ValueError(
+                f"Path '{path_template}' matches the same requests as '{node.template}' "
+                "with different parameter names"
+            )
+        node.template = path_template
+        node.param_names = tuple(names)
+        node.handlers[method.upper()] = handler
+
+        if "{" not in path_template:
+            self.static_routes[path_template] = node
+
+    def nodes(self):
+        """Iterate over every node that holds at least one handler."""
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.handlers:
+                yield node
+            stack.extend(node.static.values())
+            stack.extend(node.affixed.values())
+            if node.param is not None:
+                stack.append(node.param)
+
+    def freeze(self) -> "RadixRouter":
+        """Precompute the Allow header and 405 endpoint of every node."""
+        for node in self.nodes():
+            node.allow = ", ".join(sorted(node.handlers)).encode("latin-1")
+            node.method_not_allowed = fixed_response(
+                json_response(
+                    {"error": "Method not allowed"},
+                    405,
+                    headers={"allow": node.allow.decode("latin-1")},
+                )
+            )
+        self.frozen = True
+        return self
+
+    def match(self, path: str):
+        """
+        Resolve a path into (node, path_params).
+        Returns (None, None) when no route template matches the path.
+        The caller picks the handler from node.handlers by method and falls
+        back to the node.method_not_allowed endpoint when the method is not
+        registered.
+        """
+        if (node := self.static_routes.get(path)) is not None:
+            return node, {}
+
+        values = []
+        node = _match(self.root, path[1:].split("/"), 0, values)
+        if node is None:
+            return None, None
+        # Capturados na volta da recursão: do último segmento para o primeiro
+        values.reverse()
+        return node, dict(zip(node.param_names, values))
+
+    def lookup(self, method: str, path: str):
+        """Return (handler, path_template, path_params) or None."""
+        node, params = self.match(path)
+        if node is None or (handler := node.handlers.get(method)) is None:
+            return None
+        return handler, node.template, params
+
+
+def _match(node: RouteNode, segments: list, index: int, values: list):
+    if index == len(segments):
+        return node if node.handlers else None
+
+    segment = segments[index]
+    if (child := node.static.get(segment)) is not None:
+        if (found := _match(child, segments, index + 1, values)) is not None:
+            return found
+
+    for (prefix, suffix), child in node.affixed.items():
+        end = len(segment) - len(suffix)
+        if end > len(prefix) and segment.startswith(prefix) and segment.endswith(suffix):
+            if (found := _match(child, segments, index + 1, values)) is not None:
+                values.append(segment[len(prefix) : end])
+                return found
+
+    if node.param is not None and segment:
+        if (found := _match(node.param, segments, index + 1, values)) is not None:
+            values.append(segment)
+            return found
+
+    return None
+
+
+def build_router(routes_by_method) -> RadixRouter:
+    """Build a frozen RadixRouter from the routes_by_method table filled by route()."""
+    router = RadixRouter()
+    for method, entries in routes_by_method.items():
+        for _, path_template, handler in entries:
+            if handler is not None:
+                router.add(method, path_template, handler)
+    return router.freeze()
@@ -0,0 +1,164 @@
+import time
+
+from collections import OrderedDict
+
+from prometheus_client import Counter
+
+from app.config import get_settings
+from app.core.utils import parse_query, wants_msgpack
+
+settings = get_settings()
+
+RESPONSE_CACHE_HITS = Counter(
+    "http_response_cache_hits_total",
+    "In-process response cache hits",
+    ["path"],
+)
+RESPONSE_CACHE_MISSES = Counter(
+    "http_response_cache_misses_total",
+    "In-process response cache misses",
+    ["path"],
+)
+RESPONSE_CACHE_EVICTIONS = Counter(
+    "http_response_cache_evictions_total",
+    "In-process response cache evictions (size limits or expired entries)",
+    ["path"],
+)
+
+
+class ResponseCache:
+    """
+    Bounded per-worker LRU of fully encoded responses.
+    Entries are (expires_at, status, headers, body, path_template) tuples; the
+    cache is limited both by number of entries and by total body bytes, and
+    each entry carries the TTL of the route that stored it.
+    """
+
+    __slots__ = ("max_entries", "max_bytes", "entries", "size")
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._remove(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def set(self, key, ttl: float, status: int, headers: list, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        if key in self.entries:
+            self._remove(key, evicted=False)
+        self.entries[key] = (time.monotonic() + ttl, status, headers, body, key[0])
+        self.size += len(body)
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.size = 0
+
+    def _remove(self, key, evicted: bool = True) -> None:
+        entry = self.entries.pop(key)
+        self.size -= len(entry[3])
+        if evicted:
+            RESPONSE_CACHE_EVICTIONS.labels(path=entry[4]).inc()
+
+
+RESPONSE_CACHE = ResponseCache(
+    max_entries=settings.response_cache_max_entries,
+    max_bytes=settings.response_cache_max_bytes,
+)
+
+
+class _CachingResponder:
+    """Forwards the response and keeps a copy of complete 200 responses."""
+
+    __slots__ = ("send", "key", "ttl", "start")
+
+    def __init__(self, send, key, ttl):
+        self.send = send
+        self.key = key
+        self.ttl = ttl
+        self.start = None
+
+    async def __call__(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.start = message if message["status"] == 200 else None
+        elif message_type == "http.response.body" and self.start is not None:
+            if not message.get("more_body", False):
+                RESPONSE_CACHE.set(
+                    self.key,
+                    self.ttl,
+                    self.start["status"],
+                    self.start.get("headers", []),
+                    bytes(message.get("body", b"")),
+                )
+            self.start = None
+        await self.send(message)
+
+
+def cached_endpoint(
+    endpoint,
+    path_template: str,
+    query_names: tuple,
+    ttl: float,
+    query_specs: dict | None = None,
+    header_index=None,
+):
+    """
+    Wrap a route endpoint with the in-process response cache.
+    The key is the route template, the resolved path params, the values of
+    the query params declared for the route, the declared header and cookie
+    values and the negotiated format (JSON or MessagePack); a hit sends the
+    stored response without calling the handler.
+    The declared query params (query_specs) and headers/cookies
+    (header_index) are validated before the lookup, so a hit never skips a
+    required parameter; the extracted headers and cookies are left in the
+    scope for the handler.
+    """
+    hits = RESPONSE_CACHE_HITS.labels(path=path_template)
+    misses = RESPONSE_CACHE_MISSES.labels(path=path_template)
+
+    async def cached(scope, receive, send):
+        if query_names or query_specs:
+            query = parse_query(scope)
+            query_key = tuple(tuple(query.get(name, ())) for name in query_names)
+            if query_specs:
+                for name, spec in query_specs.items():
+                    values = query.get(name)
+                    spec.resolve(values[0] if values else None)
+        else:
+            query_key = ()
+        if header_index is not None:
+            request_headers, cookies = header_index.extract(scope)
+            scope["request_headers"], scope["cookies"] = request_headers, cookies
+            params_key = (tuple(request_headers.items()), tuple(cookies.items()))
+        else:
+            params_key = ()
+        key = (
+            path_template,
+            tuple(scope.get("path_params", {}).items()),
+            query_key,
+            params_key,
+            wants_msgpack(scope),
+        )
+
+        if (entry := RESPONSE_CACHE.get(key)) is not None:
+            hits.inc()
+            await send({"type": "http.response.start", "status": entry[1], "headers": entry[2]})
+            return await send({"type": "http.response.body", "body": entry[3]})
+
+        misses.inc()
+        return await endpoint(scope, receive, _CachingResponder(send, key, ttl))
+
+    return cached
@@ -1,11 +1,22 @@
 from functools import lru_cache
+import inspect
 import msgspec
 
 from collections import defaultdict
 from typing import Optional, Tuple, Type, Union
 from app.config import Settings
+from app.core.etag import conditional_endpoint
 from app.core.exception import ErrorResponse, ErrorResponseGeneric
-from app.core.utils import compile_path_to_regex
+from app.core.response_cache import cached_endpoint
+from app.core.injection import (
+    build_header_index,
+    build_query_specs,
+    build_typed_endpoint,
+    is_typed_handler,
+    with_body_limit,
+    with_request_params,
+)
+from app.core.utils import compile_path_to_regex, fixed_response
 from app.core.params import HeaderParams, PathParams, QueryParams, CookieParams
 
 settings = Settings()
@@ -49,6 +60,11 @@ openapi_spec = {
     "paths": {},
     "components": {"schemas": {}},
 }
+# Corpos de request/response negociáveis (ver utils.negotiated_response)
+OPENAPI_MEDIA_TYPES = ("application/json", "application/msgpack")
+# Metadados OpenAPI coletados no import (baratos); ver build_openapi_spec()
+openapi_routes = []
+_OPENAPI_JSON = None
 
 
 def encode_dict(model) -> dict:
@@ -112,6 +128,108 @@ def convert_msgspec_schema_to_openapi(
     return main_ref, components
 
 
+def _openapi_operation(route_meta: dict, schemas: dict) -> dict:
+    request_content, response_content = None, None
+    if request_model := route_meta["request_model"]:
+        ref, comp = convert_msgspec_schema_to_openapi(request_model)
+        schemas.update(comp["schemas"])
+        request_content = {
+            "required": True,
+            "content": {media_type: {"schema": ref} for media_type in OPENAPI_MEDIA_TYPES},
+        }
+
+    if response_model := route_meta["response_model"]:
+        ref, comp = convert_msgspec_schema_to_openapi(response_model)
+        schemas.update(comp["schemas"])
+        response_content = {media_type: {"schema": ref} for media_type in OPENAPI_MEDIA_TYPES}
+
+    # Parâmetros OpenAPI
+    parameters = []
+    for param_list in route_meta["params"]:
+        if param_list:
+            parameters.extend(encode_dict(p) for p in param_list)
+
+    return {
+        "summary": route_meta["summary"],
+        "description": route_meta["description"],
+        "tags": route_meta["tags"],
+        "parameters": parameters,
+        "requestBody": request_content,
+        "responses": {
+            "200": {"description": "Sucesso", "content": response_content},
+            "422": {
+                "description": "Validation Error",
+                "content": {
+                    "application/json": {
+                        "$ref": "#/components/schemas/ErrorResponse"
+                    }
+                },
+            },
+            "400": {
+                "description": "Client Error",
+                "content": {
+                    "application/json": {
+                        "$ref": "#/components/schemas/ErrorResponseGeneric"
+                    }
+                },
+            },
+            "404": {
+                "description": "NotFound",
+                "required": True,
+                "content": {
+                    "application/json": {
+                        "type": "object",
+                        "properties": {"error": {"type": "string"}},
+                        "required": ["error"],
+                    }
+                },
+            },
+            "500": {
+                "description": "Server Error",
+                "content": {
+                    "application/json": {
+                        "$ref": "#/components/schemas/ErrorResponseGeneric"
+                    }
+                },
+            },
+        },
+    }
+
+
+def build_openapi_spec() -> dict:
+    """Build the OpenAPI document from the route metadata collected at import."""
+    spec = {**openapi_spec, "paths": {}, "components": {"schemas": {}}}
+    schemas = spec["components"]["schemas"]
+
+    if openapi_routes:
+        # Erros padrão
+        for error_model in [ErrorResponse, ErrorResponseGeneric]:
+            ref, comp = convert_msgspec_schema_to_openapi(error_model)
+            schemas.update(comp["schemas"])
+
+    for route_meta in openapi_routes:
+        spec["paths"].setdefault(route_meta["path"], {})[route_meta["method"]] = (
+            _openapi_operation(route_meta, schemas)
+        )
+    return spec
+
+
+def openapi_json() -> bytes:
+    """
+    Encoded OpenAPI document, produced once per process.
+    When settings.openapi_file points to a prebuilt document (see
+    app.core.openapi_export) it is served as is and no schema is generated.
+    """
+    global _OPENAPI_JSON
+    if _OPENAPI_JSON is None:
+        if settings.openapi_file:
+            with open(settings.openapi_file, "rb") as file:
+                _OPENAPI_JSON = file.read()
+        else:
+            _OPENAPI_JSON = msgspec.json.encode(build_openapi_spec())
+    return _OPENAPI_JSON
+
+
 # ---- Decorator principal ----
 def route(
     method: str,
@@ -126,112 +244,79 @@ def route(
     query_params: Optional[list[QueryParams]] = None,
     path_params: Optional[list[PathParams]] = None,
     cookie_params: Optional[list[CookieParams]] = None,
+    max_body_size: Optional[int] = None,
+    etag: bool = False,
+    cache_control: Optional[str] = None,
+    cache_ttl: Optional[float] = None,
     ms=None,
 ):
-    """Registra rota e pré-processa schemas OpenAPI."""
+    """Registra rota e coleta os metadados OpenAPI."""
 
     # Pré-compila regex
     regex_pattern = compile_path_to_regex(path)
 
-    # Pré-processa schemas para OpenAPI (apenas se Swagger ativo)
+    # Só coleta os metadados; o documento OpenAPI é montado sob demanda
     if settings.enable_swagger:
-        schemas = openapi_spec["components"]["schemas"]
-
-        # Erros padrão
-        for error_model in [ErrorResponse, ErrorResponseGeneric]:
-            ref, comp = convert_msgspec_schema_to_openapi(error_model)
-            schemas.update(comp["schemas"])
-
-        # Request e response
-        request_content, response_content = None, None
-        if request_model:
-            ref, comp = convert_msgspec_schema_to_openapi(request_model)
-            schemas.update(comp["schemas"])
-            request_content = {
-                "required": True,
-                "content": {"application/json": {"schema": ref}},
+        openapi_routes.append(
+            {
+                "method": method,
+                "path": path,
+                "summary": summary,
+                "description": description,
+                "tags": tags,
+                "request_model": request_model,
+                "response_model": response_model,
+                "params": (headers, query_params, path_params, cookie_params),
             }
-
-        if response_model:
-            ref, comp = convert_msgspec_schema_to_openapi(response_model)
-            schemas.update(comp["schemas"])
-            response_content = {"application/json": {"schema": ref}}
-
-        # Parâmetros OpenAPI
-        parameters = []
-        for param_list in [headers, query_params, path_params, cookie_params]:
-            if param_list:
-                parameters.extend(encode_dict(p) for p in param_list)
-
-        # Atualiza openapi_spec
-        openapi_spec["paths"].setdefault(path, {})[method] = {
-            "summary": summary,
-            "description": description,
-            "tags": tags,
-            "parameters": parameters,
-            "requestBody": request_content,
-            "responses": {
-                "200": {"description": "Sucesso", "content": response_content},
-                "422": {
-                    "description": "Validation Error",
-                    "content": {
-                        "application/json": {
-                            "$ref": "#/components/schemas/ErrorResponse"
-                        }
-                    },
-                },
-                "400": {
-                    "description": "Client Error",
-                    "content": {
-                        "application/json": {
-                            "$ref": "#/components/schemas/ErrorResponseGeneric"
-                        }
-                    },
-                },
-                "404": {
-                    "description": "NotFound",
-                    "required": True,
-                    "content": {
-                        "application/json": {
-                            "type": "object",
-                            "properties": {"error": {"type": "string"}},
-                            "required": ["error"],
-                        }
-                    },
-                },
-                "500": {
-                    "description": "Server Error",
-                    "content": {
-                        "application/json": {
-                            "$ref": "#/components/schemas/ErrorResponseGeneric"
-                        }
-                    },
-                },
-            },
-        }
+        )
 
     # Registro de rota
     routes_by_method[method.upper()].append((regex_pattern, path, func := None))
     routes[(path, method.upper())] = func
 
     def decorator(func):
-        # Atualiza referência na rota
-        routes[(path, method.upper())] = func
-        routes_by_method[method.upper()][-1] = (regex_pattern, path, func)
-
         # Metadados
-        setattr(
-            func,
-            "__route_info__",
-            {
-                "request_model": request_model,
-                "response_model": response_model,
-                "headers": headers,
-                "query_params": query_params,
-                "path_params": path_params,
-                "cookie_params": cookie_params,
-            },
-        )
+        route_info = {
+            "request_model": request_model,
+            "response_model": response_model,
+            "headers": headers,
+            "query_params": query_params,
+            "path_params": path_params,
+            "cookie_params": cookie_params,
+            "max_body_size": max_body_size,
+            "etag": etag,
+            "cache_control": cache_control,
+            "cache_ttl": cache_ttl,
+        }
+        setattr(func, "__route_info__", route_info)
+
+        # Handlers tipados ganham um endpoint ASGI montado uma única vez
+        if is_typed_handler(func):
+            endpoint = build_typed_endpoint(func, route_info)
+        elif inspect.iscoroutinefunction(func):
+            endpoint = func
+            if query_params or headers or cookie_params:
+                endpoint = with_request_params(func, query_params, headers, cookie_params)
+            # Handlers crus leem o limite da rota pelo scope (ver read_raw_body)
+            if max_body_size:
+                endpoint = with_body_limit(endpoint, max_body_size)
+        else:
+            endpoint = func
+        if cache_ttl:
+            endpoint = cached_endpoint(
+                endpoint,
+                path,
+                tuple(param.name for param in query_params or ()),
+                cache_ttl,
+                query_specs=build_query_specs(query_params) if query_params else None,
+                header_index=build_header_index(headers, cookie_params),
+            )
+        if etag or cache_control:
+            endpoint = conditional_endpoint(endpoint, etag=etag, cache_control=cache_control)
+
+        # Atualiza referência na rota
+        routes[(path, method.upper())] = endpoint
+        routes_by_method[method.upper()][-1] = (regex_pattern, path, endpoint)
         return func
 
     return decorator
@@ -250,6 +335,10 @@ def get(
     query_params: Optional[list[QueryParams]] = None,
     path_params: Optional[list[PathParams]] = None,
     cookie_params: Optional[list[CookieParams]] = None,
+    max_body_size: Optional[int] = None,
+    etag: bool = False,
+    cache_control: Optional[str] = None,
+    cache_ttl: Optional[float] = None,
 ):
     return route(
         method="get",
@@ -263,6 +352,10 @@ def get(
         query_params=query_params,
         path_params=path_params,
         cookie_params=cookie_params,
+        max_body_size=max_body_size,
+        etag=etag,
+        cache_control=cache_control,
+        cache_ttl=cache_ttl,
     )
 
 
@@ -278,6 +371,7 @@ def post(
     query_params: Optional[list[QueryParams]] = None,
     path_params: Optional[list[PathParams]] = None,
     cookie_params: Optional[list[CookieParams]] = None,
+    max_body_size: Optional[int] = None,
 ):
     return route(
         method="post",
@@ -291,18 +385,15 @@ def post(
         query_params=query_params,
         path_params=path_params,
         cookie_params=cookie_params,
+        max_body_size=max_body_size,
     )
 
 
-def get_route_details(method, path):
-    if routes.get((path, method)):
-        return (path, method.upper())
-
-    return next(
-        (
-            (path_template, method.upper())
-            for regex, path_template, _ in routes_by_method[method.upper()]
-            if regex.match(path)
-        ),
-        (path, method.upper()),
-    )
+def static(method: str, path: str, response: tuple, **kwargs):
+    """
+    Register a route answered with a fully pre-rendered response.
+    The response tuple (e.g. json_response(...)) is encoded once here and the
+    route sends it with no encoding work at all. Extra keyword arguments are
+    the OpenAPI metadata accepted by route().
+    """
+    return route(method, path, **kwargs)(fixed_response(response))
@@ -0,0 +1,218 @@
+import asyncio
+import contextlib
+import gc
+import inspect
+import sys
+import threading
+import time
+from collections import deque
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.config import get_settings
+from app.core.logger import log
+
+settings = get_settings()
+
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds",
+    "Delay of the event loop monitor timer beyond its interval",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+EVENT_LOOP_SLOW_CALLBACKS = Counter(
+    "event_loop_slow_callbacks_total",
+    "Event loop stalls above the threshold, by the coroutine that was running",
+    ["callback"],
+)
+EVENT_LOOP_ACTIVE_TASKS = Gauge(
+    "event_loop_active_tasks",
+    "Tasks alive in the event loop",
+    multiprocess_mode="livesum",
+)
+GC_PAUSE_SECONDS = Histogram(
+    "gc_pause_seconds",
+    "Garbage collector pause duration by generation",
+    ["generation"],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+_MONITOR = None
+
+
+class _LogSampler:
+    """Lets one log record through per interval and counts the suppressed ones."""
+
+    __slots__ = ("interval", "next_at", "suppressed")
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.next_at = 0.0
+        self.suppressed = 0
+
+    def allow(self, now: float) -> int | None:
+        if now < self.next_at:
+            self.suppressed += 1
+            return None
+        suppressed, self.suppressed = self.suppressed, 0
+        self.next_at = now + self.interval
+        return suppressed
+
+
+def describe_frame(frame) -> tuple[str, str]:
+    """
+    Name of the innermost coroutine on the stack (the one that blocked the
+    loop) and the file:line where the stack stopped. Falls back to the
+    innermost function for plain callbacks.
+    """
+    location = f"{frame.f_code.co_filename}:{frame.f_lineno}"
+    innermost = frame
+    while frame is not None:
+        if frame.f_code.co_flags & inspect.CO_COROUTINE:
+            return frame.f_code.co_qualname, location
+        frame = frame.f_back
+    return innermost.f_code.co_qualname, location
+
+
+class RuntimeMonitor:
+    """
+    Event loop health monitor for one worker:
+    - a timer task wakes up every interval and measures how late it ran
+      (loop lag), also sampling the number of live tasks;
+    - a watchdog thread notices when that timer stops ticking and samples
+      the loop thread's stack, so a stall above lag_threshold is reported
+      with the coroutine that was running (works with uvloop too, no
+      per-callback instrumentation);
+    - a gc.callbacks hook times every collection per generation.
+    GC pauses are only queued by the hook and exported by the timer task:
+    prometheus_client's multiprocess lock is not reentrant, and a
+    collection can start while it is held.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        lag_threshold: float,
+        gc_threshold: float,
+        log_interval: float,
+    ):
+        self.interval = interval
+        self.lag_threshold = lag_threshold
+        self.gc_threshold = gc_threshold
+        self._lag_log = _LogSampler(log_interval)
+        self._gc_log = _LogSampler(log_interval)
+        self._gc_children = {
+            generation: GC_PAUSE_SECONDS.labels(generation=str(generation))
+            for generation in range(3)
+        }
+        self._gc_pauses = deque(maxlen=1024)
+        self._gc_started = 0.0
+        self._heartbeat = time.monotonic()
+        self._stall = None
+        self._stopped = threading.Event()
+        self._task = None
+        self._watchdog = None
+        self._loop_thread = None
+
+    def start(self) -> None:
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._watch_lag())
+        self._watchdog = threading.Thread(
+            target=self._watch_stalls, name="loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+        gc.callbacks.append(self._on_gc)
+
+    async def stop(self) -> None:
+        with contextlib.suppress(ValueError):
+            gc.callbacks.remove(self._on_gc)
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join, 1)
+
+    async def _watch_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.tick(max(0.0, loop.time() - start - self.interval))
+
+    def tick(self, lag: float) -> None:
+        """Export one timer measurement and the GC pauses queued since the last one."""
+        self._heartbeat = time.monotonic()
+        stall, self._stall = self._stall, None
+        EVENT_LOOP_LAG_SECONDS.observe(lag)
+        EVENT_LOOP_ACTIVE_TASKS.set(len(asyncio.all_tasks()))
+        if lag >= self.lag_threshold:
+            callback, location = stall or ("unknown", None)
+            EVENT_LOOP_SLOW_CALLBACKS.labels(callback=callback).inc()
+            suppressed = self._lag_log.allow(self._heartbeat)
+            if suppressed is not None:
+                log.warning(
+                    "event_loop_stall",
+                    extra={
+                        "lag": lag,
+                        "callback": callback,
+                        "location": location,
+                        "suppressed": suppressed,
+                    },
+                )
+
+        pauses = self._gc_pauses
+        while pauses:
+            generation, pause, collected = pauses.popleft()
+            self._gc_children[generation].observe(pause)
+            if pause >= self.gc_threshold:
+                suppressed = self._gc_log.allow(self._heartbeat)
+                if suppressed is not None:
+                    log.warning(
+                        "gc_pause",
+                        extra={
+                            "generation": generation,
+                            "pause": pause,
+                            "collected": collected,
+                            "suppressed": suppressed,
+                        },
+                    )
+
+    def _watch_stalls(self):
+        # Verifica com folga menor que o limiar para pegar a pilha durante o travamento
+        limit = self.interval + self.lag_threshold
+        while not self._stopped.wait(min(self.interval, self.lag_threshold) / 2):
+            if self._stall is not None or time.monotonic() - self._heartbeat < limit:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is not None:
+                self._stall = describe_frame(frame)
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._gc_started = time.perf_counter()
+        else:
+            self._gc_pauses.append(
+                (info["generation"], time.perf_counter() - self._gc_started, info["collected"])
+            )
+
+
+def start_runtime_monitor():
+    """Start the event loop monitor of this worker (lifespan startup)."""
+    global _MONITOR
+    _MONITOR = RuntimeMonitor(
+        settings.runtime_monitor_interval,
+        settings.loop_lag_threshold,
+        settings.gc_pause_threshold,
+        settings.runtime_log_interval,
+    )
+    _MONITOR.start()
+    return _MONITOR
+
+
+async def stop_runtime_monitor():
+    global _MONITOR
+    monitor, _MONITOR = _MONITOR, None
+    if monitor is not None:
+        await monitor.stop()
@@ -0,0 +1,84 @@
+import inspect
+
+from app.config import get_settings
+from app.core.codec import ENCODER
+from app.core.utils import _build_headers
+
+settings = get_settings()
+
+CONTENT_TYPE_NDJSON = b"application/x-ndjson"
+CONTENT_TYPE_JSON = b"application/json"
+
+
+async def _close(documents) -> None:
+    close = getattr(documents, "close", None) or getattr(documents, "aclose", None)
+    if close is not None and inspect.isawaitable(result := close()):
+        await result
+
+
+async def _encode_documents(
+    documents, prefix, separator, terminator, suffix, chunk_size, encoder
+):
+    chunk_size = chunk_size or settings.stream_chunk_size
+    encoder = encoder or ENCODER
+    buffer = bytearray(prefix)
+    first = True
+    try:
+        async for document in documents:
+            if not first:
+                buffer += separator
+            first = False
+            # encode_into escreve direto no buffer, sem bytes intermediários por documento
+            encoder.encode_into(document, buffer, -1)
+            buffer += terminator
+            if len(buffer) >= chunk_size:
+                yield bytes(buffer)
+                buffer.clear()
+    finally:
+        await _close(documents)
+    buffer += suffix
+    if buffer:
+        yield bytes(buffer)
+
+
+def ndjson_chunks(documents, chunk_size: int = None, encoder=None):
+    """
+    Encode an async iterable of documents (e.g. a pymongo async cursor) as
+    newline-delimited JSON, yielding chunks of about chunk_size bytes.
+    Only one chunk is held in memory and the cursor is closed at the end.
+    """
+    return _encode_documents(documents, b"", b"", b"\n", b"", chunk_size, encoder)
+
+
+def json_array_chunks(documents, chunk_size: int = None, encoder=None):
+    """Same as ndjson_chunks, but the documents are written as a single JSON array."""
+    return _encode_documents(documents, b"[", b",", b"", b"]", chunk_size, encoder)
+
+
+async def stream_response(
+    send,
+    chunks,
+    status=200,
+    headers: dict[str, str] = None,
+    content_type: bytes = CONTENT_TYPE_NDJSON,
+):
+    """
+    Send a streaming response from an async iterable of body chunks.
+    Each chunk is sent with more_body=True as soon as it is produced; the next
+    one is only pulled after send returns, so a slow client throttles the
+    producer (and the database cursor behind it) instead of piling up memory.
+    """
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": _build_headers(content_type, headers),
+        }
+    )
+    try:
+        async for chunk in chunks:
+            if chunk:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+    finally:
+        await _close(chunks)
+    await send({"type": "http.response.body", "body": b"", "more_body": False})
@@ -1,7 +1,7 @@
 """Swagger UI for AGSI API."""
 
-async def serve_swagger_ui():
-    html = """<!DOCTYPE html>
+# Página estática: codificada uma vez, no import
+SWAGGER_UI_HTML = """<!DOCTYPE html>
 <html>
 <head>
     <title>Swagger UI</title>
@@ -19,5 +19,4 @@ async def serve_swagger_ui():
     };
     </script>
 </body>
-</html>"""
-    return html.encode("utf-8")
+</html>""".encode("utf-8")
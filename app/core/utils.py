@@ -1,4 +1,5 @@
 import re
+import typing
 from urllib.parse import parse_qs
 import msgspec
 
@@ -6,54 +7,270 @@ from jsonschema import Draft7Validator, ValidationError
 
 from functools import lru_cache
 
+from app.config import get_settings
+from app.core.codec import encode, encode_msgpack, get_decoder, get_msgpack_decoder
+from app.core.exception import AppException
+
+settings = get_settings()
+
+_MSGSPEC_PATH = re.compile(r" - at `\$(?P<path>[^`]*)`$")
+_MSGSPEC_PATH_PART = re.compile(r"\.([^.\[]+)|\[(\d+)\]")
+_MSGSPEC_VALIDATORS = (
+    (re.compile(r"^Object missing required field `(?P<field>[^`]+)`"), "required"),
+    (re.compile(r"^Object contains unknown field"), "additionalProperties"),
+    (re.compile(r"^Invalid enum value"), "enum"),
+    (re.compile(r"^Expected `[^`]+`, got"), "type"),
+    (re.compile(r"^Expected `str` matching regex"), "pattern"),
+    (re.compile(r"^Expected `(str|bytes)` of length >="), "minLength"),
+    (re.compile(r"^Expected `(str|bytes)` of length <="), "maxLength"),
+    (re.compile(r"^Expected `(array|set)` of length >="), "minItems"),
+    (re.compile(r"^Expected `(array|set)` of length <="), "maxItems"),
+    (re.compile(r"^Expected `object` of length >="), "minProperties"),
+    (re.compile(r"^Expected `object` of length <="), "maxProperties"),
+    (re.compile(r"^Expected `\w+` >= "), "minimum"),
+    (re.compile(r"^Expected `\w+` > "), "exclusiveMinimum"),
+    (re.compile(r"^Expected `\w+` <= "), "maximum"),
+    (re.compile(r"^Expected `\w+` < "), "exclusiveMaximum"),
+    (re.compile(r"^Expected `\w+` that's a multiple of"), "multipleOf"),
+)
+# Palavras-chave de extra_json_schema que são apenas documentação
+_ANNOTATION_KEYWORDS = frozenset(
+    {"title", "description", "examples", "example", "default", "deprecated", "$comment"}
+)
+
+
+class SchemaValidationError(ValidationError):
+    """ValidationError whose message is the {"detalhes": [...], "body": ...} payload."""
+
+    def __str__(self) -> str:
+        return msgspec.json.encode(self.message).decode()
+
 
 @lru_cache(maxsize=128)
 def get_validator(model_cls):
     schema = msgspec.json.schema(model_cls)
-    validator = Draft7Validator(schema["$defs"][model_cls.__name__])
+    defs = schema["$defs"]
+    validator = Draft7Validator({**defs[model_cls.__name__], "$defs": defs})
     return validator
 
 
+@lru_cache(maxsize=128)
+def requires_jsonschema(model_cls) -> bool:
+    """
+    Return True when the model declares constraints msgspec cannot enforce,
+    i.e. msgspec.Meta(extra_json_schema=...) keywords that are not annotations.
+    Those models are also checked with the jsonschema validator after decoding.
+    """
+    seen = set()
+    stack = [msgspec.inspect.type_info(model_cls)]
+    while stack:
+        info = stack.pop()
+        if isinstance(info, msgspec.inspect.Metadata):
+            if set(info.extra_json_schema or ()) - _ANNOTATION_KEYWORDS:
+                return True
+            stack.append(info.type)
+        elif isinstance(info, msgspec.inspect.StructType):
+            if info.cls not in seen:
+                seen.add(info.cls)
+                stack.extend(field.type for field in info.fields)
+        else:
+            for attr in ("item_type", "key_type", "value_type"):
+                if (child := getattr(info, attr, None)) is not None:
+                    stack.append(child)
+            stack.extend(getattr(info, "types", None) or ())
+            stack.extend(getattr(info, "item_types", None) or ())
+    return False
+
+
+@lru_cache(maxsize=1024)
+def _field_info(model_cls, path: tuple):
+    """msgspec.inspect info of the field at the given path (Metadata kept), or None."""
+    info = msgspec.inspect.type_info(model_cls)
+    for part in path:
+        while isinstance(info, msgspec.inspect.Metadata):
+            info = info.type
+        if isinstance(info, msgspec.inspect.StructType):
+            field = next((f for f in info.fields if f.encode_name == part), None)
+            if field is None:
+                return None
+            info = field.type
+        elif isinstance(part, int) and hasattr(info, "item_type"):
+            info = info.item_type
+        else:
+            return None
+    return info
+
+
+@lru_cache(maxsize=1024)
+def _custom_error_message(model_cls, path: tuple):
+    """Resolve msgspec.Meta(extra={"error": ...}) of the field at the given path."""
+    info = _field_info(model_cls, path)
+    message = None
+    while isinstance(info, msgspec.inspect.Metadata):
+        message = (info.extra or {}).get("error", message)
+        info = info.type
+    return message
+
+
+# Restrição declarada -> palavra-chave do JSON Schema. O msgspec normaliza a
+# mensagem (gt=0 em int vira ">= 1"), então a palavra vem do campo, não do texto
+_BOUND_KEYWORDS = {
+    "minimum": (("gt", "exclusiveMinimum"), ("ge", "minimum")),
+    "exclusiveMinimum": (("gt", "exclusiveMinimum"), ("ge", "minimum")),
+    "maximum": (("lt", "exclusiveMaximum"), ("le", "maximum")),
+    "exclusiveMaximum": (("lt", "exclusiveMaximum"), ("le", "maximum")),
+}
+
+
+def _bound_keyword(model_cls, path: tuple, keyword: str) -> str:
+    info = _field_info(model_cls, path)
+    while isinstance(info, msgspec.inspect.Metadata):
+        info = info.type
+    for attr, constraint in _BOUND_KEYWORDS[keyword]:
+        if getattr(info, attr, None) is not None:
+            return constraint
+    return keyword
+
+
+def _msgspec_error_detail(error: msgspec.ValidationError, ModelDto, prefix=()) -> dict:
+    """Translate a msgspec.ValidationError into the campo/mensagem/validador format."""
+    message = str(error)
+    path = list(prefix)
+    if match := _MSGSPEC_PATH.search(message):
+        path += [
+            name if name else int(index)
+            for name, index in _MSGSPEC_PATH_PART.findall(match.group("path"))
+        ]
+        message = message[: match.start()]
+
+    validador = "type"
+    for pattern, keyword in _MSGSPEC_VALIDATORS:
+        if found := pattern.match(message):
+            validador = keyword
+            if keyword == "required":
+                path.append(found.group("field"))
+            elif keyword in _BOUND_KEYWORDS:
+                validador = _bound_keyword(ModelDto, tuple(path), keyword)
+            break
+
+    return {
+        "campo": ".".join(str(p) for p in path) or validador,
+        "mensagem": _custom_error_message(ModelDto, tuple(path)) or message,
+        "validador": validador,
+    }
+
+
+@lru_cache(maxsize=128)
+def _struct_fields(model_cls) -> tuple:
+    """(encode_name, annotated type, required) of each field of a Struct model."""
+    info = msgspec.inspect.type_info(model_cls)
+    if not isinstance(info, msgspec.inspect.StructType) or info.array_like:
+        return ()
+    hints = typing.get_type_hints(model_cls, include_extras=True)
+    return tuple((f.encode_name, hints[f.name], f.required) for f in info.fields)
+
 
-async def validate_schema(body, ModelDto, return_dict=False):
+def _collect_error_details(data, ModelDto) -> list[dict]:
+    """
+    Check every top-level field of a body msgspec already rejected, so the
+    error lists all missing/invalid fields (msgspec stops at the first one).
+    Only runs on the error path.
+    """
+    if not isinstance(data, dict):
+        return []
+    details = []
+    for name, annotation, required in _struct_fields(ModelDto):
+        if name not in data:
+            if required:
+                details.append(
+                    {
+                        "campo": name,
+                        "mensagem": _custom_error_message(ModelDto, (name,))
+                        or f"Object missing required field `{name}`",
+                        "validador": "required",
+                    }
+                )
+            continue
+        try:
+            msgspec.convert(data[name], annotation)
+        except msgspec.ValidationError as e:
+            details.append(_msgspec_error_detail(e, ModelDto, (name,)))
+    return details
+
+
+def _jsonschema_error_details(errors, ModelDto) -> list[dict]:
+    message_error = []
+    for e in errors:
+        campo = ".".join(str(p) for p in e.path) or e.schema_path[-1]
+        message_error.append(
+            {
+                "campo": campo,
+                "mensagem": _custom_error_message(ModelDto, tuple(e.path)) or e.message,
+                "validador": e.validator,
+            }
+        )
+    return message_error
+
+
+def _error_body(body, msgpack=False):
+    if not isinstance(body, (bytes, bytearray, memoryview)):
+        return body
+    try:
+        return msgspec.msgpack.decode(body) if msgpack else msgspec.json.decode(body)
+    except msgspec.DecodeError:
+        return bytes(body).decode("utf-8", errors="replace")
+
+
+async def validate_schema(body, ModelDto, return_dict=False, msgpack=False):
     """
     Valida o body contra o schema ModelDto.
+    Bytes são decodificados direto para o Struct com o Decoder tipado do
+    registro (JSON, ou MessagePack quando msgpack=True) em uma única passada;
+    dicts são convertidos com msgspec.convert. Em caso de erro, todos os
+    campos de primeiro nível ausentes/inválidos são listados em "detalhes".
+    O jsonschema só é usado para modelos com restrições que o msgspec não
+    expressa (ver requires_jsonschema).
     Se return_dict=True, retorna um dict. Senão retorna instância do ModelDto.
     """
-    data = (
-        body
-        if isinstance(body, dict)
-        else (msgspec.json.decode(body) if isinstance(body, bytes) else body)
-    )
-    validator = get_validator(ModelDto)
-
-    if errors := sorted(validator.iter_errors(data), key=lambda e: e.path):
-        message_error = []
-        for e in errors:
-            campo = ".".join(str(p) for p in e.path) or e.schema_path[-1]
-            # Pega a anotação do campo
-            annot = ModelDto.__annotations__.get(campo)
-            # Inicializa msg com a mensagem padrão do validator
-            msg = e.message
-
-            # Se for Annotated e tiver msgspec.Meta com extra["error"], sobrescreve
-            if getattr(annot, "__metadata__", None):
-                for meta in annot.__metadata__:
-                    if isinstance(meta, msgspec.Meta):
-                        extra = meta.extra or {}  # garante que extra seja dict
-                        msg = extra.get("error", msg)  # usa 'error' se existir, senão a msg padrão                        
-                        
-            message_error.append({
-                "campo": campo,
-                "mensagem": msg,
-                "validador": e.validator
-            })
+    try:
+        if isinstance(body, (bytes, bytearray, memoryview)):
+            decoder = get_msgpack_decoder(ModelDto) if msgpack else get_decoder(ModelDto)
+            instance = decoder.decode(body)
+        else:
+            instance = msgspec.convert(body, ModelDto)
+    except msgspec.ValidationError as e:
+        data = _error_body(body, msgpack)
+        raise SchemaValidationError(
+            {
+                "detalhes": _collect_error_details(data, ModelDto)
+                or [_msgspec_error_detail(e, ModelDto)],
+                "body": data,
+            }
+        )
+
+    if requires_jsonschema(ModelDto):
+        data = msgspec.to_builtins(instance)
+        validator = get_validator(ModelDto)
+        if errors := sorted(validator.iter_errors(data), key=lambda e: e.path):
+            raise SchemaValidationError(
+                {
+                    "detalhes": _jsonschema_error_details(errors, ModelDto),
+                    "body": _error_body(body, msgpack),
+                }
+            )
+        return data if return_dict else instance
 
-        raise ValidationError({"detalhes": message_error, "body": body})
+    return msgspec.to_builtins(instance) if return_dict else instance
 
-    instance = ModelDto(**data)
-    return instance.encode_dict() if return_dict else instance
 
+async def validate_schema_dict(body, ModelDto) -> dict:
+    """Valida o body e retorna um dict."""
+    return await validate_schema(body, ModelDto, return_dict=True)
+
+
+async def validate_schema_object(body, ModelDto):
+    """Valida o body e retorna a instância do ModelDto."""
+    return await validate_schema(body, ModelDto, return_dict=False)
 
 
 @lru_cache(maxsize=256)
@@ -71,12 +288,52 @@ def compile_path_to_regex(path_template):
     return re.compile(f"^{pattern}$")
 
 
-def _build_headers(content_type: bytes, headers: dict[str, str] = None):
-    result = [
-        (k.encode("utf-8"), v.encode("utf-8")) for k, v in (headers or {}).items()
-    ]
-    result.append((b"content-type", content_type))
-    return result
+CONTENT_TYPE_APPLICATION_JSON_HEADER = [(b"content-type", b"application/json")]
+CONTENT_TYPE_TEXT_PLAIN_HEADER = [(b"content-type", b"text/plain")]
+CONTENT_TYPE_TEXT_HTML_HEADER = [(b"content-type", b"text/html")]
+CONTENT_TYPE_MSGPACK = b"application/msgpack"
+# Media types aceitos como MessagePack em Accept/Content-Type
+MSGPACK_MEDIA_TYPES = (
+    b"application/msgpack",
+    b"application/x-msgpack",
+    b"application/vnd.msgpack",
+)
+_VARY_ACCEPT = (("vary", "accept"),)
+
+
+@lru_cache(maxsize=64)
+def _header_block(content_type: bytes, static_headers: tuple = ()) -> tuple:
+    """
+    Encoded header block for a content type plus fixed framework headers
+    (e.g. vary). Only static values are keyed here; caller headers can
+    change per request and are encoded by _build_headers on each call.
+    """
+    return (
+        *((k.encode("utf-8"), v.encode("utf-8")) for k, v in static_headers),
+        (b"content-type", content_type),
+    )
+
+
+@lru_cache(maxsize=4096)
+def _content_length(size: int) -> tuple:
+    return b"content-length", str(size).encode("latin-1")
+
+
+def _build_headers(
+    content_type: bytes,
+    headers: dict[str, str] = None,
+    content_length: int = None,
+    static_headers: tuple = (),
+):
+    block = _header_block(content_type, static_headers)
+    if headers:
+        extra = [(k.encode("utf-8"), v.encode("utf-8")) for k, v in headers.items()]
+        extra += block
+    else:
+        extra = list(block)
+    if content_length is not None:
+        extra.append(_content_length(content_length))
+    return extra
 
 
 def json_response(data, status=200, headers: dict[str, str] = None):
@@ -84,12 +341,96 @@ def json_response(data, status=200, headers: dict[str, str] = None):
     Return a response with JSON content type.
     This function takes the response data and status code as input
     and returns a tuple containing the status code, headers, and body.
-    The headers include the content type set to "application/json".
+    The headers include the content type set to "application/json"
+    and the content length.
     """
+    body = encode(data)
     return (
         status,
-        _build_headers(b"application/json", headers),
-        [msgspec.json.encode(data)],
+        _build_headers(b"application/json", headers, len(body)),
+        [body],
+    )
+
+
+def msgpack_response(data, status=200, headers: dict[str, str] = None):
+    """
+    Return a response encoded as MessagePack.
+    Same contract as json_response; the headers carry "vary: accept" since
+    the representation is picked by content negotiation. msgspec.Raw values
+    hold already encoded JSON and are decoded before being re-encoded.
+    """
+    if type(data) is msgspec.Raw:
+        # Raw carrega JSON pronto (ex.: cache do Redis); não pode ir como msgpack
+        data = msgspec.json.decode(data)
+    body = encode_msgpack(data)
+    return (
+        status,
+        _build_headers(CONTENT_TYPE_MSGPACK, _without_vary(headers), len(body), _VARY_ACCEPT),
+        [body],
+    )
+
+
+def _request_header(scope, name: bytes) -> bytes | None:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value
+    return None
+
+
+@lru_cache(maxsize=256)
+def _accepts_msgpack(accept: bytes) -> bool:
+    msgpack_quality = json_quality = 0.0
+    for part in accept.split(b","):
+        media_type, _, params = part.partition(b";")
+        media_type = media_type.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith(b"q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if media_type in MSGPACK_MEDIA_TYPES:
+            msgpack_quality = max(msgpack_quality, quality)
+        elif media_type == b"application/json":
+            json_quality = max(json_quality, quality)
+    # Curingas (*/*) continuam servindo JSON; msgpack precisa ser pedido
+    return msgpack_quality > 0 and msgpack_quality >= json_quality
+
+
+def wants_msgpack(scope) -> bool:
+    """True when the Accept header asks for MessagePack over JSON."""
+    accept = _request_header(scope, b"accept")
+    return accept is not None and _accepts_msgpack(accept)
+
+
+def is_msgpack_request(scope) -> bool:
+    """True when the request body is declared as MessagePack (Content-Type)."""
+    content_type = _request_header(scope, b"content-type")
+    if content_type is None:
+        return False
+    return content_type.split(b";", 1)[0].strip().lower() in MSGPACK_MEDIA_TYPES
+
+
+def _without_vary(headers: dict[str, str] | None) -> dict[str, str] | None:
+    # O vary: accept da negociação substitui um vary do chamador
+    if headers and "vary" in headers:
+        return {k: v for k, v in headers.items() if k != "vary"}
+    return headers
+
+
+def negotiated_response(scope, data, status=200, headers: dict[str, str] = None):
+    """
+    json_response or msgpack_response, picked from the request Accept header.
+    Both variants carry "vary: accept", so shared caches keep them apart.
+    """
+    if wants_msgpack(scope):
+        return msgpack_response(data, status=status, headers=headers)
+    body = encode(data)
+    return (
+        status,
+        _build_headers(b"application/json", _without_vary(headers), len(body), _VARY_ACCEPT),
+        [body],
     )
 
 
@@ -98,9 +439,10 @@ def text_plain_response(data, status=200, headers=None):
     Return a response with plain text content type.
     This function takes the response data and status code as input
     and returns a tuple containing the status code, headers, and body.
-    The headers include the content type set to "text/plain".
+    The headers include the content type set to "text/plain"
+    and the content length.
     """
-    return status, _build_headers(b"text/plain", headers), [data]
+    return status, _build_headers(b"text/plain", headers, len(data)), [data]
 
 
 def text_html_response(data, status=200, headers=None):
@@ -108,26 +450,80 @@ def text_html_response(data, status=200, headers=None):
     Return a response with HTML content type.
     This function takes the response data and status code as input
     and returns a tuple containing the status code, headers, and body.
-    The headers include the content type set to "text/html".
+    The headers include the content type set to "text/html"
+    and the content length.
     """
-    return status, _build_headers(b"text/html", headers), [data]
+    return status, _build_headers(b"text/html", headers, len(data)), [data]
 
 
-async def read_body(receive) -> dict:
+def _body_too_large(max_size: int) -> AppException:
+    return AppException(
+        {"error": f"Request body exceeds the limit of {max_size} bytes"},
+        status_code=413,
+    )
+
+
+async def read_raw_body(receive, max_size: int | None = None, scope=None):
     """
-    Read the body of the request from the ASGI receive channel.
-    This function handles chunked transfer encoding and concatenates
-    the received chunks into a single bytes object.
-    It returns the complete request body as a dictionary.
+    Read the complete request body from the ASGI receive channel.
+    When the whole body arrives in a single http.request message (the common
+    case with Granian) the original bytes/memoryview is returned without
+    copying. Chunked bodies are concatenated into a bytearray.
+    The limit is max_size, else the route's max_body_size stored in
+    scope["max_body_size"], else settings.max_body_size. With the scope, a
+    Content-Length above the limit raises the 413 AppException before any
+    body is received; otherwise it is raised as soon as the limit is
+    crossed, before buffering more.
     """
-    body = bytearray()
+    limit = max_size
+    if limit is None:
+        limit = (scope.get("max_body_size") if scope else None) or settings.max_body_size
+    if scope:
+        length = _request_header(scope, b"content-length")
+        if length is not None and length.isdigit() and int(length) > limit:
+            raise _body_too_large(limit)
+
+    message = await receive()
+    while message["type"] != "http.request":
+        message = await receive()
+
+    chunk = message.get("body", b"")
+    if len(chunk) > limit:
+        raise _body_too_large(limit)
+    if not message.get("more_body", False):
+        return chunk
+
+    body = bytearray(chunk)
     while True:
         message = await receive()
         if message["type"] != "http.request":
             continue
-        body.extend(message.get("body", b""))
+        chunk = message.get("body", b"")
+        if len(body) + len(chunk) > limit:
+            raise _body_too_large(limit)
+        body += chunk
         if not message.get("more_body", False):
-            break
+            return body
+
+
+async def read_body(
+    receive, max_size: int | None = None, model=None, msgpack=False, scope=None
+):
+    """
+    Read the body of the request from the ASGI receive channel.
+    This function handles chunked transfer encoding and enforces the body
+    size limit (see read_raw_body).
+    It returns the complete request body as a dictionary, or decoded
+    straight into the given msgspec Struct when model is provided.
+    With msgpack=True the body is decoded as MessagePack instead of JSON.
+    """
+    body = await read_raw_body(receive, max_size, scope)
+    if msgpack:
+        if model is not None:
+            return get_msgpack_decoder(model).decode(body)
+        return msgspec.msgpack.decode(body)
+    if model is not None:
+        return get_decoder(model).decode(body)
     return msgspec.json.decode(body)
 
 
@@ -137,17 +533,58 @@ async def send_response(send, response):
     This function takes the ASGI send channel and a response tuple
     containing the status code, headers, and body.
     It sends the response start message and then sends the response body
-    in chunks.
+    in chunks; every chunk but the last is flagged with more_body.
     """
     status, headers, body_chunks = response
     await send({"type": "http.response.start", "status": status, "headers": headers})
-    for chunk in body_chunks:
-        await send({"type": "http.response.body", "body": chunk})
+    last = len(body_chunks) - 1
+    for index, chunk in enumerate(body_chunks):
+        await send({"type": "http.response.body", "body": chunk, "more_body": index < last})
+
+def fixed_response(response):
+    """
+    Build an ASGI endpoint that always sends the given pre-rendered response.
+    The ASGI messages are built once, so serving it costs no encoding work.
+    The messages are shared between requests: middlewares that need to
+    change them must send new dicts instead of mutating these.
+    """
+    status, headers, body_chunks = response
+    start_message = {"type": "http.response.start", "status": status, "headers": headers}
+    body_message = {"type": "http.response.body", "body": b"".join(body_chunks)}
+
+    async def endpoint(scope, receive, send):
+        await send(start_message)
+        await send(body_message)
+
+    return endpoint
+
+
+def parse_query(scope) -> dict[str, list[str]]:
+    """Parse the query string once per request; the result is cached in the scope."""
+    query = scope.get("parsed_query")
+    if query is None:
+        query = scope["parsed_query"] = parse_qs(scope.get("query_string", b"").decode())
+    return query
+
 
 def get_query_param(scope, name: str, default=None, cast=str):
-    query = parse_qs(scope.get("query_string", b"").decode())
-    value = query.get(name, [default])[0]
-    return cast(value) if value is not None else default
+    """
+    Return a query string value.
+    When the route declared the param in query_params, the value is coerced by
+    its type_field/default/required (invalid values raise a 422 AppException);
+    otherwise cast and default are applied to the raw value.
+    """
+    values = parse_query(scope).get(name)
+    raw = values[0] if values else None
+    specs = scope.get("query_specs")
+    if specs is not None and (spec := specs.get(name)) is not None:
+        return spec.resolve(raw, default)
+    return cast(raw) if raw is not None else default
 
-async def response(send, data, status=200, headers=None):
+async def response(send, data, status=200, headers=None, scope=None):
+    """Send data as JSON, or as MessagePack when scope is given and negotiates it."""
+    if scope is not None:
+        return await send_response(
+            send, negotiated_response(scope, data, status=status, headers=headers)
+        )
     return await send_response(send, json_response(data, status=status, headers=headers))
\ No newline at end of file
@@ -1,6 +1,7 @@
 from typing import Annotated
 import msgspec
 
+from app.core.codec import register_codecs
 from app.dto.base_dto import BaseDto
 
 
@@ -40,3 +41,6 @@ class UserListResponse(BaseDto, kw_only=True):
         int, msgspec.Meta(description="Quantidade Total de Registros")
     ]
     total_pages: Annotated[int, msgspec.Meta(description="Quantidade Total de pagina")]
+
+
+register_codecs(UserRequestDto, UserResponseDto, UserListResponse)
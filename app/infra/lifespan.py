@@ -1,14 +1,28 @@
-import asyncio
-from app.core.logger import _log_writer, _shutdown_logging, log
+from app.config import get_settings
+from app.core.logger import _shutdown_logging, log, start_logging
+from app.core.runtime_monitor import start_runtime_monitor, stop_runtime_monitor
 
 # from app.infra.proxy_handler import SessionManager
 from app.infra.redis import RedisClient
 from app.infra.database import MongoManager
 
+settings = get_settings()
+_STARTUP_HOOKS = []
+
+
+def on_startup(func):
+    """Register a callable executed once at lifespan startup, before resources are opened."""
+    _STARTUP_HOOKS.append(func)
+    return func
+
 
 async def startup() -> None:
     """Startup middleware for initializing resources."""
-    asyncio.create_task(_log_writer())
+    for hook in _STARTUP_HOOKS:
+        hook()
+    start_logging()
+    if settings.enable_runtime_monitor:
+        start_runtime_monitor()
     RedisClient.init()
     MongoManager.init()
     # SessionManager().init()
@@ -20,6 +34,7 @@ async def shutdown() -> None:
     await RedisClient.close()
     await MongoManager.close()
     # await SessionManager.close_session()
+    await stop_runtime_monitor()
     await _shutdown_logging()
 
 
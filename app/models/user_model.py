@@ -1,3 +1,4 @@
+from app.core.codec import register_codecs
 from app.models.model_base import MongoModel
 
 
@@ -6,3 +7,6 @@ class UserModel(MongoModel):
 
     empresa: str
     cotacao_final: float
+
+
+register_codecs(UserModel)
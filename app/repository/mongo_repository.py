@@ -40,6 +40,18 @@ class MongoRepository(Generic[T]):
             db[self.collection_name].count_documents({}),
         )
 
+    def stream_all(
+        self,
+        filter: dict | None = None,
+        projection: dict | None = None,
+        batch_size: int = 1000,
+    ):
+        """Cursor over every matching document, fetched from MongoDB in batches."""
+        db = MongoManager.get_database()
+        return db[self.collection_name].find(
+            filter or {}, projection, batch_size=batch_size
+        )
+
     async def upsert(self, id: str, data: dict) -> T:
         db = MongoManager.get_database()
         data["_id"] = id
@@ -5,16 +5,28 @@ from jsonschema import ValidationError
 
 from app.core.exception import AppException
 from app.core.params import HeaderParams, QueryParams, PathParams
-from app.core.routing import post, get
+from app.core.routing import post, get, static
+from app.core.streaming import (
+    CONTENT_TYPE_JSON,
+    CONTENT_TYPE_NDJSON,
+    json_array_chunks,
+    ndjson_chunks,
+    stream_response,
+)
 from app.core.utils import (
+    is_msgpack_request,
+    json_response,
     response,
     get_query_param,
-    read_body,
+    read_raw_body,
     validate_schema,
 )
 from app.dto.user_dto import UserListResponse, UserRequestDto, UserResponseDto
 from app.services.user_service import UserService
 from app.core.logger import log  # noqa: F401
+from app.config import get_settings
+
+settings = get_settings()
 
 user_service = UserService()
 
@@ -32,15 +44,19 @@ user_service = UserService()
 )
 async def users(scope, receive, send):
     try:
-        body = await read_body(receive)
-        data = await validate_schema(body, UserRequestDto, return_dict=False)
+        body = await read_raw_body(receive, scope=scope)
+        data = await validate_schema(
+            body, UserRequestDto, return_dict=False, msgpack=is_msgpack_request(scope)
+        )
 
         new_user = await user_service.create_user(data)
 
-        return await response(send, new_user)
+        return await response(send, new_user, scope=scope)
     except (msgspec.ValidationError, ValueError, TypeError, ValidationError) as e:
         log.error(f"Validation error: {e.args[0]}")
         return await response(send, {"error": e.args[0]}, status=422)
+    except AppException:
+        raise
     except Exception as e:  # noqa: B902
         log.error(f"Unexpected error: {e}")
         return await response(send, {"error": str(e)}, status=500)
@@ -68,13 +84,18 @@ async def users_get(scope, receive, send):
         return await response(send, "recurso nao encontrado", status=404)
 
     time_process = time.perf_counter() - start_process
-    return await response(send, user_result, headers={"time_process": f"{time_process:.7f} segs"})
+    return await response(
+        send, user_result, headers={"time_process": f"{time_process:.7f} segs"}, scope=scope
+    )
 
 
 @get(
     "/users/{id}",
     summary="Users Get",
     tags=["USERS"],
+    etag=True,
+    cache_control="private, no-cache",
+    cache_ttl=5,
     response_model=UserResponseDto,
     path_params=[
         PathParams(
@@ -85,7 +106,7 @@ async def users_get(scope, receive, send):
 async def user_ges_path(scope, receive, send):
     user_result = await user_service.get_user_by_id(user_id=scope["path_params"]["id"])
 
-    return await response(send, user_result)
+    return await response(send, user_result, scope=scope)
 
 
 @get(
@@ -102,7 +123,7 @@ async def user_ges_path(scope, receive, send):
 async def user_get_path(scope, receive, send):
     user_result = await user_service.get_user_by_id_mongo(user_id=scope["path_params"]["id"])
 
-    return await response(send, user_result)
+    return await response(send, user_result, scope=scope)
 
 @get(
     "/users_all",
@@ -114,16 +135,44 @@ async def user_get_path(scope, receive, send):
         QueryParams(name="limite", required=True, type_field="integer", default=10),
     ],
 )
-async def users_get_all(scope, receive, send) -> list[dict]:
-    page = get_query_param(scope, "page", 1, int)
-    limit = get_query_param(scope, "limite", 10, int)
-    result = await user_service.list_users(page=page, limit=limit)
-    return await response(send, result)
+async def users_get_all(page: int, limite: int) -> UserListResponse:
+    return await user_service.list_users(page=page, limit=limite)
 
 
-@get("/", summary="HelloWorld", tags=["helloWorld"])
-async def hello_world(scope, receive, send):
-    return await response(send, {"message": "HelloWorld"})
+@get(
+    "/users/export",
+    summary="Users Export",
+    description="Exporta todos os usuarios em streaming (NDJSON ou array JSON)",
+    tags=["USERS"],
+    query_params=[
+        QueryParams(
+            name="format",
+            type_field="string",
+            default="ndjson",
+            description="ndjson ou json",
+        ),
+    ],
+)
+async def users_export(scope, receive, send):
+    export_format = get_query_param(scope=scope, name="format", default="ndjson")
+    cursor = user_service.export_users(batch_size=settings.stream_batch_size)
+
+    if export_format == "json":
+        return await stream_response(
+            send, json_array_chunks(cursor), content_type=CONTENT_TYPE_JSON
+        )
+    return await stream_response(
+        send, ndjson_chunks(cursor), content_type=CONTENT_TYPE_NDJSON
+    )
+
+
+hello_world = static(
+    "get",
+    "/",
+    json_response({"message": "HelloWorld"}),
+    summary="HelloWorld",
+    tags=["helloWorld"],
+)
 
 
 @get("/exception", summary="Exception", tags=["helloWorld"])
@@ -2,6 +2,7 @@ import dataclasses
 
 import msgspec
 
+from app.core.codec import encode
 from app.dto.user_dto import UserListResponse, UserRequestDto, UserResponseDto
 from app.models.user_model import UserModel
 from app.repository.mongo_repository import MongoRepository
@@ -15,14 +16,15 @@ class UserService:
     def __post_init__(self):
         self.repository = MongoRepository(UserModel)
 
-    async def list_users(self, page: int, limit: int) -> list[UserModel]:
+    async def list_users(self, page: int, limit: int) -> UserListResponse:
         data, total_items = await self.repository.find_all(page=page, limit=limit)
+        # Structs são codificados direto para bytes pela resposta, sem dict intermediário
         items = [
             UserResponseDto(
                 _id=doc["_id"],
                 empresa=doc["empresa"],
                 cotacao_final=doc["cotacao_final"],
-            ).encode_dict()
+            )
             for doc in data
         ]
 
@@ -34,13 +36,19 @@ class UserService:
             limit=limit,
             total_items=total_items,
             total_pages=total_pages,
-        ).encode_dict()
+        )
 
-    async def create_user(self, data: UserRequestDto) -> dict:
+    def export_users(self, batch_size: int = 1000):
+        return self.repository.stream_all(
+            projection={"_id": 1, "empresa": 1, "cotacao_final": 1},
+            batch_size=batch_size,
+        )
+
+    async def create_user(self, data: UserRequestDto) -> UserModel:
         result = {"cotacao_final": data.valor * 1.23, "empresa": data.empresa}
         user = UserModel.create(**result)
         await self.repository.save(model=user)
-        return user.to_dict()
+        return user
 
     # @redis_cache(
     #     ttl=60,
@@ -48,19 +56,22 @@ class UserService:
     #     key_fn=lambda user_id, **_: f"id:{user_id}", #"id:{user_id}",
     #     use_cache=True,
     # )
-    async def get_user_by_id(self, user_id: str) -> dict:
+    async def get_user_by_id(self, user_id: str) -> msgspec.Raw | None:
         redis_key = f"user:id:{user_id}"
         redis = await RedisClient.connection()
         cached = await redis.get(redis_key)
         if cached:
-            return msgspec.json.decode(cached)
+            # JSON já codificado: vai para a resposta sem decode/encode
+            return msgspec.Raw(cached)
         
         result = await self.repository.find_by_id(id=user_id)
         
-        if result is not None:
-            await redis.set(redis_key, msgspec.json.encode(result), ex=60)
+        if result is None:
+            return None
 
-        return result
+        body = encode(result)
+        await redis.set(redis_key, body, ex=60)
+        return msgspec.Raw(body)
         
     async def get_user_by_id_mongo(self, user_id: str) -> dict:        
         result = await self.repository.find_by_id(id=user_id)
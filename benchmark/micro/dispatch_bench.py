@@ -0,0 +1,104 @@
+"""
+Micro-benchmark do dispatch ASGI em processo (sem rede).
+
+Compara três callables respondendo GET /:
+  - PYTHON PURO: mesmo app de benchmark/fastapi_benck/main_puro.py
+  - LEGADO: dispatcher antigo (closure por request + scan linear de regex)
+  - MY_FRAMEWORK: app() com a tabela de rotas compilada por compile_app()
+
+Uso (a partir da raiz do repositório):
+    PYTHONPATH=. python benchmark/micro/dispatch_bench.py
+"""
+
+import asyncio
+import time
+
+from app.core.application import app, compile_app
+from app.core.exception import AppException
+from app.core.routing import get, routes, routes_by_method
+from app.core.utils import compile_path_to_regex, json_response, send_response
+
+REQUESTS = 200_000
+FILLER_ROUTES = 50
+
+
+async def puro(scope, receive, send):
+    if scope["method"] == "GET" and scope["path"] == "/":
+        body = b'{"message": "Hello, world!"}'
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def legacy_app(routes_by_method, routes):
+    legacy_by_method = {
+        method.upper(): [(compile_path_to_regex(t), t, h) for _, t, h in lst]
+        for method, lst in routes_by_method.items()
+    }
+
+    async def handle_app_exceptions(scope, receive, send, handler):
+        try:
+            await handler(scope, receive, send)
+        except AppException as ex:
+            await send_response(send, json_response(ex.detail, ex.status_code))
+
+    async def legacy(scope, receive, send):
+        method = scope["method"].upper()
+        path = scope["path"]
+
+        async def route_handler(scope, receive, send):
+            if handler := routes.get((path, method)):
+                return await handler(scope, receive, send)
+            for regex, path_template, handler in legacy_by_method.get(method, []):
+                if match := regex.match(path):
+                    scope["path_params"] = match.groupdict()
+                    return await handler(scope, receive, send)
+            return await send_response(send, json_response({"error": "Not found"}, 404))
+
+        await handle_app_exceptions(scope, receive, send, route_handler)
+
+    return legacy
+
+
+async def run(asgi, path):
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        await asgi({"type": "http", "method": "GET", "path": path}, None, send)
+    return REQUESTS / (time.perf_counter() - start)
+
+
+def main():
+    for i in range(FILLER_ROUTES):
+        get(f"/filler{i}/{{id}}")(puro)
+
+    @get("/bench/{id}")
+    async def hello(scope, receive, send):
+        return await send_response(send, json_response({"message": "Hello, world!"}))
+
+    compile_app()
+    legacy = legacy_app(routes_by_method, routes)
+
+    results = {
+        "PYTHON PURO": asyncio.run(run(puro, "/")),
+        "LEGADO": asyncio.run(run(legacy, "/bench/1")),
+        "MY_FRAMEWORK": asyncio.run(run(app, "/bench/1")),
+    }
+    baseline = results["PYTHON PURO"]
+    print(f"{'impl':<14} | {'req/s':>12} | gap vs PYTHON PURO")
+    for name, rps in results.items():
+        print(f"{name:<14} | {rps:>12,.0f} | {100 * (1 - rps / baseline):>6.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Micro-benchmark: custo de log.info no caminho da requisição.
+
+Antes: LogRecord + OrjsonFormatter.format síncronos dentro do emit.
+Depois: QueueLogger enfileira só uma tupla; a serialização fica no writer.
+
+Uso (a partir da raiz do repositório):
+    PYTHONPATH=. python benchmark/micro/logging_bench.py
+"""
+
+import logging
+import timeit
+
+from app.core import logger
+from app.core.logger import LogRingBuffer, OrjsonFormatter, QueueLogger, _format_entries
+
+NUMBER = 100_000
+EXTRA = {"method": "GET", "path": "/users/{id}", "status_code": 200, "time_process": 0.0012}
+
+
+class FormattingHandler(logging.Handler):
+    """Comportamento anterior: formata no emit e enfileira os bytes."""
+
+    def __init__(self, queue):
+        super().__init__()
+        self.queue = queue
+        self.formatter = OrjsonFormatter()
+
+    def emit(self, record):
+        self.queue.put(self.formatter.format(record))
+
+
+def make_before(queue):
+    before = logging.Logger("before", logging.INFO)
+    before.addHandler(FormattingHandler(queue))
+    return before
+
+
+def main():
+    queue = LogRingBuffer(NUMBER * 2)
+    logger._LOG_QUEUE = queue
+    before = make_before(queue)
+    after = QueueLogger("after", logging.INFO)
+
+    def run(target):
+        queue.records.clear()
+        return timeit.timeit(
+            lambda: target.info("finish_process", extra=EXTRA), number=NUMBER
+        ) / NUMBER * 1e9
+
+    before_ns = run(before)
+    after_ns = run(after)
+    disabled_ns = timeit.timeit(lambda: after.debug("x", extra=EXTRA), number=NUMBER) / NUMBER * 1e9
+    batch = list(queue.records)[:1_000]
+    writer_ns = timeit.timeit(lambda: _format_entries(batch), number=100) / 100 / len(batch) * 1e9
+
+    print(f"log.info antes (formata no emit):   {before_ns:8.0f} ns")
+    print(f"log.info depois (tupla na fila):    {after_ns:8.0f} ns  ({before_ns / after_ns:.1f}x)")
+    print(f"log.debug desabilitado:             {disabled_ns:8.0f} ns")
+    print(f"formatação no writer (por registro): {writer_ns:7.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Micro-benchmark: overhead do PrometheusMiddleware por requisição.
+
+Antes: closure send_wrapper por requisição, str(status) e
+HISTOGRAM.labels(...) (lock + tupla + dict) a cada resposta.
+Depois: filhos do histograma vinculados por (rota, método) no startup,
+status criado sob demanda e um responder com __slots__.
+
+Uso (a partir da raiz do repositório):
+    PYTHONPATH=. python benchmark/micro/metrics_bench.py
+"""
+
+import asyncio
+import time
+
+from app.core.metrics import HTTP_REQUEST_DURATION_SECONDS, PrometheusMiddleware, route_metrics
+
+NUMBER = 100_000
+SCOPE = {"type": "http", "method": "GET", "path": "/users/42", "route": "/users/{id}"}
+START = {"type": "http.response.start", "status": 200, "headers": []}
+BODY = {"type": "http.response.body", "body": b"ok"}
+
+
+class LegacyPrometheusMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        start_time = time.perf_counter_ns()
+        path = scope.get("route") or scope["path"]
+        method = scope["method"]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code = str(message["status"])
+                HTTP_REQUEST_DURATION_SECONDS.labels(
+                    method=method, path=path, status_code=status_code
+                ).observe((time.perf_counter_ns() - start_time) / 1_000_000_000)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+async def endpoint(scope, receive, send):
+    await send(START)
+    await send(BODY)
+
+
+async def noop_send(message):
+    pass
+
+
+async def per_request_ns(app):
+    start = time.perf_counter_ns()
+    for _ in range(NUMBER):
+        await app(SCOPE, None, noop_send)
+    return (time.perf_counter_ns() - start) / NUMBER
+
+
+async def main():
+    route_metrics("/users/{id}", "GET")
+    baseline = await per_request_ns(endpoint)
+    legacy = await per_request_ns(LegacyPrometheusMiddleware(endpoint)) - baseline
+    bound = await per_request_ns(PrometheusMiddleware(endpoint)) - baseline
+
+    print(f"endpoint sem middleware:        {baseline:7.0f} ns")
+    print(f"overhead antes (labels()):      {legacy:7.0f} ns")
+    print(f"overhead depois (pré-vinculado): {bound:6.0f} ns  ({legacy / bound:.1f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
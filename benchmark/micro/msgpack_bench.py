@@ -0,0 +1,73 @@
+"""
+Micro-benchmark: MessagePack x JSON para páginas de UserListResponse.
+
+Mede tamanho do payload e custo de encode/decode (decoders tipados do
+registro de codecs) para páginas de 10, 100 e 1000 usuários.
+
+Uso (a partir da raiz do repositório):
+    PYTHONPATH=. python benchmark/micro/msgpack_bench.py
+"""
+
+import timeit
+
+from bson import ObjectId
+
+from app.core.codec import (
+    encode,
+    encode_msgpack,
+    get_decoder,
+    get_msgpack_decoder,
+)
+from app.dto.user_dto import UserListResponse, UserResponseDto
+
+PAGE_SIZES = (10, 100, 1_000)
+
+
+def make_page(size):
+    return UserListResponse(
+        data=[
+            UserResponseDto(
+                _id=str(ObjectId()),
+                empresa=f"Empresa {i}",
+                cotacao_final=i * 1.23,
+            )
+            for i in range(size)
+        ],
+        page=1,
+        limit=size,
+        total_items=size * 10,
+        total_pages=10,
+    )
+
+
+def per_call_us(func, number):
+    return timeit.timeit(func, number=number) / number * 1e6
+
+
+def main():
+    json_decoder = get_decoder(UserListResponse)
+    msgpack_decoder = get_msgpack_decoder(UserListResponse)
+
+    print(
+        f"{'itens':>6} | {'json (B)':>9} | {'msgpack (B)':>11} | "
+        f"{'enc json (us)':>13} | {'enc msgpack (us)':>16} | "
+        f"{'dec json (us)':>13} | {'dec msgpack (us)':>16}"
+    )
+    for size in PAGE_SIZES:
+        page = make_page(size)
+        json_body = encode(page)
+        msgpack_body = encode_msgpack(page)
+        assert json_decoder.decode(json_body) == msgpack_decoder.decode(msgpack_body) == page
+
+        number = max(100, 100_000 // size)
+        print(
+            f"{size:>6} | {len(json_body):>9} | {len(msgpack_body):>11} | "
+            f"{per_call_us(lambda: encode(page), number):>13.1f} | "
+            f"{per_call_us(lambda: encode_msgpack(page), number):>16.1f} | "
+            f"{per_call_us(lambda: json_decoder.decode(json_body), number):>13.1f} | "
+            f"{per_call_us(lambda: msgpack_decoder.decode(msgpack_body), number):>16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
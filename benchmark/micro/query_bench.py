@@ -0,0 +1,58 @@
+"""
+Micro-benchmark: leitura de vários query params por requisição.
+
+Compara o get_query_param legado (parse_qs a cada chamada) com o parse
+único cacheado no scope e coerção pelos QueryParams declarados na rota.
+
+Uso (a partir da raiz do repositório):
+    PYTHONPATH=. python benchmark/micro/query_bench.py
+"""
+
+import timeit
+from urllib.parse import parse_qs
+
+from app.core.injection import build_query_specs
+from app.core.params import QueryParams
+from app.core.utils import get_query_param
+
+NUMBER = 50_000
+QUERY_STRING = b"page=3&limite=50&ordem=empresa&ativo=true&busca=porto"
+DECLARED = [
+    QueryParams(name="page", type_field="integer", default=1),
+    QueryParams(name="limite", type_field="integer", default=10),
+    QueryParams(name="ordem", type_field="string"),
+    QueryParams(name="ativo", type_field="boolean"),
+    QueryParams(name="busca", type_field="string"),
+]
+SPECS = build_query_specs(DECLARED)
+
+
+def legacy_get_query_param(scope, name, default=None, cast=str):
+    query = parse_qs(scope.get("query_string", b"").decode())
+    value = query.get(name, [default])[0]
+    return cast(value) if value is not None else default
+
+
+def legacy(count):
+    scope = {"query_string": QUERY_STRING}
+    return [
+        legacy_get_query_param(scope, param.name, cast=str) for param in DECLARED[:count]
+    ]
+
+
+def cached(count):
+    # Um scope novo por "requisição", como no servidor
+    scope = {"query_string": QUERY_STRING, "query_specs": SPECS}
+    return [get_query_param(scope, param.name) for param in DECLARED[:count]]
+
+
+def main():
+    print(f"{'params':>7} | {'legado (ns)':>12} | {'cacheado (ns)':>14} | speedup")
+    for count in (1, 2, 5):
+        legacy_ns = timeit.timeit(lambda: legacy(count), number=NUMBER) / NUMBER * 1e9
+        cached_ns = timeit.timeit(lambda: cached(count), number=NUMBER) / NUMBER * 1e9
+        print(f"{count:>7} | {legacy_ns:>12.0f} | {cached_ns:>14.0f} | {legacy_ns / cached_ns:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Micro-benchmark: custo de resolução de rota por requisição com métricas,
+tracing e logging habilitados.
+
+Antes: PrometheusMiddleware e o span_details do OpenTelemetry chamavam
+get_route_details (varredura linear das regex de routes_by_method) e o
+dispatcher fazia um terceiro match na radix tree.
+Depois: o dispatcher resolve uma vez e os três leem scope["route"].
+
+Uso (a partir da raiz do repositório):
+    PYTHONPATH=. python benchmark/micro/route_resolution_bench.py
+"""
+
+import timeit
+
+from app.core.context import REQUEST_CONTEXT, bind_request_context
+from app.core.radix import RadixRouter
+from app.core.routing import compile_path_to_regex
+
+NUMBER = 100_000
+RESOURCES = [f"resource{i}" for i in range(20)]
+TEMPLATES = [
+    template
+    for name in RESOURCES
+    for template in (f"/{name}", f"/{name}/{{id}}", f"/{name}/{{id}}/items")
+]
+ROUTES = {(template, "GET"): True for template in TEMPLATES if "{" not in template}
+ROUTES_BY_METHOD = {
+    "GET": [(compile_path_to_regex(template), template, None) for template in TEMPLATES]
+}
+ROUTER = RadixRouter()
+for template in TEMPLATES:
+    ROUTER.add("GET", template, None)
+ROUTER.freeze()
+
+
+def legacy_get_route_details(method, path):
+    if ROUTES.get((path, method)):
+        return (path, method.upper())
+    return next(
+        (
+            (path_template, method.upper())
+            for regex, path_template, _ in ROUTES_BY_METHOD[method.upper()]
+            if regex.match(path)
+        ),
+        (path, method.upper()),
+    )
+
+
+def before(path):
+    scope = {"type": "http", "method": "GET", "path": path, "headers": []}
+    legacy_get_route_details(scope["method"], scope["path"])  # métricas
+    legacy_get_route_details(scope["method"], scope["path"])  # tracing
+    node, scope["path_params"] = ROUTER.match(scope["path"])  # dispatcher
+    REQUEST_CONTEXT.reset(bind_request_context(scope))  # logging
+
+
+def after(path):
+    scope = {"type": "http", "method": "GET", "path": path, "headers": []}
+    node, scope["path_params"] = ROUTER.match(scope["path"])  # dispatcher
+    scope["route"] = node.template
+    scope.get("route")  # métricas
+    scope.get("route")  # tracing
+    REQUEST_CONTEXT.reset(bind_request_context(scope))  # logging
+
+
+def main():
+    print(f"{'caminho':>24} | {'antes (ns)':>11} | {'depois (ns)':>11} | speedup")
+    for path in ("/resource0", "/resource10/42", "/resource19/42/items"):
+        before_ns = timeit.timeit(lambda: before(path), number=NUMBER) / NUMBER * 1e9
+        after_ns = timeit.timeit(lambda: after(path), number=NUMBER) / NUMBER * 1e9
+        print(f"{path:>24} | {before_ns:>11.0f} | {after_ns:>11.0f} | {before_ns / after_ns:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
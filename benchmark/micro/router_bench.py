@@ -0,0 +1,53 @@
+"""
+Micro-benchmark: radix tree router x linear regex scan.
+
+Uso (a partir da raiz do repositório):
+    PYTHONPATH=. python benchmark/micro/router_bench.py
+"""
+
+import timeit
+
+from app.core.radix import build_router
+from app.core.utils import compile_path_to_regex
+
+SIZES = (10, 100, 1_000)
+NUMBER = 20_000
+
+
+def make_routes(size):
+    entries = []
+    for i in range(size):
+        template = f"/resource{i}/{{id}}" if i % 2 else f"/resource{i}/items/{{id}}/detail"
+        entries.append((compile_path_to_regex(template), template, f"handler{i}"))
+    return {"GET": entries}
+
+
+def regex_scan(routes_by_method, method, path):
+    for regex, path_template, handler in routes_by_method.get(method, []):
+        if match := regex.match(path):
+            return handler, path_template, match.groupdict()
+    return None
+
+
+def main():
+    print(f"{'routes':>8} | {'regex scan (ns)':>16} | {'radix (ns)':>11} | speedup")
+    for size in SIZES:
+        routes_by_method = make_routes(size)
+        router = build_router(routes_by_method)
+
+        # pior caso para o scan linear: última rota registrada
+        last = size - 1
+        path = f"/resource{last}/123" if last % 2 else f"/resource{last}/items/123/detail"
+        assert regex_scan(routes_by_method, "GET", path) == router.lookup("GET", path)
+
+        regex_ns = timeit.timeit(
+            lambda: regex_scan(routes_by_method, "GET", path), number=NUMBER
+        ) / NUMBER * 1e9
+        radix_ns = timeit.timeit(
+            lambda: router.lookup("GET", path), number=NUMBER
+        ) / NUMBER * 1e9
+        print(f"{size:>8} | {regex_ns:>16.0f} | {radix_ns:>11.0f} | {regex_ns / radix_ns:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
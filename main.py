@@ -5,7 +5,7 @@ from app.routers.router import *  # noqa: F403
 
 from granian import Granian
 from app.config import Settings
-from app.core.application import app
+from app.core.application import app, add_middleware
 
 settings = Settings()
 
@@ -13,7 +13,18 @@ settings = Settings()
 if settings.enable_logger:
     from app.core.logger import LoggerMiddleware
 
-    app = LoggerMiddleware(app)
+    add_middleware(LoggerMiddleware)
+
+if settings.enable_compression:
+    from app.core.compression import CompressionMiddleware
+
+    add_middleware(CompressionMiddleware)
+
+if settings.enable_latency_histograms:
+    from app.core.latency import register_latency_route
+
+    # Percentis por rota (gravados pelo dispatcher) em GET /admin/latency
+    register_latency_route()
 
 
 if __name__ == "__main__":
@@ -39,9 +50,10 @@ if __name__ == "__main__":
 #         os.environ["PROMETHEUS_MULTIPROC_DIR"] = os.path.abspath("./metrics")
 #         os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
 
-#     from app.core.metrics import PrometheusMiddleware        
+#     from app.core.metrics import PrometheusMiddleware
 
-#     app = PrometheusMiddleware(app)
+#     # Vinculado às rotas: lê a rota já resolvida pelo dispatcher (scope["route"])
+#     add_middleware(PrometheusMiddleware)
 
 # Habilita o Tracing do OpenTelemetry
 # if settings.enable_tracing:
@@ -49,17 +61,16 @@ if __name__ == "__main__":
 #     from opentelemetry.instrumentation.asgi import OpenTelemetryMiddleware
 #     from opentelemetry.util.http import parse_excluded_urls
 #     from opentelemetry.semconv.attributes.http_attributes import HTTP_ROUTE
-#     from app.core.routing import get_route_details
 
 #     def _get_default_span_details(scope):
-#         route, method = get_route_details(method=scope["method"], path=scope["path"])
+#         route = scope.get("route") or scope["path"]
 #         attributes = {HTTP_ROUTE: route}
-#         span_name = f"{method} {route}"
+#         span_name = f"{scope['method']} {route}"
 
 #         return span_name, attributes
 
-#     app = OpenTelemetryMiddleware(
-#         app,
+#     add_middleware(
+#         OpenTelemetryMiddleware,
 #         excluded_urls=parse_excluded_urls("/metrics,/openapi.json,/docs"),
 #         exclude_spans=["send", "receive"],
 #         default_span_details=_get_default_span_details,
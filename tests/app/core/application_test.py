@@ -1,69 +1,43 @@
+import asyncio
+
+import orjson
 import pytest
-import types
-from unittest.mock import AsyncMock, patch, MagicMock
+from unittest.mock import AsyncMock, patch
 
-from app.core.application import app
+from app.core import application, latency
+from app.core.application import app, compile_app
+from app.core.context import REQUEST_CONTEXT
 from app.core.exception import AppException
 
 
+async def exact_handler(scope, receive, send):
+    return "handler_result"
+
+
+async def regex_handler(scope, receive, send):
+    return "regex_handler_result"
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
-    "scope, handler_return, expected_send_calls, expected_handler_called, test_id",
+    "scope, expected_result, expected_status, test_id",
     [
         # Lifespan scope
-        (
-            {"type": "lifespan", "method": "GET", "path": "/"},
-            None,
-            [],
-            False,
-            "lifespan_scope",
-        ),
+        ({"type": "lifespan", "method": "GET", "path": "/"}, None, None, "lifespan_scope"),
         # Exact route match
-        (
-            {"type": "http", "method": "GET", "path": "/exact"},
-            "handler_result",
-            [],
-            True,
-            "exact_route_match",
-        ),
+        ({"type": "http", "method": "GET", "path": "/exact"}, "handler_result", None, "exact_route_match"),
         # Regex route match
-        (
-            {"type": "http", "method": "GET", "path": "/user/123"},
-            "regex_handler_result",
-            [],
-            True,
-            "regex_route_match",
-        ),
+        ({"type": "http", "method": "GET", "path": "/user/123"}, "regex_handler_result", None, "regex_route_match"),
         # OpenAPI JSON
-        (
-            {"type": "http", "method": "GET", "path": "/openapi.json"},
-            None,
-            [{"type": "http.response.start"}, {"type": "http.response.body"}],
-            False,
-            "openapi_json",
-        ),
+        ({"type": "http", "method": "GET", "path": "/openapi.json"}, None, 200, "openapi_json"),
         # Swagger UI
-        (
-            {"type": "http", "method": "GET", "path": "/docs"},
-            None,
-            [{"type": "http.response.start"}, {"type": "http.response.body"}],
-            False,
-            "swagger_ui",
-        ),
+        ({"type": "http", "method": "GET", "path": "/docs"}, None, 200, "swagger_ui"),
         # 404 Not Found
-        (
-            {"type": "http", "method": "GET", "path": "/notfound"},
-            None,
-            [{"type": "http.response.start"}, {"type": "http.response.body"}],
-            False,
-            "not_found",
-        ),
+        ({"type": "http", "method": "GET", "path": "/notfound"}, None, 404, "not_found"),
     ],
     ids=lambda x: x if isinstance(x, str) else None,
 )
-async def test_app_various_paths(
-    scope, handler_return, expected_send_calls, expected_handler_called, test_id
-):
+async def test_app_various_paths(scope, expected_result, expected_status, test_id):
     # Arrange
     send_calls = []
 
@@ -73,44 +47,18 @@ async def test_app_various_paths(
     # Patch dependencies
     with (
         patch("app.core.application.lifespan", new=AsyncMock()) as mock_lifespan,
-        patch(
-            "app.core.application.routes",
-            new={("/exact", "GET"): AsyncMock(return_value="handler_result")},
-        ),
         patch(
             "app.core.application.routes_by_method",
             new={
                 "GET": [
-                    (
-                        MagicMock(
-                            match=MagicMock(
-                                side_effect=lambda p: types.SimpleNamespace(
-                                    groupdict=lambda: {"id": "123"}
-                                )
-                                if p == "/user/123"
-                                else None
-                            )
-                        ),
-                        "/user/{id}",
-                        AsyncMock(return_value="regex_handler_result"),
-                    )
+                    (None, "/exact", exact_handler),
+                    (None, "/user/{id}", regex_handler),
                 ]
             },
         ),
-        patch("app.core.application.openapi_spec", new={"openapi": "spec"}),
-        patch("app.core.application.send_response", new=AsyncMock()),
-        patch(
-            "app.core.application.json_response",
-            new=MagicMock(return_value={"json": True}),
-        ),
-        patch(
-            "app.core.application.text_html_response",
-            new=MagicMock(return_value="html"),
-        ),
-        patch(
-            "app.core.application.serve_swagger_ui",
-            new=AsyncMock(return_value="swagger_html"),
-        ),
+        patch("app.core.application.ROUTER", new=None),
+        patch("app.core.application.openapi_json", new=lambda: b'{"openapi":"spec"}'),
+        patch("app.core.application.SWAGGER_UI_HTML", new=b"swagger_html"),
     ):
         # Act
         result = await app(scope, None, send)
@@ -118,31 +66,29 @@ async def test_app_various_paths(
         # Assert
         if scope["type"] == "lifespan":
             assert mock_lifespan.await_count == 1
-        elif scope["path"] == "/exact":
-            assert result == "handler_result"
-        elif scope["path"] == "/user/123":
-            assert result == "regex_handler_result"
+            return
+
+        assert result == expected_result
+        if scope["path"] == "/user/123":
             assert scope.get("path_params") == {"id": "123"}
-        elif scope["path"] == "/openapi.json":
-            app.core.application.send_response.assert_awaited()
-            app.core.application.json_response.assert_called_with({"openapi": "spec"})
+        if expected_status is not None:
+            assert send_calls[0]["type"] == "http.response.start"
+            assert send_calls[0]["status"] == expected_status
+        if scope["path"] == "/openapi.json":
+            assert orjson.loads(send_calls[1]["body"]) == {"openapi": "spec"}
         elif scope["path"] == "/docs":
-            app.core.application.send_response.assert_awaited()
-            app.core.application.text_html_response.assert_called_with(
-                "swagger_html", status=200
-            )
+            assert send_calls[1]["body"] == b"swagger_html"
         elif scope["path"] == "/notfound":
-            app.core.application.send_response.assert_awaited()
-            app.core.application.json_response.assert_called_with(
-                {"error": "Not found"}, 404
-            )
+            assert orjson.loads(send_calls[1]["body"]) == {"error": "Not found"}
 
 
 @pytest.mark.asyncio
 async def test_app_raises_appexception():
     # Arrange
+    sent = []
+
     async def send(message):
-        pass
+        sent.append(message)
 
     class DummyException(AppException):
         def __init__(self):
@@ -152,17 +98,10 @@ async def test_app_raises_appexception():
 
     with (
         patch(
-            "app.core.application.routes",
-            new={("/fail", "GET"): AsyncMock(side_effect=DummyException)},
+            "app.core.application.routes_by_method",
+            new={"GET": [(None, "/fail", AsyncMock(side_effect=DummyException))]},
         ),
-        patch("app.core.application.routes_by_method", new={"GET": []}),
-        patch(
-            "app.core.application.send_response", new=AsyncMock()
-        ) as mock_send_response,
-        patch(
-            "app.core.application.json_response",
-            new=MagicMock(return_value={"json": True}),
-        ) as mock_json_response,
+        patch("app.core.application.ROUTER", new=None),
     ):
         scope = {"type": "http", "method": "GET", "path": "/fail"}
 
@@ -170,10 +109,9 @@ async def test_app_raises_appexception():
         await app(scope, None, send)
 
         # Assert
-        mock_json_response.assert_called_with(
-            data={"msg": "fail"}, status=418, headers={"X-Test": "1"}
-        )
-        mock_send_response.assert_awaited()
+        assert sent[0]["status"] == 418
+        assert (b"X-Test", b"1") in sent[0]["headers"]
+        assert orjson.loads(sent[1]["body"]) == {"msg": "fail"}
 
 
 @pytest.mark.asyncio
@@ -185,17 +123,12 @@ async def test_app_regex_route_sets_path_params():
     async def handler(scope, receive, send):
         return scope["path_params"]
 
-    regex = MagicMock()
-    regex.match.return_value = types.SimpleNamespace(groupdict=lambda: {"foo": "bar"})
-
     with (
-        patch("app.core.application.routes", new={}),
         patch(
             "app.core.application.routes_by_method",
-            new={"GET": [(regex, "/foo/{foo}", handler)]},
+            new={"GET": [(None, "/foo/{foo}", handler)]},
         ),
-        patch("app.core.application.send_response", new=AsyncMock()),
-        patch("app.core.application.json_response", new=MagicMock()),
+        patch("app.core.application.ROUTER", new=None),
     ):
         scope = {"type": "http", "method": "GET", "path": "/foo/bar"}
 
@@ -206,6 +139,38 @@ async def test_app_regex_route_sets_path_params():
         assert result == {"foo": "bar"}
 
 
+@pytest.mark.asyncio
+async def test_app_binds_request_context_around_endpoint():
+    # Arrange
+    async def send(message):
+        pass
+
+    async def handler(scope, receive, send):
+        context = REQUEST_CONTEXT.get()
+        return context.request_id, context.route
+
+    with (
+        patch(
+            "app.core.application.routes_by_method",
+            new={"GET": [(None, "/foo/{foo}", handler)]},
+        ),
+        patch("app.core.application.ROUTER", new=None),
+    ):
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/foo/bar",
+            "headers": [(b"x-request-id", b"req-42")],
+        }
+
+        # Act
+        result = await app(scope, None, send)
+
+        # Assert
+        assert result == ("req-42", "/foo/{foo}")
+        assert REQUEST_CONTEXT.get() is None
+
+
 @pytest.mark.asyncio
 async def test_app_handles_non_http_scope_type():
     # Arrange
@@ -214,10 +179,8 @@ async def test_app_handles_non_http_scope_type():
 
     with (
         patch("app.core.application.lifespan", new=AsyncMock()) as mock_lifespan,
-        patch("app.core.application.routes", new={}),
         patch("app.core.application.routes_by_method", new={}),
-        patch("app.core.application.send_response", new=AsyncMock()),
-        patch("app.core.application.json_response", new=MagicMock()),
+        patch("app.core.application.ROUTER", new=None),
     ):
         scope = {"type": "lifespan", "method": "GET", "path": "/"}
 
@@ -226,3 +189,112 @@ async def test_app_handles_non_http_scope_type():
 
         # Assert
         mock_lifespan.assert_awaited_once_with(scope, None, send)
+
+
+@pytest.mark.asyncio
+async def test_app_method_not_allowed_uses_precomputed_allow():
+    # Arrange
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def handler(scope, receive, send):
+        return "ok"
+
+    with (
+        patch(
+            "app.core.application.routes_by_method",
+            new={
+                "GET": [(None, "/items/{id}", handler)],
+                "POST": [(None, "/items/{id}", handler)],
+            },
+        ),
+        patch("app.core.application.ROUTER", new=None),
+    ):
+        scope = {"type": "http", "method": "DELETE", "path": "/items/1"}
+
+        # Act
+        await app(scope, None, send)
+
+        # Assert
+        assert sent[0]["status"] == 405
+        assert (b"allow", b"GET, POST") in sent[0]["headers"]
+
+
+@pytest.mark.asyncio
+async def test_compile_app_binds_middleware_chain_once_per_route():
+    # Arrange
+    calls = []
+
+    class RecordingMiddleware:
+        def __init__(self, app, name):
+            calls.append(("bind", name))
+            self.app = app
+            self.name = name
+
+        async def __call__(self, scope, receive, send):
+            calls.append(("call", self.name))
+            return await self.app(scope, receive, send)
+
+    async def handler(scope, receive, send):
+        return "ok"
+
+    with (
+        patch(
+            "app.core.application.routes_by_method",
+            new={"GET": [(None, "/mw", handler)]},
+        ),
+        patch("app.core.application.ROUTER", new=None),
+        patch(
+            "app.core.application._MIDDLEWARES",
+            new=[(RecordingMiddleware, {"name": "outer"}), (RecordingMiddleware, {"name": "inner"})],
+        ),
+        patch("app.core.application.SWAGGER_UI_HTML", new=None),
+    ):
+        router = compile_app()
+        binds = len(calls)
+        scope = {"type": "http", "method": "GET", "path": "/mw"}
+
+        # Act
+        with patch("app.core.application.ROUTER", new=router):
+            result = await app(scope, None, None)
+            await app(scope, None, None)
+
+        # Assert
+        assert result == "ok"
+        assert len(calls) - binds == 4  # sem novos binds por request
+        assert calls[binds:binds + 2] == [("call", "outer"), ("call", "inner")]
+
+
+@pytest.mark.asyncio
+async def test_compile_app_records_latency_until_last_body_chunk(monkeypatch):
+    # Arrange
+    async def send(message):
+        pass
+
+    async def handler(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"a", "more_body": True})
+        await asyncio.sleep(0.02)
+        await send({"type": "http.response.body", "body": b"b"})
+
+    monkeypatch.setattr(application.settings, "enable_latency_histograms", True)
+    monkeypatch.setattr(latency.settings, "prometheus_multiproc_dir", None)
+    monkeypatch.setattr(latency, "RECORDER", None)
+
+    with (
+        patch(
+            "app.core.application.routes_by_method",
+            new={"GET": [(None, "/slow/{id}", handler)]},
+        ),
+        patch("app.core.application.ROUTER", new=None),
+    ):
+        # Act
+        await app({"type": "http", "method": "GET", "path": "/slow/1"}, None, send)
+
+    # Assert
+    (row,) = latency.latency_report()["60s"]
+    assert (row["method"], row["route"], row["count"]) == ("GET", "/slow/{id}", 1)
+    assert row["mean_ms"] >= 20
+    latency.RECORDER.close()
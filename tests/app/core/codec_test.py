@@ -0,0 +1,65 @@
+import msgspec
+import orjson
+
+from bson import ObjectId
+
+from app.core import codec
+from app.dto.user_dto import UserListResponse, UserResponseDto
+
+
+def test_dto_decoders_are_registered_at_import():
+    # Assert
+    assert UserListResponse in codec._DECODERS
+    assert codec.get_decoder(UserListResponse) is codec._DECODERS[UserListResponse]
+
+
+def test_unregistered_type_is_added_lazily():
+    # Arrange
+    class Point(msgspec.Struct):
+        x: int
+
+    # Act
+    decoder = codec.get_decoder(Point)
+
+    # Assert
+    assert codec.get_decoder(Point) is decoder
+    assert codec.decode(b'{"x": 1}', Point) == Point(x=1)
+
+
+def test_struct_is_encoded_without_builtins_tree():
+    # Arrange
+    response = UserListResponse(
+        data=[UserResponseDto(_id="1", empresa="a", cotacao_final=1.5)],
+        page=1,
+        limit=10,
+        total_items=1,
+        total_pages=1,
+    )
+
+    # Act
+    body = codec.encode(response)
+
+    # Assert
+    assert orjson.loads(body) == msgspec.to_builtins(response)
+
+
+def test_encode_handles_object_id_and_raw():
+    # Arrange
+    oid = ObjectId()
+
+    # Act
+    body = codec.encode({"_id": oid, "cached": msgspec.Raw(b'{"a":1}')})
+
+    # Assert
+    assert orjson.loads(body) == {"_id": str(oid), "cached": {"a": 1}}
+
+
+def test_encode_into_appends_to_buffer():
+    # Arrange
+    buffer = bytearray(b"[")
+
+    # Act
+    codec.encode_into({"a": 1}, buffer)
+
+    # Assert
+    assert bytes(buffer) == b'[{"a":1}'
@@ -0,0 +1,179 @@
+import gzip
+
+import orjson
+import pytest
+
+from app.core.compression import (
+    COMPRESSORS,
+    CompressionMiddleware,
+    negotiate_encoding,
+    precompressed_response,
+)
+from app.core.etag import conditional_endpoint, conditional_static_response, with_etag
+from app.core.utils import json_response, send_response
+
+LARGE_PAYLOAD = {"data": ["x" * 32] * 200}
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, allowed, test_id",
+    [
+        (b"gzip", {"gzip"}, "gzip_only"),
+        (b"gzip;q=0, identity", {None}, "gzip_refused"),
+        (b"br, gzip", {"br", "gzip"}, "br_or_gzip"),
+        (b"*", set(COMPRESSORS), "wildcard"),
+        (b"identity", {None}, "identity"),
+    ],
+    ids=lambda x: x if isinstance(x, str) else None,
+)
+def test_negotiate_encoding(accept_encoding, allowed, test_id):
+    # Act
+    result = negotiate_encoding(accept_encoding)
+
+    # Assert
+    assert result in allowed
+
+
+async def run(app, headers):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await app({"type": "http", "headers": headers}, None, send)
+    return sent
+
+
+def payload_app(data):
+    async def app(scope, receive, send):
+        await send_response(send, json_response(data))
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_middleware_compresses_large_body_with_gzip():
+    # Arrange
+    app = CompressionMiddleware(payload_app(LARGE_PAYLOAD), minimum_size=100)
+
+    # Act
+    sent = await run(app, [(b"accept-encoding", b"gzip")])
+
+    # Assert
+    headers = dict(sent[0]["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert int(headers[b"content-length"]) == len(sent[1]["body"])
+    assert orjson.loads(gzip.decompress(sent[1]["body"])) == LARGE_PAYLOAD
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "vary, expected, test_id",
+    [
+        (None, b"accept-encoding", "no_vary"),
+        ("accept", b"accept, accept-encoding", "appends_to_vary"),
+        ("Accept-Encoding", b"Accept-Encoding", "already_listed"),
+    ],
+    ids=lambda x: x if isinstance(x, str) else None,
+)
+async def test_middleware_appends_accept_encoding_to_vary(vary, expected, test_id):
+    # Arrange
+    async def app(scope, receive, send):
+        await send_response(
+            send, json_response(LARGE_PAYLOAD, headers={"vary": vary} if vary else None)
+        )
+
+    middleware = CompressionMiddleware(app, minimum_size=100)
+
+    # Act
+    sent = await run(middleware, [(b"accept-encoding", b"gzip")])
+
+    # Assert
+    assert [v for k, v in sent[0]["headers"] if k == b"vary"] == [expected]
+
+
+@pytest.mark.asyncio
+async def test_middleware_compresses_in_thread_above_threshold():
+    # Arrange
+    app = CompressionMiddleware(payload_app(LARGE_PAYLOAD), minimum_size=100, threadpool_size=100)
+
+    # Act
+    sent = await run(app, [(b"accept-encoding", b"gzip")])
+
+    # Assert
+    assert orjson.loads(gzip.decompress(sent[1]["body"])) == LARGE_PAYLOAD
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "headers, data, test_id",
+    [
+        ([(b"accept-encoding", b"gzip")], {"small": True}, "below_threshold"),
+        ([], LARGE_PAYLOAD, "no_accept_encoding"),
+    ],
+    ids=lambda x: x if isinstance(x, str) else None,
+)
+async def test_middleware_skips_compression(headers, data, test_id):
+    # Arrange
+    app = CompressionMiddleware(payload_app(data), minimum_size=100)
+
+    # Act
+    sent = await run(app, headers)
+
+    # Assert
+    assert b"content-encoding" not in dict(sent[0]["headers"])
+    assert orjson.loads(sent[1]["body"]) == data
+
+
+@pytest.mark.asyncio
+async def test_precompressed_response_picks_variant():
+    # Arrange
+    endpoint = precompressed_response(json_response(LARGE_PAYLOAD))
+
+    # Act
+    compressed = await run(endpoint, [(b"accept-encoding", b"gzip")])
+    identity = await run(endpoint, [])
+
+    # Assert
+    assert dict(compressed[0]["headers"])[b"content-encoding"] == b"gzip"
+    assert orjson.loads(gzip.decompress(compressed[1]["body"])) == LARGE_PAYLOAD
+    assert orjson.loads(identity[1]["body"]) == LARGE_PAYLOAD
+
+
+@pytest.mark.asyncio
+async def test_middleware_304_matches_compressed_200():
+    # Arrange
+    app = CompressionMiddleware(
+        conditional_endpoint(payload_app(LARGE_PAYLOAD), etag=True), minimum_size=100
+    )
+    full = await run(app, [(b"accept-encoding", b"gzip")])
+    headers = dict(full[0]["headers"])
+
+    # Act
+    sent = await run(app, [(b"accept-encoding", b"gzip"), (b"if-none-match", headers[b"etag"])])
+
+    # Assert
+    assert headers[b"etag"].startswith(b'W/"')
+    assert sent[0]["status"] == 304
+    assert dict(sent[0]["headers"])[b"etag"] == headers[b"etag"]
+    assert dict(sent[0]["headers"])[b"vary"] == headers[b"vary"]
+
+
+@pytest.mark.asyncio
+async def test_precompressed_response_answers_304_per_variant():
+    # Arrange
+    endpoint = precompressed_response(
+        with_etag(json_response(LARGE_PAYLOAD)), conditional_static_response
+    )
+    full = await run(endpoint, [(b"accept-encoding", b"gzip")])
+    headers = dict(full[0]["headers"])
+
+    # Act
+    sent = await run(
+        endpoint, [(b"accept-encoding", b"gzip"), (b"if-none-match", headers[b"etag"])]
+    )
+
+    # Assert
+    assert sent[0]["status"] == 304
+    assert dict(sent[0]["headers"])[b"etag"] == headers[b"etag"]
+    assert dict(sent[0]["headers"])[b"vary"] == b"accept-encoding"
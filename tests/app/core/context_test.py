@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from app.core.context import (
+    REQUEST_CONTEXT,
+    bind_request_context,
+    current_request_id,
+    new_request_id,
+)
+
+TRACEPARENT = b"00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+@pytest.mark.parametrize(
+    "headers, request_id, trace_id, test_id",
+    [
+        ([(b"x-request-id", b"abc-123")], "abc-123", None, "reuses_inbound_id"),
+        ([(b"traceparent", TRACEPARENT)], None, "4bf92f3577b34da6a3ce929d0e0e4736", "traceparent"),
+        ([(b"traceparent", b"invalid")], None, None, "invalid_traceparent"),
+        ([(b"x-request-id", b"x" * 500)], None, None, "oversized_id_replaced"),
+        ([], None, None, "generated_id"),
+    ],
+    ids=lambda x: x if isinstance(x, str) else None,
+)
+def test_bind_request_context(headers, request_id, trace_id, test_id):
+    # Arrange
+    scope = {"type": "http", "headers": headers, "route": "/users/{id}"}
+
+    # Act
+    token = bind_request_context(scope)
+    context = REQUEST_CONTEXT.get()
+    REQUEST_CONTEXT.reset(token)
+
+    # Assert
+    assert context.route == "/users/{id}"
+    assert context.trace_id == trace_id
+    if request_id:
+        assert context.request_id == request_id
+    else:
+        assert 0 < len(context.request_id) <= 128
+    assert REQUEST_CONTEXT.get() is None
+
+
+def test_new_request_id_is_unique():
+    # Act
+    ids = {new_request_id() for _ in range(1_000)}
+
+    # Assert
+    assert len(ids) == 1_000
+
+
+@pytest.mark.asyncio
+async def test_context_is_isolated_between_tasks():
+    # Arrange
+    async def handle(request_id):
+        bind_request_context({"headers": [(b"x-request-id", request_id)]})
+        await asyncio.sleep(0)
+        return current_request_id()
+
+    # Act
+    results = await asyncio.gather(handle(b"a"), handle(b"b"))
+
+    # Assert
+    assert results == ["a", "b"]
+    assert current_request_id() is None
@@ -0,0 +1,116 @@
+import pytest
+
+from app.core.etag import (
+    compute_etag,
+    conditional_endpoint,
+    conditional_static_response,
+    etag_matches,
+    with_etag,
+)
+from app.core.utils import fixed_response, json_response, send_response
+
+BODY = b'{"id":"1","empresa":"Porto"}'
+ETAG = compute_etag(BODY)
+
+
+def test_compute_etag_is_stable_and_quoted():
+    # Act & Assert
+    assert ETAG == compute_etag(BODY)
+    assert ETAG != compute_etag(BODY + b" ")
+    assert ETAG.startswith(b'"') and ETAG.endswith(b'"')
+
+
+@pytest.mark.parametrize(
+    "if_none_match, expected, test_id",
+    [
+        (ETAG, True, "exact"),
+        (b"W/" + ETAG, True, "weak"),
+        (b'"other", ' + ETAG, True, "list"),
+        (b"*", True, "wildcard"),
+        (b'"other"', False, "different"),
+    ],
+    ids=lambda x: x if isinstance(x, str) else None,
+)
+def test_etag_matches(if_none_match, expected, test_id):
+    # Act & Assert
+    assert etag_matches(if_none_match, ETAG) is expected
+
+
+async def run(endpoint, headers):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await endpoint({"type": "http", "headers": headers}, None, send)
+    return sent
+
+
+async def handler(scope, receive, send):
+    await send_response(send, (200, [(b"content-type", b"application/json")], [BODY]))
+
+
+@pytest.mark.asyncio
+async def test_conditional_endpoint_adds_etag_and_cache_control():
+    # Arrange
+    endpoint = conditional_endpoint(handler, etag=True, cache_control="private, no-cache")
+
+    # Act
+    sent = await run(endpoint, [])
+
+    # Assert
+    headers = dict(sent[0]["headers"])
+    assert sent[0]["status"] == 200
+    assert headers[b"etag"] == ETAG
+    assert headers[b"cache-control"] == b"private, no-cache"
+    assert sent[1]["body"] == BODY
+
+
+@pytest.mark.asyncio
+async def test_conditional_endpoint_answers_304_without_body():
+    # Arrange
+    endpoint = conditional_endpoint(handler, etag=True)
+
+    # Act
+    sent = await run(endpoint, [(b"if-none-match", ETAG)])
+
+    # Assert
+    assert sent[0]["status"] == 304
+    assert dict(sent[0]["headers"])[b"etag"] == ETAG
+    assert sent[1]["body"] == b""
+
+
+@pytest.mark.asyncio
+async def test_conditional_endpoint_304_keeps_vary():
+    # Arrange
+    async def varying(scope, receive, send):
+        await send_response(send, json_response({"id": 1}, headers={"vary": "accept"}))
+
+    endpoint = conditional_endpoint(varying, etag=True)
+    etag = dict((await run(endpoint, []))[0]["headers"])[b"etag"]
+
+    # Act
+    sent = await run(endpoint, [(b"if-none-match", etag)])
+
+    # Assert
+    assert sent[0]["status"] == 304
+    assert dict(sent[0]["headers"])[b"vary"] == b"accept"
+    assert b"content-type" not in dict(sent[0]["headers"])
+
+
+@pytest.mark.asyncio
+async def test_conditional_static_response_uses_precomputed_etag():
+    # Arrange
+    response = with_etag(json_response({"openapi": "3.0.0"}))
+    endpoint = conditional_static_response(response, fixed_response(response))
+    etag = dict(response[1])[b"etag"]
+
+    # Act
+    full = await run(endpoint, [])
+    not_modified = await run(endpoint, [(b"if-none-match", etag)])
+
+    # Assert
+    assert full[0]["status"] == 200
+    assert dict(full[0]["headers"])[b"cache-control"] == b"no-cache"
+    assert not_modified[0]["status"] == 304
+    assert not_modified[1]["body"] == b""
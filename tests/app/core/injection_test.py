@@ -0,0 +1,284 @@
+import msgspec
+import orjson
+import pytest
+
+from app.core.exception import AppException
+from app.core.injection import (
+    HeaderIndex,
+    build_typed_endpoint,
+    is_typed_handler,
+    with_body_limit,
+    with_request_params,
+)
+from app.core.params import CookieParams, HeaderParams, PathParams, QueryParams
+from app.core.utils import read_raw_body
+
+
+class Item(msgspec.Struct):
+    name: str
+    price: int
+
+
+class ItemOut(msgspec.Struct):
+    id: int
+    name: str
+    price: int
+    page: int
+    token: str | None
+
+
+ROUTE_INFO = {
+    "request_model": Item,
+    "response_model": ItemOut,
+    "headers": [HeaderParams(name="X-Token", type_field="string")],
+    "query_params": [QueryParams(name="page", type_field="integer", default=1)],
+    "path_params": [PathParams(name="id", type_field="integer")],
+    "cookie_params": None,
+}
+
+
+async def create_item(id: int, body: Item, page: int, x_token: str) -> ItemOut:
+    return ItemOut(id=id, name=body.name, price=body.price, page=page, token=x_token)
+
+
+def make_receive(body: bytes):
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        return messages.pop(0)
+
+    return receive
+
+
+async def call(endpoint, scope, body=b""):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await endpoint(scope, make_receive(body), send)
+    return sent
+
+
+def test_is_typed_handler():
+    # Arrange
+    async def raw(scope, receive, send):
+        pass
+
+    # Act & Assert
+    assert is_typed_handler(raw) is False
+    assert is_typed_handler(create_item) is True
+
+
+@pytest.mark.asyncio
+async def test_typed_endpoint_injects_and_encodes():
+    # Arrange
+    endpoint = build_typed_endpoint(create_item, ROUTE_INFO)
+    scope = {
+        "path_params": {"id": "7"},
+        "query_string": b"page=3",
+        "headers": [(b"x-token", b"abc")],
+    }
+
+    # Act
+    sent = await call(endpoint, scope, orjson.dumps({"name": "pen", "price": 2}))
+
+    # Assert
+    assert sent[0]["status"] == 200
+    assert orjson.loads(sent[1]["body"]) == {
+        "id": 7,
+        "name": "pen",
+        "price": 2,
+        "page": 3,
+        "token": "abc",
+    }
+
+
+@pytest.mark.asyncio
+async def test_typed_endpoint_uses_declared_default():
+    # Arrange
+    endpoint = build_typed_endpoint(create_item, ROUTE_INFO)
+    scope = {"path_params": {"id": "1"}, "query_string": b"", "headers": []}
+
+    # Act
+    sent = await call(endpoint, scope, orjson.dumps({"name": "pen", "price": 2}))
+
+    # Assert
+    body = orjson.loads(sent[1]["body"])
+    assert body["page"] == 1
+    assert body["token"] is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "scope, body, campo, validador, test_id",
+    [
+        ({"path_params": {"id": "x"}, "query_string": b"", "headers": []}, b'{"name": "a", "price": 1}', "id", "type", "path_not_integer"),
+        ({"path_params": {"id": "1"}, "query_string": b"page=a", "headers": []}, b'{"name": "a", "price": 1}', "page", "type", "query_not_integer"),
+        ({"path_params": {"id": "1"}, "query_string": b"", "headers": []}, b'{"name": "a"}', "price", "required", "body_missing_field"),
+    ],
+    ids=lambda x: x if isinstance(x, str) else None,
+)
+async def test_typed_endpoint_validation_errors(monkeypatch, scope, body, campo, validador, test_id):
+    # Arrange
+    monkeypatch.setattr("app.core.exception.log", type("Log", (), {"error": staticmethod(lambda *a, **kw: None)})())
+    endpoint = build_typed_endpoint(create_item, ROUTE_INFO)
+
+    # Act & Assert
+    with pytest.raises(AppException) as excinfo:
+        await call(endpoint, scope, body)
+    assert excinfo.value.status_code == 422
+    detail = excinfo.value.detail["error"]["detalhes"][0]
+    assert detail["campo"] == campo
+    assert detail["validador"] == validador
+
+
+def test_undeclared_parameter_is_rejected_at_registration():
+    # Arrange
+    async def handler(unknown: str):
+        pass
+
+    # Act & Assert
+    with pytest.raises(TypeError):
+        build_typed_endpoint(handler, ROUTE_INFO)
+
+
+def test_header_index_extracts_only_declared_values():
+    # Arrange
+    index = HeaderIndex(
+        headers=[
+            HeaderParams(name="X-Token", type_field="string"),
+            HeaderParams(name="X-Retries", type_field="integer", default=0),
+        ],
+        cookie_params=[CookieParams(name="session", type_field="string")],
+    )
+    scope = {
+        "headers": [
+            (b"host", b"localhost"),
+            (b"x-token", b"abc"),
+            (b"cookie", b"theme=dark; session=\"s1\""),
+        ]
+    }
+
+    # Act
+    headers, cookies = index.extract(scope)
+
+    # Assert
+    assert headers == {"x-token": "abc", "x-retries": 0}
+    assert cookies == {"session": "s1"}
+
+
+@pytest.mark.asyncio
+async def test_missing_required_header_fails_before_body_is_read(monkeypatch):
+    # Arrange
+    monkeypatch.setattr("app.core.exception.log", type("Log", (), {"error": staticmethod(lambda *a, **kw: None)})())
+    handler_called = []
+
+    async def receive():
+        raise AssertionError("body must not be read")
+
+    async def handler(scope, receive, send):
+        handler_called.append(True)
+
+    endpoint = with_request_params(
+        handler, headers=[HeaderParams(name="X-Token", type_field="string", required=True)]
+    )
+
+    # Act & Assert
+    with pytest.raises(AppException) as excinfo:
+        await endpoint({"headers": []}, receive, None)
+    assert excinfo.value.status_code == 422
+    assert excinfo.value.detail["error"]["detalhes"][0]["campo"] == "x-token"
+    assert handler_called == []
+
+
+@pytest.mark.asyncio
+async def test_raw_handler_receives_decoded_headers_and_cookies():
+    # Arrange
+    seen = {}
+
+    async def handler(scope, receive, send):
+        seen.update(headers=scope["request_headers"], cookies=scope["cookies"])
+
+    endpoint = with_request_params(
+        handler,
+        headers=[HeaderParams(name="X-Token", type_field="string")],
+        cookie_params=[CookieParams(name="session", type_field="string")],
+    )
+
+    # Act
+    await endpoint({"headers": [(b"x-token", b"abc"), (b"cookie", b"session=s1")]}, None, None)
+
+    # Assert
+    assert seen == {"headers": {"x-token": "abc"}, "cookies": {"session": "s1"}}
+
+
+@pytest.mark.asyncio
+async def test_raw_handler_reads_body_with_route_limit():
+    # Arrange
+    async def handler(scope, receive, send):
+        await read_raw_body(receive, scope=scope)
+
+    endpoint = with_body_limit(handler, 4)
+
+    # Act
+    with pytest.raises(AppException) as excinfo:
+        await endpoint({"headers": []}, make_receive(b"12345"), None)
+
+    # Assert
+    assert excinfo.value.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_typed_handler_receives_cookie():
+    # Arrange
+    async def handler(session: str) -> dict:
+        return {"session": session}
+
+    endpoint = build_typed_endpoint(
+        handler, {"cookie_params": [CookieParams(name="session", type_field="string")]}
+    )
+
+    # Act
+    sent = await call(endpoint, {"headers": [(b"cookie", b"a=1; session=s1")]})
+
+    # Assert
+    assert orjson.loads(sent[1]["body"]) == {"session": "s1"}
+
+
+@pytest.mark.asyncio
+async def test_typed_endpoint_negotiates_msgpack():
+    # Arrange
+    endpoint = build_typed_endpoint(create_item, ROUTE_INFO)
+    scope = {
+        "path_params": {"id": "7"},
+        "query_string": b"",
+        "headers": [
+            (b"content-type", b"application/msgpack"),
+            (b"accept", b"application/msgpack"),
+        ],
+    }
+
+    # Act
+    sent = await call(endpoint, scope, msgspec.msgpack.encode({"name": "pen", "price": 2}))
+
+    # Assert
+    assert (b"content-type", b"application/msgpack") in sent[0]["headers"]
+    assert (b"vary", b"accept") in sent[0]["headers"]
+    assert msgspec.msgpack.decode(sent[1]["body"], type=ItemOut) == ItemOut(
+        id=7, name="pen", price=2, page=1, token=None
+    )
+
+
+@pytest.mark.asyncio
+async def test_typed_endpoint_json_response_varies_on_accept():
+    # Arrange
+    endpoint = build_typed_endpoint(create_item, ROUTE_INFO)
+    scope = {"path_params": {"id": "7"}, "query_string": b"", "headers": []}
+
+    # Act
+    sent = await call(endpoint, scope, orjson.dumps({"name": "pen", "price": 2}))
+
+    # Assert
+    assert (b"content-type", b"application/json") in sent[0]["headers"]
+    assert (b"vary", b"accept") in sent[0]["headers"]
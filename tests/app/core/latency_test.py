@@ -0,0 +1,175 @@
+import mmap
+from unittest.mock import patch
+
+import pytest
+
+from app.core import latency
+from app.core.latency import (
+    BUCKETS,
+    LatencyCollector,
+    LatencyRecorder,
+    bucket_index,
+    bucket_value,
+    latency_report,
+    merge_windows,
+    percentiles,
+)
+
+NOW = 1_700_000_000.0
+ROUTES = [("GET", "/users/{id}"), ("POST", "/users")]
+
+
+def record_at(recorder, when, route_index, values):
+    with patch.object(latency.time, "time", new=lambda: when):
+        for micros in values:
+            recorder.record(route_index, micros)
+
+
+@pytest.mark.parametrize("micros", [0, 1, 63, 64, 100, 1_160, 1_990, 305_460, 10_000_000])
+def test_bucket_value_relative_error(micros):
+    # Act
+    value = bucket_value(bucket_index(micros))
+
+    # Assert
+    assert abs(value - micros) <= max(1, micros / 32)
+
+
+def test_bucket_index_is_monotonic_and_bounded():
+    # Act
+    indexes = [bucket_index(micros) for micros in range(0, 200_000, 7)]
+
+    # Assert
+    assert indexes == sorted(indexes)
+    assert bucket_index(latency.MAX_MICROS) == BUCKETS - 1
+
+
+def test_recorder_percentiles_within_window():
+    # Arrange
+    recorder = LatencyRecorder(ROUTES, slot_seconds=10, slots=30)
+    record_at(recorder, NOW, 0, range(1, 1_001))
+
+    # Act
+    merged = merge_windows([recorder.buffer()], windows=(60,), now=NOW)
+    stats = percentiles(merged[60][("GET", "/users/{id}")])
+
+    # Assert
+    assert stats["count"] == 1_000
+    assert stats["mean_ms"] == pytest.approx(0.5005)
+    assert stats["p50_ms"] == pytest.approx(0.5, rel=0.04)
+    assert stats["p99_ms"] == pytest.approx(0.99, rel=0.04)
+    assert stats["p99_9_ms"] == pytest.approx(0.999, rel=0.04)
+    assert ("POST", "/users") not in merged[60]
+    recorder.close()
+
+
+def test_sliding_windows_drop_old_slots():
+    # Arrange
+    recorder = LatencyRecorder(ROUTES, slot_seconds=10, slots=30)
+    record_at(recorder, NOW - 120, 1, [5_000] * 10)
+    record_at(recorder, NOW, 1, [100] * 10)
+
+    # Act
+    merged = merge_windows([recorder.buffer()], windows=(60, 300), now=NOW)
+
+    # Assert
+    assert percentiles(merged[60][("POST", "/users")])["count"] == 10
+    assert percentiles(merged[300][("POST", "/users")])["count"] == 20
+    recorder.close()
+
+
+def test_recorder_reuses_slot_after_full_rotation():
+    # Arrange
+    recorder = LatencyRecorder(ROUTES, slot_seconds=10, slots=3)
+    record_at(recorder, NOW - 30, 0, [1_000] * 5)
+
+    # Act
+    record_at(recorder, NOW, 0, [2_000])
+    merged = merge_windows([recorder.buffer()], windows=(30,), now=NOW)
+
+    # Assert
+    assert percentiles(merged[30][("GET", "/users/{id}")])["count"] == 1
+    recorder.close()
+
+
+def test_merge_windows_across_worker_files(tmp_path):
+    # Arrange
+    workers = [
+        LatencyRecorder(ROUTES, 10, 30, str(tmp_path / f"latency_{pid}.hist"))
+        for pid in (1, 2)
+    ]
+    record_at(workers[0], NOW, 0, [1_000] * 90)
+    record_at(workers[1], NOW, 0, [50_000] * 10)
+    buffers = []
+    for pid in (1, 2):
+        with open(tmp_path / f"latency_{pid}.hist", "rb") as file:
+            buffers.append(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+    # Act
+    stats = percentiles(merge_windows(buffers, windows=(60,), now=NOW)[60][ROUTES[0]])
+
+    # Assert
+    assert stats["count"] == 100
+    assert stats["p50_ms"] == pytest.approx(1.0, rel=0.04)
+    assert stats["p99_ms"] == pytest.approx(50.0, rel=0.04)
+    for buffer in buffers:
+        buffer.close()
+    for recorder in workers:
+        recorder.close()
+
+
+def test_report_and_collector_read_the_worker_recorder(monkeypatch):
+    # Arrange
+    recorder = LatencyRecorder(ROUTES, 10, 30)
+    monkeypatch.setattr(latency, "RECORDER", recorder)
+    monkeypatch.setattr(latency, "DIRECTORY", None)
+    recorder.record(0, 2_000)
+
+    # Act
+    report = latency_report()
+    (family,) = LatencyCollector().collect()
+
+    # Assert
+    (row,) = report["60s"]
+    assert row["route"] == "/users/{id}"
+    assert row["p50_ms"] == pytest.approx(2.0, rel=0.04)
+    assert {sample.labels["quantile"] for sample in family.samples} == {"0.5", "0.9", "0.99", "0.999"}
+    monkeypatch.setattr(latency, "RECORDER", None)
+    recorder.close()
+
+
+def test_register_latency_route_is_explicit(monkeypatch):
+    # Arrange
+    from app.core import routing
+
+    monkeypatch.setattr(routing, "routes", {})
+    monkeypatch.setattr(routing, "routes_by_method", routing.defaultdict(list))
+
+    # Act
+    latency.register_latency_route()
+
+    # Assert
+    assert routing.routes[("/admin/latency", "GET")] is latency.admin_latency
+
+
+def test_collect_windows_reuses_merge_within_ttl(monkeypatch):
+    # Arrange
+    recorder = LatencyRecorder(ROUTES, 10, 30)
+    monkeypatch.setattr(latency, "RECORDER", recorder)
+    monkeypatch.setattr(latency, "DIRECTORY", None)
+    monkeypatch.setattr(latency.settings, "latency_merge_ttl", 60)
+    monkeypatch.setattr(latency, "_MERGED", {})
+    recorder.record(0, 2_000)
+
+    # Act
+    first = latency.collect_windows()
+    recorder.record(0, 2_000)
+    cached = latency.collect_windows()
+    monkeypatch.setattr(latency.settings, "latency_merge_ttl", 0)
+    monkeypatch.setattr(latency, "_MERGED", {})
+    fresh = latency.collect_windows()
+
+    # Assert
+    assert cached is first
+    assert percentiles(fresh[60][ROUTES[0]])["count"] == 2
+    monkeypatch.setattr(latency, "RECORDER", None)
+    recorder.close()
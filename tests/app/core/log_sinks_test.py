@@ -0,0 +1,183 @@
+import os
+import socket
+import types
+
+import pytest
+
+from app.core import log_sinks
+from app.core.log_sinks import (
+    RotatingFileSink,
+    StdoutSink,
+    UnixSocketSink,
+    build_sink,
+    worker_log_path,
+    writev_all,
+)
+
+
+def test_writev_all_resumes_partial_writes(monkeypatch):
+    # Arrange
+    read_fd, write_fd = os.pipe()
+    real_writev = os.writev
+    calls = []
+
+    def short_writev(fd, buffers):
+        # No máximo 3 bytes por chamada, forçando escritas parciais
+        calls.append(len(buffers))
+        data = b"".join(bytes(buffer) for buffer in buffers)[:3]
+        return real_writev(fd, [data])
+
+    monkeypatch.setattr(log_sinks.os, "writev", short_writev)
+
+    # Act
+    writev_all(write_fd, [b"abcd", b"ef", b"ghijk"])
+    os.close(write_fd)
+    data = os.read(read_fd, 100)
+    os.close(read_fd)
+
+    # Assert
+    assert data == b"abcdefghijk"
+    assert len(calls) == 4
+
+
+def test_writev_all_splits_at_iov_max(monkeypatch):
+    # Arrange
+    monkeypatch.setattr(log_sinks, "IOV_MAX", 2)
+    read_fd, write_fd = os.pipe()
+
+    # Act
+    writev_all(write_fd, [b"a", b"b", b"c", b"d", b"e"])
+    os.close(write_fd)
+    data = os.read(read_fd, 100)
+    os.close(read_fd)
+
+    # Assert
+    assert data == b"abcde"
+
+
+def test_stdout_sink_writes_to_fd():
+    # Arrange
+    read_fd, write_fd = os.pipe()
+    sink = StdoutSink(write_fd)
+
+    # Act
+    sink.write([b"one\n", b"two\n"])
+    os.close(write_fd)
+
+    # Assert
+    assert os.read(read_fd, 100) == b"one\ntwo\n"
+    os.close(read_fd)
+
+
+def test_rotating_file_sink_rotates_by_size(tmp_path):
+    # Arrange
+    path = str(tmp_path / "app.log")
+    sink = RotatingFileSink(path, max_bytes=10, backup_count=2)
+
+    # Act
+    sink.write([b"12345\n"])
+    sink.write([b"67890\n"])
+    sink.write([b"abcde\n"])
+    sink.write([b"fghij\n"])
+    sink.close()
+
+    # Assert
+    assert open(path, "rb").read() == b"fghij\n"
+    assert open(path + ".1", "rb").read() == b"abcde\n"
+    assert open(path + ".2", "rb").read() == b"67890\n"
+    assert not os.path.exists(path + ".3")
+
+
+def test_rotating_file_sink_rotates_by_time(tmp_path, monkeypatch):
+    # Arrange
+    path = str(tmp_path / "app.log")
+    now = [100.0]
+    monkeypatch.setattr(log_sinks.time, "monotonic", lambda: now[0])
+    sink = RotatingFileSink(path, rotate_seconds=60)
+
+    # Act
+    sink.write([b"old\n"])
+    now[0] += 61
+    sink.write([b"new\n"])
+    sink.close()
+
+    # Assert
+    assert open(path, "rb").read() == b"new\n"
+    assert open(path + ".1", "rb").read() == b"old\n"
+
+
+def test_unix_socket_sink_sends_batches(tmp_path):
+    # Arrange
+    path = str(tmp_path / "log.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    sink = UnixSocketSink(path)
+
+    # Act
+    sink.write([b"one\n", b"two\n"])
+    conn, _ = server.accept()
+    sink.close()
+    data = conn.recv(100)
+
+    # Assert
+    assert data == b"one\ntwo\n"
+    conn.close()
+    server.close()
+
+
+def test_unix_socket_sink_raises_when_unavailable(tmp_path):
+    # Arrange
+    sink = UnixSocketSink(str(tmp_path / "missing.sock"))
+
+    # Act / Assert
+    with pytest.raises(OSError):
+        sink.write([b"lost\n"])
+    assert sink.sock is None
+
+
+@pytest.mark.parametrize(
+    "kind, expected",
+    [("stdout", StdoutSink), ("file", RotatingFileSink), ("unix", UnixSocketSink)],
+)
+def test_build_sink(kind, expected, tmp_path):
+    # Arrange
+    settings = types.SimpleNamespace(
+        log_sink=kind,
+        log_file_path=str(tmp_path / "app.log"),
+        log_file_max_bytes=0,
+        log_file_rotate_seconds=0,
+        log_file_backup_count=1,
+        log_socket_path=str(tmp_path / "log.sock"),
+    )
+
+    # Act
+    sink = build_sink(settings)
+
+    # Assert
+    assert isinstance(sink, expected)
+    sink.close()
+
+
+def test_file_sink_path_is_per_worker(tmp_path):
+    # Arrange
+    settings = types.SimpleNamespace(
+        log_sink="file",
+        log_file_path=str(tmp_path / "app.log"),
+        log_file_max_bytes=0,
+        log_file_rotate_seconds=0,
+        log_file_backup_count=1,
+    )
+
+    # Act
+    sink = build_sink(settings)
+    sink.close()
+
+    # Assert
+    assert sink.path == str(tmp_path / f"app.{os.getpid()}.log")
+    assert worker_log_path("/var/log/api", 42) == "/var/log/api.42"
+
+
+def test_build_sink_rejects_unknown_kind():
+    with pytest.raises(ValueError):
+        build_sink(types.SimpleNamespace(log_sink="syslog"))
@@ -1,9 +1,20 @@
+import asyncio
 import logging
 import sys
+import threading
 import orjson
 import pytest
+import time
 import types
-from app.core.logger import OrjsonFormatter
+from app.core import logger
+from app.core.context import REQUEST_CONTEXT, RequestContext
+from app.core.logger import (
+    LoggerMiddleware,
+    LogRingBuffer,
+    OrjsonFormatter,
+    QueueLogger,
+    format_entry,
+)
 
 # app/core/test_logger.py
 
@@ -80,4 +91,278 @@ def test_format_does_not_include_standard_keys():
     # Should not include e.g. 'args', 'pathname', 'lineno'
     assert "args" not in data
     assert "pathname" not in data
-    assert "lineno" not in data
\ No newline at end of file
+    assert "lineno" not in data
+
+@pytest.mark.parametrize(
+    "policy, expected, dropped, test_id",
+    [
+        ("drop_newest", [b"0", b"1", b"2"], 3, "drop_newest"),
+        ("drop_oldest", [b"3", b"4", b"5"], 3, "drop_oldest"),
+        ("sample", [b"1", b"2", b"5"], 3, "sample"),
+    ],
+    ids=lambda x: x if isinstance(x, str) else None,
+)
+def test_ring_buffer_policies(policy, expected, dropped, test_id):
+    queue = LogRingBuffer(3, policy, sample_rate=3)
+    before = logger.LOG_RECORDS_DROPPED.labels(policy=policy)._value.get()
+    for i in range(6):
+        queue.put(str(i).encode())
+    assert list(queue.records) == expected
+    assert logger.LOG_RECORDS_DROPPED.labels(policy=policy)._value.get() - before == dropped
+
+def test_ring_buffer_put_races_with_drain():
+    queue = LogRingBuffer(8, "drop_oldest")
+    errors = []
+    done = threading.Event()
+
+    def drain():
+        try:
+            while not done.is_set():
+                queue.drain(3)
+        except Exception as exc:
+            errors.append(exc)
+
+    thread = threading.Thread(target=drain)
+    thread.start()
+    try:
+        for i in range(100_000):
+            queue.put(i)
+    finally:
+        done.set()
+        thread.join(5)
+    assert errors == []
+    assert len(queue) <= 8
+
+def test_ring_buffer_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        LogRingBuffer(3, "block")
+
+class ListSink:
+    def __init__(self):
+        self.batches = []
+        self.closed = False
+
+    def write(self, buffers):
+        self.batches.append(list(buffers))
+
+    def close(self):
+        self.closed = True
+
+def test_writer_drains_queue_and_stops_on_close():
+    sink = ListSink()
+    queue = LogRingBuffer(10)
+    for i in range(3):
+        queue.put((1.0, logging.INFO, "app", "msg %d", (i,), None, None, None))
+    queue.close()
+    writer = logger.LogWriter(queue, sink, flush_interval=10, flush_bytes=1 << 20)
+    writer.start()
+    writer.join(5)
+    lines = [line for batch in sink.batches for line in batch]
+    assert [orjson.loads(line)["message"] for line in lines] == ["msg 0", "msg 1", "msg 2"]
+    assert sink.closed
+    assert len(queue) == 0
+    assert logger.LOG_QUEUE_DEPTH._value.get() == 0
+
+def test_writer_flushes_by_size():
+    sink = ListSink()
+    queue = LogRingBuffer(100)
+    writer = logger.LogWriter(queue, sink, flush_interval=60, flush_bytes=1)
+    writer.start()
+    queue.put((1.0, logging.INFO, "app", "first", (), None, None, None))
+    deadline = time.monotonic() + 5
+    while not sink.batches and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert len(sink.batches) == 1
+    queue.close()
+    writer.join(5)
+
+def test_writer_flushes_by_latency():
+    sink = ListSink()
+    queue = LogRingBuffer(100)
+    writer = logger.LogWriter(queue, sink, flush_interval=0.01, flush_bytes=1 << 20)
+    writer.start()
+    queue.put((1.0, logging.INFO, "app", "first", (), None, None, None))
+    queue.put((1.0, logging.INFO, "app", "second", (), None, None, None))
+    deadline = time.monotonic() + 5
+    while not sink.batches and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert [len(batch) for batch in sink.batches] == [2]
+    queue.close()
+    writer.join(5)
+
+def test_writer_counts_sink_errors_as_dropped():
+    class BrokenSink(ListSink):
+        def write(self, buffers):
+            raise BrokenPipeError
+
+    sink = BrokenSink()
+    queue = LogRingBuffer(10)
+    before = logger.LOG_RECORDS_DROPPED.labels(policy="sink_error")._value.get()
+    queue.put((1.0, logging.INFO, "app", "lost", (), None, None, None))
+    queue.close()
+    writer = logger.LogWriter(queue, sink, flush_interval=10, flush_bytes=1 << 20)
+    writer.start()
+    writer.join(5)
+    assert logger.LOG_RECORDS_DROPPED.labels(policy="sink_error")._value.get() - before == 1
+    assert sink.closed
+
+@pytest.mark.asyncio
+async def test_start_logging_starts_writer_thread(monkeypatch):
+    monkeypatch.setattr(logger, "_LOG_QUEUE", None)
+    monkeypatch.setattr(logger, "_LOG_WRITER", None)
+    monkeypatch.setattr(logger, "build_sink", lambda settings: ListSink())
+    writer = logger.start_logging()
+    assert isinstance(logger._LOG_QUEUE, LogRingBuffer)
+    assert logger._LOG_QUEUE.capacity == logger.settings.log_queue_capacity
+    assert writer.is_alive()
+    await logger._shutdown_logging()
+    assert not writer.is_alive()
+    assert writer.sink.closed
+    assert logger._LOG_QUEUE is None
+
+def test_queue_logger_enqueues_minimal_tuple(monkeypatch):
+    queue = LogRingBuffer(10)
+    monkeypatch.setattr(logger, "_LOG_QUEUE", queue)
+    monkeypatch.setattr(logger.OrjsonFormatter, "format", lambda *a: pytest.fail("formatted"))
+    app_log = QueueLogger("app")
+    app_log.setLevel(logging.INFO)
+    app_log.info("hello %s", "ana", extra={"path": "/users"})
+    app_log.debug("not enabled")
+    (entry,) = queue.records
+    assert entry[1:] == (logging.INFO, "app", "hello %s", ("ana",), {"path": "/users"}, None, None)
+
+def test_format_entry_uses_single_mapping_argument():
+    entry = (1.0, logging.INFO, "app", "user %(name)s", ({"name": "x"},), None, None, None)
+    record = logging.LogRecord("app", logging.INFO, "", 0, "user %(name)s", ({"name": "x"},), None)
+    assert orjson.loads(format_entry(entry))["message"] == record.getMessage() == "user x"
+
+def test_format_errors_are_counted_as_dropped():
+    before = logger.LOG_RECORDS_DROPPED.labels(policy="format_error")._value.get()
+    good = (1.0, logging.INFO, "app", "ok %s", (1,), None, None, None)
+    bad = (1.0, logging.INFO, "app", "%s %s", (1,), None, None, None)
+    assert len(logger._format_entries([good, bad])) == 1
+    assert logger.LOG_RECORDS_DROPPED.labels(policy="format_error")._value.get() - before == 1
+
+def test_queue_logger_falls_back_without_queue(monkeypatch):
+    monkeypatch.setattr(logger, "_LOG_QUEUE", None)
+    records = []
+    app_log = QueueLogger("app")
+    handler = logging.Handler()
+    handler.emit = records.append
+    app_log.addHandler(handler)
+    app_log.warning("direct")
+    assert records[0].getMessage() == "direct"
+
+def test_format_entry_matches_formatter_output():
+    record = make_log_record(msg="hello %s", extra={"user_id": 1})
+    record.args = ("ana",)
+    entry = (record.created, record.levelno, record.name, "hello %s", ("ana",), {"user_id": 1}, None, None)
+    assert orjson.loads(format_entry(entry)) == orjson.loads(OrjsonFormatter().format(record))
+    assert orjson.loads(format_entry(record))["message"] == "hello ana"
+
+def test_format_entry_with_exception():
+    try:
+        raise ValueError("fail!")
+    except ValueError:
+        exc_info = sys.exc_info()
+    data = orjson.loads(format_entry((1.0, logging.ERROR, "app", "boom", (), None, exc_info, None)))
+    assert data["exception_type"] == "ValueError"
+    assert "fail!" in data["exception"]
+
+def test_format_entry_attaches_request_context():
+    context = RequestContext("req-1", "/users/{id}", "4bf92f3577b34da6a3ce929d0e0e4736")
+    data = orjson.loads(format_entry((1.0, logging.INFO, "app", "hi", (), None, None, context)))
+    assert data["request_id"] == "req-1"
+    assert data["route"] == "/users/{id}"
+    assert data["trace_id"] == "4bf92f3577b34da6a3ce929d0e0e4736"
+
+def test_queue_logger_captures_current_context(monkeypatch):
+    queue = LogRingBuffer(10)
+    monkeypatch.setattr(logger, "_LOG_QUEUE", queue)
+    app_log = QueueLogger("app")
+    app_log.setLevel(logging.INFO)
+    context = RequestContext("req-2", None, None)
+    token = REQUEST_CONTEXT.set(context)
+    try:
+        app_log.info("inside")
+    finally:
+        REQUEST_CONTEXT.reset(token)
+    app_log.info("outside")
+    assert [entry[-1] for entry in queue.records] == [context, None]
+
+def make_app(status=200, body=b"hello", delay=0.0, error=None):
+    async def app(scope, receive, send):
+        if delay:
+            await asyncio.sleep(delay)
+        if error:
+            raise error
+        await send({"type": "http.response.start", "status": status, "headers": []})
+        await send({"type": "http.response.body", "body": body, "more_body": True})
+        await send({"type": "http.response.body", "body": body})
+    return app
+
+def capture_access_log(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        logger, "log", types.SimpleNamespace(log=lambda level, msg, extra: calls.append((level, extra)))
+    )
+    return calls
+
+async def noop_send(message):
+    pass
+
+SCOPE = {"type": "http", "method": "GET", "path": "/users/1"}
+
+@pytest.mark.asyncio
+async def test_access_log_emits_one_combined_record(monkeypatch):
+    calls = capture_access_log(monkeypatch)
+    middleware = LoggerMiddleware(make_app(), sample_rate=1, slow_threshold=10)
+    await middleware(SCOPE, None, noop_send)
+    assert len(calls) == 1
+    level, extra = calls[0]
+    assert level == logging.INFO
+    assert extra["status_code"] == 200
+    assert extra["bytes_sent"] == 10
+    assert extra["path"] == "/users/1"
+
+@pytest.mark.asyncio
+async def test_access_log_samples_successful_requests(monkeypatch):
+    calls = capture_access_log(monkeypatch)
+    middleware = LoggerMiddleware(make_app(), sample_rate=5, slow_threshold=10)
+    for _ in range(10):
+        await middleware(SCOPE, None, noop_send)
+    assert len(calls) == 2
+
+@pytest.mark.asyncio
+async def test_access_log_sampling_is_shared_across_routes(monkeypatch):
+    calls = capture_access_log(monkeypatch)
+    # add_middleware cria uma instância por rota
+    routes = [LoggerMiddleware(make_app(), sample_rate=10, slow_threshold=10) for _ in range(2)]
+    for _ in range(5):
+        for middleware in routes:
+            await middleware(SCOPE, None, noop_send)
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "app, level, test_id",
+    [
+        (make_app(status=503), logging.ERROR, "server_error"),
+        (make_app(delay=0.02), logging.WARNING, "slow_request"),
+    ],
+    ids=lambda x: x if isinstance(x, str) else None,
+)
+async def test_access_log_always_logs_errors_and_slow_requests(monkeypatch, app, level, test_id):
+    calls = capture_access_log(monkeypatch)
+    middleware = LoggerMiddleware(app, sample_rate=1000, slow_threshold=0.01)
+    await middleware(SCOPE, None, noop_send)
+    assert [c[0] for c in calls] == [level]
+
+@pytest.mark.asyncio
+async def test_access_log_logs_exceptions(monkeypatch):
+    calls = capture_access_log(monkeypatch)
+    middleware = LoggerMiddleware(make_app(error=RuntimeError("boom")), sample_rate=1000)
+    with pytest.raises(RuntimeError):
+        await middleware(SCOPE, None, noop_send)
+    assert calls[0][0] == logging.ERROR
+    assert calls[0][1]["status_code"] == 500
@@ -0,0 +1,262 @@
+import pytest
+
+import asyncio
+import os
+from unittest.mock import patch
+
+from prometheus_client import multiprocess
+from prometheus_client.mmap_dict import MmapedDict, mmap_key
+
+from app.core import metrics
+from app.core.exception import AppException
+from app.core.metrics import (
+    HTTP_REQUEST_DURATION_SECONDS,
+    PrometheusMiddleware,
+    ScrapeCache,
+    compact_dead_workers,
+    mark_process_dead,
+    prebind_route_metrics,
+    route_metrics,
+)
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def noop_send(message):
+    pass
+
+
+def observed(path, method="GET", status_code="200"):
+    return HTTP_REQUEST_DURATION_SECONDS.labels(
+        method=method, path=path, status_code=status_code
+    )._sum.get()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "scope, label, test_id",
+    [
+        (
+            {"type": "http", "method": "GET", "path": "/items/7", "route": "/items/{id}"},
+            "/items/{id}",
+            "uses_resolved_route",
+        ),
+        (
+            {"type": "http", "method": "GET", "path": "/unknown/1", "route": None},
+            "<unmatched>",
+            "unmatched_uses_fixed_label",
+        ),
+    ],
+    ids=lambda x: x if isinstance(x, str) else None,
+)
+async def test_prometheus_middleware_labels_with_scope_route(scope, label, test_id):
+    # Arrange
+    middleware = PrometheusMiddleware(ok_app)
+    before = observed(label)
+
+    # Act
+    await middleware(scope, None, noop_send)
+
+    # Assert
+    assert observed(label) > before
+    assert (scope["path"], "GET") not in metrics._ROUTE_METRICS
+
+
+@pytest.mark.asyncio
+async def test_prometheus_middleware_groups_unknown_methods():
+    # Arrange
+    middleware = PrometheusMiddleware(ok_app)
+    before = observed("/items/{id}", method="OTHER")
+
+    # Act
+    for method in ("FOO", "get", "X" * 64):
+        scope = {"type": "http", "method": method, "path": "/items/7", "route": "/items/{id}"}
+        await middleware(scope, None, noop_send)
+
+    # Assert
+    assert observed("/items/{id}", method="OTHER") > before
+    assert not any(key[1] in ("FOO", "get") for key in metrics._ROUTE_METRICS)
+
+
+def test_prebind_route_metrics_binds_registered_routes():
+    # Arrange
+    registered = {("/orders/{id}", "GET"): None, ("/metrics", "GET"): None}
+
+    # Act
+    with (
+        patch.object(metrics, "routes", new=registered),
+        patch.object(metrics, "_ROUTE_METRICS", new={}),
+    ):
+        prebind_route_metrics()
+        bound = dict(metrics._ROUTE_METRICS)
+
+    # Assert
+    assert list(bound) == [("/orders/{id}", "GET")]
+    assert bound[("/orders/{id}", "GET")].children == {}
+
+
+def test_route_metrics_reuses_status_children():
+    # Arrange
+    bound = route_metrics("/reuse/{id}", "GET")
+
+    # Act
+    first = bound.child(200)
+    second = route_metrics("/reuse/{id}", "GET").child(200)
+
+    # Assert
+    assert first is second
+    assert list(bound.children) == [200]
+
+
+@pytest.mark.asyncio
+async def test_prometheus_middleware_observes_exception_once():
+    # Arrange
+    async def failing_app(scope, receive, send):
+        raise AppException(status_code=404, detail="missing")
+
+    scope = {"type": "http", "method": "GET", "path": "/fail/1", "route": "/fail/{id}"}
+    middleware = PrometheusMiddleware(failing_app)
+
+    # Act
+    with pytest.raises(AppException):
+        await middleware(scope, None, noop_send)
+
+    # Assert
+    child = HTTP_REQUEST_DURATION_SECONDS.labels(
+        method="GET", path="/fail/{id}", status_code="404"
+    )
+    assert sum(bucket.get() for bucket in child._buckets) == 1
+
+
+def write_values(path, filename, values):
+    store = MmapedDict(os.path.join(path, filename))
+    for metric_name, name, labels, value in values:
+        key = mmap_key(metric_name, name, list(labels), list(labels.values()), "help")
+        store.write_value(key, value, 0.0)
+    store.close()
+
+
+def make_worker_files(path, pid, requests):
+    write_values(path, f"counter_{pid}.db", [("jobs", "jobs_total", {"kind": "a"}, requests)])
+    write_values(
+        path,
+        f"histogram_{pid}.db",
+        [
+            ("lat", "lat_bucket", {"le": "0.1"}, requests),
+            ("lat", "lat_bucket", {"le": "+Inf"}, 1.0),
+            ("lat", "lat_sum", {}, requests / 10),
+        ],
+    )
+    write_values(path, f"gauge_livesum_{pid}.db", [("inflight", "inflight", {}, 1.0)])
+
+
+def collected(path):
+    return sorted(
+        (sample.name, tuple(sorted(sample.labels.items())), sample.value)
+        for metric in multiprocess.MultiProcessCollector(None, path=str(path)).collect()
+        for sample in metric.samples
+        if metric.name != "inflight"
+    )
+
+
+def test_compact_dead_workers_preserves_totals(tmp_path):
+    # Arrange
+    for pid, requests in ((111, 3.0), (222, 5.0), (333, 7.0)):
+        make_worker_files(str(tmp_path), pid, requests)
+    before = collected(tmp_path)
+
+    # Act
+    with patch.object(metrics, "_pid_alive", new=lambda pid: pid == 333):
+        removed = compact_dead_workers(str(tmp_path))
+
+    # Assert
+    assert removed == 6
+    assert collected(tmp_path) == before
+    assert sorted(os.listdir(tmp_path)) == [
+        ".compaction.lock",
+        "counter_333.db",
+        "counter_archive.db",
+        "gauge_livesum_333.db",
+        "histogram_333.db",
+        "histogram_archive.db",
+    ]
+
+
+def test_compact_dead_workers_ignores_leftover_staging_file(tmp_path):
+    # Arrange
+    make_worker_files(str(tmp_path), 111, 3.0)
+    before = collected(tmp_path)
+    # Sobra de uma compactação que caiu antes do os.replace
+    write_values(
+        str(tmp_path), "counter_archive.db.tmp", [("jobs", "jobs_total", {"kind": "b"}, 9.0)]
+    )
+
+    # Act
+    compact_dead_workers(str(tmp_path), pids={111})
+
+    # Assert
+    assert collected(tmp_path) == before
+    assert not (tmp_path / "counter_archive.db.tmp").exists()
+
+
+def test_mark_process_dead_compacts_into_existing_archive(tmp_path):
+    # Arrange
+    make_worker_files(str(tmp_path), 111, 3.0)
+    make_worker_files(str(tmp_path), 222, 5.0)
+    before = collected(tmp_path)
+    compact_dead_workers(str(tmp_path), pids={111})
+
+    # Act
+    mark_process_dead(222, str(tmp_path))
+
+    # Assert
+    assert collected(tmp_path) == before
+    assert not [name for name in os.listdir(tmp_path) if "222" in name or "111" in name]
+
+
+@pytest.mark.asyncio
+async def test_scrape_cache_shares_and_reuses_aggregation():
+    # Arrange
+    calls = []
+
+    def collect():
+        calls.append(1)
+        return b"metrics"
+
+    cache = ScrapeCache(ttl=60)
+
+    # Act
+    with patch.object(metrics, "_collect_metrics", new=collect):
+        bodies = await asyncio.gather(cache.get(), cache.get())
+        again = await cache.get()
+
+    # Assert
+    assert bodies == [b"metrics", b"metrics"]
+    assert again == b"metrics"
+    assert len(calls) == 1
+
+
+def test_prebind_route_metrics_registers_latency_collector(monkeypatch):
+    # Arrange
+    from prometheus_client import CollectorRegistry
+
+    registry = CollectorRegistry()
+    recorder = metrics.latency.LatencyRecorder([("GET", "/latency/{id}")], 10, 30)
+    monkeypatch.setattr(metrics.settings, "enable_latency_histograms", True)
+    monkeypatch.setattr(metrics.settings, "prometheus_multiproc_dir", None)
+    monkeypatch.setattr(metrics, "REGISTRY", registry)
+    monkeypatch.setattr(metrics, "routes", {("/latency/{id}", "GET"): None})
+    monkeypatch.setattr(metrics, "_ROUTE_METRICS", {})
+    monkeypatch.setattr(metrics.latency, "RECORDER", recorder)
+    monkeypatch.setattr(metrics.latency, "DIRECTORY", None)
+
+    # Act
+    prebind_route_metrics()
+    recorder.record(0, 3_000)
+
+    # Assert
+    assert "http_request_latency_window_seconds" in metrics.generate_latest(registry).decode()
+    recorder.close()
@@ -0,0 +1,139 @@
+import pytest
+
+from app.core.radix import RadixRouter, build_router
+
+
+def make_router():
+    return build_router(
+        {
+            "GET": [
+                (None, "/", "root"),
+                (None, "/users", "users_list"),
+                (None, "/users/me", "users_me"),
+                (None, "/users/{id}", "users_by_id"),
+                (None, "/users/{id}/posts/{post_id}", "user_post"),
+                (None, "/files/{name}/raw", "file_raw"),
+                (None, "/files/static/meta", "file_static_meta"),
+            ],
+            "POST": [(None, "/users", "users_create")],
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "method, path, expected, test_id",
+    [
+        ("GET", "/", ("root", "/", {}), "root"),
+        ("GET", "/users", ("users_list", "/users", {}), "static"),
+        ("POST", "/users", ("users_create", "/users", {}), "static_other_method"),
+        ("GET", "/users/me", ("users_me", "/users/me", {}), "static_priority"),
+        ("GET", "/users/42", ("users_by_id", "/users/{id}", {"id": "42"}), "param"),
+        (
+            "GET",
+            "/users/42/posts/7",
+            ("user_post", "/users/{id}/posts/{post_id}", {"id": "42", "post_id": "7"}),
+            "multi_param",
+        ),
+        (
+            "GET",
+            "/files/static/raw",
+            ("file_raw", "/files/{name}/raw", {"name": "static"}),
+            "backtrack_to_param",
+        ),
+        ("GET", "/users/", None, "empty_segment"),
+        ("GET", "/users/42/extra", None, "extra_segment"),
+        ("GET", "/unknown", None, "unknown"),
+        ("DELETE", "/users", None, "unknown_method"),
+    ],
+    ids=lambda x: x if isinstance(x, str) else None,
+)
+def test_lookup(method, path, expected, test_id):
+    # Act
+    result = make_router().lookup(method, path)
+
+    # Assert
+    assert result == expected
+
+
+@pytest.mark.asyncio
+async def test_match_exposes_allow_for_known_path():
+    # Arrange
+    router = make_router()
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    # Act
+    node, params = router.match("/users")
+    await node.method_not_allowed({}, None, send)
+
+    # Assert
+    assert node.allow == b"GET, POST"
+    assert sent[0]["status"] == 405
+    assert (b"allow", b"GET, POST") in sent[0]["headers"]
+
+
+def test_param_names_are_bound_per_route():
+    # Arrange
+    router = RadixRouter()
+    router.add("GET", "/users/{id}", "user")
+    router.add("GET", "/users/{user_id}/orders", "orders")
+    router.freeze()
+
+    # Act
+    user = router.lookup("GET", "/users/7")
+    orders = router.lookup("GET", "/users/7/orders")
+
+    # Assert
+    assert user == ("user", "/users/{id}", {"id": "7"})
+    assert orders == ("orders", "/users/{user_id}/orders", {"user_id": "7"})
+
+
+@pytest.mark.parametrize(
+    "path, expected, test_id",
+    [
+        ("/files/a.json", ("file_json", "/files/{name}.json", {"name": "a"}), "suffix"),
+        ("/files/a.b.json", ("file_json", "/files/{name}.json", {"name": "a.b"}), "suffix_with_dots"),
+        ("/files/v2-a", ("file_v2", "/files/v2-{name}", {"name": "a"}), "prefix"),
+        ("/files/a.txt", ("file_any", "/files/{name}", {"name": "a.txt"}), "falls_back_to_param"),
+        ("/files/.json", ("file_any", "/files/{name}", {"name": ".json"}), "empty_affixed_value"),
+    ],
+    ids=lambda x: x if isinstance(x, str) else None,
+)
+def test_affixed_param_segments(path, expected, test_id):
+    # Arrange
+    router = RadixRouter()
+    router.add("GET", "/files/{name}.json", "file_json")
+    router.add("GET", "/files/v2-{name}", "file_v2")
+    router.add("GET", "/files/{name}", "file_any")
+    router.freeze()
+
+    # Act
+    result = router.lookup("GET", path)
+
+    # Assert
+    assert result == expected
+
+
+@pytest.mark.parametrize(
+    "template, test_id",
+    [
+        ("/files/{name}-{ext}", "two_placeholders"),
+        ("/files/{na-me}", "invalid_name"),
+    ],
+    ids=lambda x: x if isinstance(x, str) else None,
+)
+def test_unsupported_segments_raise(template, test_id):
+    # Act & Assert
+    with pytest.raises(ValueError):
+        RadixRouter().add("GET", template, "handler")
+
+
+def test_frozen_router_rejects_new_routes():
+    # Arrange
+    router = make_router()
+
+    # Act & Assert
+    with pytest.raises(RuntimeError):
+        router.add("GET", "/late", "late")
@@ -0,0 +1,199 @@
+from collections import defaultdict
+
+import pytest
+
+from app.core import response_cache, routing
+from app.core.exception import AppException
+from app.core.params import HeaderParams
+from app.core.response_cache import ResponseCache, cached_endpoint
+
+
+def make_handler(body=b'{"ok": true}', status=200):
+    calls = []
+
+    async def handler(scope, receive, send):
+        calls.append(scope)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    return handler, calls
+
+
+async def call(endpoint, scope):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await endpoint(scope, None, send)
+    return sent
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(response_cache, "RESPONSE_CACHE", ResponseCache(100, 1024))
+
+
+@pytest.mark.asyncio
+async def test_hit_skips_handler():
+    # Arrange
+    handler, calls = make_handler()
+    endpoint = cached_endpoint(handler, "/users/{id}", (), ttl=60)
+    scope = {"path_params": {"id": "1"}, "query_string": b""}
+
+    # Act
+    first = await call(endpoint, scope)
+    second = await call(endpoint, scope)
+
+    # Assert
+    assert len(calls) == 1
+    assert second[0]["status"] == 200
+    assert second[0]["headers"] == first[0]["headers"]
+    assert second[1]["body"] == b'{"ok": true}'
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "other_scope, test_id",
+    [
+        ({"path_params": {"id": "2"}, "query_string": b"page=1"}, "different_path_param"),
+        ({"path_params": {"id": "1"}, "query_string": b"page=2"}, "different_declared_query"),
+    ],
+    ids=lambda x: x if isinstance(x, str) else None,
+)
+async def test_key_includes_path_and_declared_query_params(other_scope, test_id):
+    # Arrange
+    handler, calls = make_handler()
+    endpoint = cached_endpoint(handler, "/users/{id}", ("page",), ttl=60)
+
+    # Act
+    await call(endpoint, {"path_params": {"id": "1"}, "query_string": b"page=1"})
+    await call(endpoint, other_scope)
+
+    # Assert
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_undeclared_query_params_share_entry():
+    # Arrange
+    handler, calls = make_handler()
+    endpoint = cached_endpoint(handler, "/users/{id}", ("page",), ttl=60)
+
+    # Act
+    await call(endpoint, {"path_params": {"id": "1"}, "query_string": b"page=1&x=1"})
+    await call(endpoint, {"path_params": {"id": "1"}, "query_string": b"page=1&x=2"})
+
+    # Assert
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_error_responses_are_not_cached():
+    # Arrange
+    handler, calls = make_handler(body=b'{"error": "x"}', status=404)
+    endpoint = cached_endpoint(handler, "/users/{id}", (), ttl=60)
+    scope = {"path_params": {"id": "1"}, "query_string": b""}
+
+    # Act
+    await call(endpoint, scope)
+    await call(endpoint, scope)
+
+    # Assert
+    assert len(calls) == 2
+
+
+def test_expired_entry_is_dropped(monkeypatch):
+    # Arrange
+    cache = ResponseCache(10, 1024)
+    now = [100.0]
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+    cache.set(("/a", (), ()), 5, 200, [], b"body")
+
+    # Act
+    fresh = cache.get(("/a", (), ()))
+    now[0] = 106.0
+    expired = cache.get(("/a", (), ()))
+
+    # Assert
+    assert fresh[3] == b"body"
+    assert expired is None
+    assert cache.size == 0
+
+
+@pytest.mark.parametrize(
+    "max_entries, max_bytes, test_id",
+    [
+        (2, 1024, "entry_limit"),
+        (10, 8, "byte_limit"),
+    ],
+    ids=lambda x: x if isinstance(x, str) else None,
+)
+def test_least_recently_used_entry_is_evicted(max_entries, max_bytes, test_id):
+    # Arrange
+    cache = ResponseCache(max_entries, max_bytes)
+    cache.set(("/a", (), ()), 60, 200, [], b"aaaa")
+    cache.set(("/b", (), ()), 60, 200, [], b"bbbb")
+    cache.get(("/a", (), ()))
+
+    # Act
+    cache.set(("/c", (), ()), 60, 200, [], b"cccc")
+
+    # Assert
+    assert cache.get(("/b", (), ())) is None
+    assert cache.get(("/a", (), ())) is not None
+    assert cache.get(("/c", (), ())) is not None
+
+
+def test_body_larger_than_limit_is_not_stored():
+    # Arrange
+    cache = ResponseCache(10, 4)
+
+    # Act
+    cache.set(("/a", (), ()), 60, 200, [], b"too large")
+
+    # Assert
+    assert cache.get(("/a", (), ())) is None
+    assert cache.size == 0
+
+
+@pytest.mark.asyncio
+async def test_hit_does_not_skip_required_header(monkeypatch):
+    # Arrange
+    monkeypatch.setattr(routing, "routes", {})
+    monkeypatch.setattr(routing, "routes_by_method", defaultdict(list))
+    handler, calls = make_handler()
+
+    @routing.get(
+        "/cached",
+        headers=[HeaderParams(name="X-Token", type_field="string", required=True)],
+        cache_ttl=30,
+    )
+    async def cached_route(scope, receive, send):
+        return await handler(scope, receive, send)
+
+    endpoint = routing.routes[("/cached", "GET")]
+    with_token = {"headers": [(b"x-token", b"abc")], "query_string": b""}
+
+    # Act
+    with pytest.raises(AppException) as missing_before:
+        await call(endpoint, {"headers": [], "query_string": b""})
+    first = await call(endpoint, with_token)
+    with pytest.raises(AppException) as missing_after:
+        await call(endpoint, {"headers": [], "query_string": b""})
+    other_token = await call(
+        endpoint, {"headers": [(b"x-token", b"xyz")], "query_string": b""}
+    )
+    hit = await call(endpoint, with_token)
+
+    # Assert
+    assert missing_before.value.status_code == 422
+    assert missing_after.value.status_code == 422
+    assert first[0]["status"] == other_token[0]["status"] == hit[0]["status"] == 200
+    assert [scope["request_headers"]["x-token"] for scope in calls] == ["abc", "xyz"]
@@ -1,7 +1,8 @@
 import pytest
 from types import SimpleNamespace
 
-from app.core.routing import route
+from app.core import routing
+from app.core.routing import build_openapi_spec, route
 
 
 @pytest.mark.parametrize(
@@ -83,8 +84,9 @@ def test_route_various_cases(
     monkeypatch.setattr(
         "app.core.routing.settings", SimpleNamespace(enable_swagger=enable_swagger)
     )
-    # Patch openapi_spec, routes_by_method, routes
+    # Patch openapi_spec, openapi_routes, routes_by_method, routes
     monkeypatch.setattr("app.core.routing.openapi_spec", openapi_spec)
+    monkeypatch.setattr("app.core.routing.openapi_routes", [])
     monkeypatch.setattr("app.core.routing.routes_by_method", routes_by_method)
     monkeypatch.setattr("app.core.routing.routes", routes)
     # Patch convert_msgspec_schema_to_openapi to return dummy OpenAPI schema refs
@@ -124,9 +126,12 @@ def test_route_various_cases(
         cookie_params=cookie_params,
     )
     decorated = decorator(dummy_func)
+    spec = build_openapi_spec()
 
     # Assert
     assert decorated is dummy_func
+    # route() only collects metadata; the base spec is never mutated
+    assert openapi_spec["paths"] == {}
     # Route should be registered in routes
     assert routes[(path, method.upper())] is dummy_func
     # Route should be registered in routes_by_method
@@ -142,9 +147,9 @@ def test_route_various_cases(
 
     if enable_swagger:
         # OpenAPI path should be set
-        assert path in openapi_spec["paths"]
-        assert method in openapi_spec["paths"][path]
-        op = openapi_spec["paths"][path][method]
+        assert path in spec["paths"]
+        assert method in spec["paths"][path]
+        op = spec["paths"][path][method]
         assert op["summary"] == summary
         assert op["tags"] == tags
         assert op["description"] == description
@@ -156,8 +161,8 @@ def test_route_various_cases(
         # Should have requestBody key (may be None)
         assert "requestBody" in op
     else:
-        # OpenAPI spec should not be updated
-        assert openapi_spec["paths"] == {}
+        # No metadata collected, so the built spec has no paths
+        assert spec["paths"] == {}
 
 
 def test_route_multiple_params(monkeypatch):
@@ -169,6 +174,7 @@ def test_route_multiple_params(monkeypatch):
         "app.core.routing.settings", SimpleNamespace(enable_swagger=True)
     )
     monkeypatch.setattr("app.core.routing.openapi_spec", openapi_spec)
+    monkeypatch.setattr("app.core.routing.openapi_routes", [])
     monkeypatch.setattr("app.core.routing.routes_by_method", routes_by_method)
     monkeypatch.setattr("app.core.routing.routes", routes)
     monkeypatch.setattr(
@@ -213,10 +219,52 @@ def test_route_multiple_params(monkeypatch):
 
     # Assert
     assert decorated is dummy_func
-    op = openapi_spec["paths"]["/multi"]["POST"]
+    op = build_openapi_spec()["paths"]["/multi"]["POST"]
     # All parameters should be encoded
     assert {"encoded": "A"} in op["parameters"]
     assert {"encoded": "B"} in op["parameters"]
     assert {"encoded": "q1"} in op["parameters"]
     assert {"encoded": "id"} in op["parameters"]
     assert {"encoded": "c"} in op["parameters"]
+
+
+def test_openapi_json_is_built_once(monkeypatch):
+    # Arrange
+    calls = []
+    monkeypatch.setattr(
+        "app.core.routing.settings", SimpleNamespace(enable_swagger=True, openapi_file=None)
+    )
+    monkeypatch.setattr("app.core.routing._OPENAPI_JSON", None)
+    monkeypatch.setattr(
+        "app.core.routing.build_openapi_spec", lambda: calls.append(1) or {"paths": {}}
+    )
+
+    # Act
+    first = routing.openapi_json()
+    second = routing.openapi_json()
+
+    # Assert
+    assert first is second
+    assert first == b'{"paths":{}}'
+    assert calls == [1]
+
+
+def test_openapi_json_loads_prebuilt_file(monkeypatch, tmp_path):
+    # Arrange
+    prebuilt = tmp_path / "openapi.json"
+    prebuilt.write_bytes(b'{"prebuilt":true}')
+    monkeypatch.setattr(
+        "app.core.routing.settings",
+        SimpleNamespace(enable_swagger=True, openapi_file=str(prebuilt)),
+    )
+    monkeypatch.setattr("app.core.routing._OPENAPI_JSON", None)
+    monkeypatch.setattr(
+        "app.core.routing.build_openapi_spec",
+        lambda: (_ for _ in ()).throw(AssertionError("must not build")),
+    )
+
+    # Act
+    body = routing.openapi_json()
+
+    # Assert
+    assert body == b'{"prebuilt":true}'
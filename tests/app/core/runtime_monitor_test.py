@@ -0,0 +1,114 @@
+import asyncio
+import gc
+import sys
+import time
+import types
+
+import pytest
+
+from app.core import runtime_monitor
+from app.core.runtime_monitor import (
+    EVENT_LOOP_SLOW_CALLBACKS,
+    GC_PAUSE_SECONDS,
+    RuntimeMonitor,
+    describe_frame,
+)
+
+
+def capture_warnings(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        runtime_monitor,
+        "log",
+        types.SimpleNamespace(warning=lambda msg, extra: calls.append((msg, extra))),
+    )
+    return calls
+
+
+def slow_count(callback):
+    return EVENT_LOOP_SLOW_CALLBACKS.labels(callback=callback)._value.get()
+
+
+def gc_count(generation):
+    child = GC_PAUSE_SECONDS.labels(generation=str(generation))
+    return sum(bucket.get() for bucket in child._buckets)
+
+
+@pytest.mark.asyncio
+async def test_describe_frame_names_the_innermost_coroutine():
+    # Arrange
+    def blocking_call():
+        return sys._getframe()
+
+    async def users_handler():
+        return blocking_call()
+
+    # Act
+    callback, location = describe_frame(await users_handler())
+
+    # Assert
+    assert callback.endswith("users_handler")
+    assert location.startswith(__file__)
+
+
+@pytest.mark.asyncio
+async def test_tick_records_and_samples_slow_callbacks(monkeypatch):
+    # Arrange
+    calls = capture_warnings(monkeypatch)
+    monitor = RuntimeMonitor(interval=0.1, lag_threshold=0.05, gc_threshold=1, log_interval=60)
+    before = slow_count("handler")
+
+    # Act
+    monitor._stall = ("handler", "app.py:10")
+    monitor.tick(0.2)
+    monitor._stall = ("handler", "app.py:10")
+    monitor.tick(0.3)
+    monitor.tick(0.01)
+
+    # Assert
+    assert slow_count("handler") - before == 2
+    assert calls == [
+        ("event_loop_stall", {"lag": 0.2, "callback": "handler", "location": "app.py:10", "suppressed": 0})
+    ]
+
+
+@pytest.mark.asyncio
+async def test_gc_pauses_are_exported_on_tick(monkeypatch):
+    # Arrange
+    calls = capture_warnings(monkeypatch)
+    monitor = RuntimeMonitor(interval=60, lag_threshold=1, gc_threshold=0, log_interval=60)
+    before = gc_count(2)
+    monitor.start()
+
+    # Act
+    gc.collect()
+    monitor.tick(0.0)
+    await monitor.stop()
+
+    # Assert
+    assert gc_count(2) - before >= 1
+    assert [msg for msg, _ in calls] == ["gc_pause"]
+    assert monitor._on_gc not in gc.callbacks
+
+
+@pytest.mark.asyncio
+async def test_monitor_reports_blocking_coroutine(monkeypatch):
+    # Arrange
+    capture_warnings(monkeypatch)
+    monitor = RuntimeMonitor(interval=0.01, lag_threshold=0.05, gc_threshold=1, log_interval=60)
+    monitor.start()
+    await asyncio.sleep(0.03)
+
+    async def blocking_endpoint():
+        time.sleep(0.3)
+
+    before = slow_count(blocking_endpoint.__qualname__)
+
+    # Act
+    await blocking_endpoint()
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    # Assert
+    assert slow_count(blocking_endpoint.__qualname__) - before == 1
+    assert not monitor._watchdog.is_alive()
@@ -0,0 +1,119 @@
+import orjson
+import pytest
+
+from bson import ObjectId
+
+from app.core.streaming import json_array_chunks, ndjson_chunks, stream_response
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = list(documents)
+        self.closed = False
+        self.fetched = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.fetched == len(self.documents):
+            raise StopAsyncIteration
+        self.fetched += 1
+        return self.documents[self.fetched - 1]
+
+    async def close(self):
+        self.closed = True
+
+
+async def collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+@pytest.mark.asyncio
+async def test_ndjson_chunks_encode_one_document_per_line():
+    # Arrange
+    oid = ObjectId()
+    cursor = FakeCursor([{"_id": oid, "n": 1}, {"_id": "b", "n": 2}])
+
+    # Act
+    body = b"".join(await collect(ndjson_chunks(cursor)))
+
+    # Assert
+    lines = body.split(b"\n")
+    assert lines[-1] == b""
+    assert [orjson.loads(line) for line in lines[:-1]] == [
+        {"_id": str(oid), "n": 1},
+        {"_id": "b", "n": 2},
+    ]
+    assert cursor.closed is True
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "documents, test_id",
+    [
+        ([], "empty"),
+        ([{"n": 1}], "single"),
+        ([{"n": i} for i in range(50)], "many"),
+    ],
+    ids=lambda x: x if isinstance(x, str) else None,
+)
+async def test_json_array_chunks_produce_valid_array(documents, test_id):
+    # Act
+    body = b"".join(await collect(json_array_chunks(FakeCursor(documents), chunk_size=16)))
+
+    # Assert
+    assert orjson.loads(body) == documents
+
+
+@pytest.mark.asyncio
+async def test_chunks_are_bounded_by_chunk_size():
+    # Arrange
+    cursor = FakeCursor({"n": i} for i in range(100))
+
+    # Act
+    chunks = await collect(ndjson_chunks(cursor, chunk_size=64))
+
+    # Assert
+    assert len(chunks) > 1
+    assert all(len(chunk) < 64 + 16 for chunk in chunks)
+
+
+@pytest.mark.asyncio
+async def test_stream_response_pulls_next_chunk_only_after_send():
+    # Arrange
+    cursor = FakeCursor({"n": i} for i in range(10))
+    sent = []
+    fetched_at_send = []
+
+    async def send(message):
+        fetched_at_send.append(cursor.fetched)
+        sent.append(message)
+
+    # Act
+    await stream_response(send, ndjson_chunks(cursor, chunk_size=1))
+
+    # Assert
+    assert sent[0]["type"] == "http.response.start"
+    assert (b"content-type", b"application/x-ndjson") in sent[0]["headers"]
+    assert all(message["more_body"] for message in sent[1:-1])
+    assert sent[-1] == {"type": "http.response.body", "body": b"", "more_body": False}
+    # Backpressure: cada chunk é enviado antes do próximo documento ser lido
+    assert fetched_at_send[1:11] == list(range(1, 11))
+
+
+@pytest.mark.asyncio
+async def test_stream_response_closes_cursor_when_send_fails():
+    # Arrange
+    cursor = FakeCursor({"n": i} for i in range(10))
+    calls = []
+
+    async def send(message):
+        calls.append(message)
+        if len(calls) == 2:
+            raise OSError("client disconnected")
+
+    # Act & Assert
+    with pytest.raises(OSError):
+        await stream_response(send, ndjson_chunks(cursor, chunk_size=1))
+    assert cursor.closed is True
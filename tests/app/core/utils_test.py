@@ -1,9 +1,17 @@
 import pytest
+from unittest.mock import AsyncMock
 import msgspec
 import orjson
+from typing import Annotated
 from jsonschema import ValidationError
+from app.core.exception import AppException
+from app.core.injection import build_query_specs
+from app.core.params import QueryParams
 from app.core.utils import (
+    _header_block,
     get_validator,
+    validate_schema,
+    requires_jsonschema,
     validate_schema_dict,
     validate_schema_object,
     compile_path_to_regex,
@@ -11,7 +19,14 @@ from app.core.utils import (
     text_plain_response,
     text_html_response,
     read_body,
+    read_raw_body,
     send_response,
+    fixed_response,
+    get_query_param,
+    parse_query,
+    msgpack_response,
+    negotiated_response,
+    wants_msgpack,
     CONTENT_TYPE_TEXT_HTML_HEADER,
     CONTENT_TYPE_TEXT_PLAIN_HEADER,
     CONTENT_TYPE_APPLICATION_JSON_HEADER,
@@ -24,6 +39,16 @@ class User(msgspec.Struct):
 class Empty(msgspec.Struct):
     pass
 
+class Product(msgspec.Struct, kw_only=True):
+    name: Annotated[str, msgspec.Meta(extra={"error": "nome obrigatório"})]
+    price: Annotated[int, msgspec.Meta(gt=0, extra={"error": "preço deve ser positivo"})]
+
+class Tagged(msgspec.Struct):
+    tags: Annotated[
+        list[str],
+        msgspec.Meta(extra_json_schema={"uniqueItems": True}, extra={"error": "tags repetidas"}),
+    ]
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
     "body, ModelDto, expected, test_id",
@@ -61,8 +86,8 @@ async def test_validate_schema_dict_invalid(body, ModelDto, test_id):
     # Act & Assert
     with pytest.raises(ValidationError) as excinfo:
         await validate_schema_dict(body, ModelDto)
-    # The error message should contain 'detail' and 'body'
-    assert "detail" in str(excinfo.value)
+    # The error message is the {"detalhes": [...], "body": ...} payload
+    assert "detalhes" in str(excinfo.value)
     assert "body" in str(excinfo.value)
 
 @pytest.mark.asyncio
@@ -102,9 +127,86 @@ async def test_validate_schema_object_invalid(body, ModelDto, test_id):
     # Act & Assert
     with pytest.raises(ValidationError) as excinfo:
         await validate_schema_object(body, ModelDto)
-    assert "detail" in str(excinfo.value)
+    assert "detalhes" in str(excinfo.value)
     assert "body" in str(excinfo.value)
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "body, expected_detail, test_id",
+    [
+        (b'{"price": 1}', {"campo": "name", "mensagem": "nome obrigatório", "validador": "required"}, "bytes_missing_field"),
+        (b'{"name": "a", "price": 0}', {"campo": "price", "mensagem": "preço deve ser positivo", "validador": "exclusiveMinimum"}, "bytes_constraint"),
+        ({"name": "a", "price": "x"}, {"campo": "price", "mensagem": "preço deve ser positivo", "validador": "type"}, "dict_wrong_type"),
+    ],
+    ids=lambda x: x if isinstance(x, str) else None,
+)
+async def test_validate_schema_msgspec_error_format(body, expected_detail, test_id):
+    # Act & Assert
+    with pytest.raises(ValidationError) as excinfo:
+        await validate_schema(body, Product)
+    assert excinfo.value.args[0]["detalhes"] == [expected_detail]
+    assert isinstance(excinfo.value.args[0]["body"], dict)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("body", [b"{}", {}], ids=["bytes", "dict"])
+async def test_validate_schema_reports_every_invalid_field(body):
+    # Act & Assert
+    with pytest.raises(ValidationError) as excinfo:
+        await validate_schema(body, Product)
+    assert excinfo.value.args[0]["detalhes"] == [
+        {"campo": "name", "mensagem": "nome obrigatório", "validador": "required"},
+        {"campo": "price", "mensagem": "preço deve ser positivo", "validador": "required"},
+    ]
+
+class Bounds(msgspec.Struct):
+    gt: Annotated[int, msgspec.Meta(gt=0)] = 1
+    ge: Annotated[int, msgspec.Meta(ge=0)] = 1
+    lt: Annotated[float, msgspec.Meta(lt=10)] = 1
+    le: Annotated[int, msgspec.Meta(le=10)] = 1
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "body, expected, test_id",
+    [
+        (b'{"gt": 0}', "exclusiveMinimum", "gt"),
+        (b'{"ge": -1}', "minimum", "ge"),
+        (b'{"lt": 10}', "exclusiveMaximum", "lt"),
+        (b'{"le": 11}', "maximum", "le"),
+    ],
+    ids=lambda x: x if isinstance(x, str) else None,
+)
+async def test_validate_schema_bound_keyword_comes_from_constraint(body, expected, test_id):
+    # Act & Assert
+    with pytest.raises(ValidationError) as excinfo:
+        await validate_schema(body, Bounds)
+    assert [d["validador"] for d in excinfo.value.args[0]["detalhes"]] == [expected]
+
+@pytest.mark.asyncio
+async def test_validate_schema_reports_missing_and_invalid_fields():
+    # Act & Assert
+    with pytest.raises(ValidationError) as excinfo:
+        await validate_schema(b'{"name": "Alice", "age": "x", "extra": 1}', User)
+    with pytest.raises(ValidationError) as missing:
+        await validate_schema(b'{"age": "x"}', User)
+    assert excinfo.value.args[0]["detalhes"] == [
+        {"campo": "age", "mensagem": "Expected `int`, got `str`", "validador": "type"},
+    ]
+    assert [d["campo"] for d in missing.value.args[0]["detalhes"]] == ["name", "age"]
+
+@pytest.mark.asyncio
+async def test_validate_schema_falls_back_to_jsonschema():
+    # Arrange
+    assert requires_jsonschema(Tagged) is True
+    assert requires_jsonschema(Product) is False
+
+    # Act & Assert
+    assert (await validate_schema(b'{"tags": ["a", "b"]}', Tagged)).tags == ["a", "b"]
+    with pytest.raises(ValidationError) as excinfo:
+        await validate_schema(b'{"tags": ["a", "a"]}', Tagged)
+    assert excinfo.value.args[0]["detalhes"] == [
+        {"campo": "tags", "mensagem": "tags repetidas", "validador": "uniqueItems"}
+    ]
+
 @pytest.mark.parametrize(
     "path_template, path, expected, test_id",
     [
@@ -128,9 +230,9 @@ def test_compile_path_to_regex(path_template, path, expected, test_id):
     "data, status, headers, expected_status, expected_headers, expected_body, test_id",
     [
         # Happy path: dict, default status, no headers
-        ({"foo": "bar"}, 200, None, 200, CONTENT_TYPE_APPLICATION_JSON_HEADER, [orjson.dumps({"foo": "bar"})], "json_no_headers"),
+        ({"foo": "bar"}, 200, None, 200, CONTENT_TYPE_APPLICATION_JSON_HEADER + [(b"content-length", b"13")], [orjson.dumps({"foo": "bar"})], "json_no_headers"),
         # Custom status and headers
-        ({"foo": "bar"}, 201, {"X-Test": "1"}, 201, [(b"X-Test", b"1")] + CONTENT_TYPE_APPLICATION_JSON_HEADER, [orjson.dumps({"foo": "bar"})], "json_custom_headers"),
+        ({"foo": "bar"}, 201, {"X-Test": "1"}, 201, [(b"X-Test", b"1")] + CONTENT_TYPE_APPLICATION_JSON_HEADER + [(b"content-length", b"13")], [orjson.dumps({"foo": "bar"})], "json_custom_headers"),
     ],
     ids=lambda x: x if isinstance(x, str) else None,
 )
@@ -147,9 +249,9 @@ def test_json_response(data, status, headers, expected_status, expected_headers,
     "data, status, headers, expected_status, expected_headers, expected_body, test_id",
     [
         # Happy path: text, default status, no headers
-        (b"hello", 200, None, 200, CONTENT_TYPE_TEXT_PLAIN_HEADER, [b"hello"], "plain_no_headers"),
+        (b"hello", 200, None, 200, CONTENT_TYPE_TEXT_PLAIN_HEADER + [(b"content-length", b"5")], [b"hello"], "plain_no_headers"),
         # Custom status and headers
-        (b"hi", 201, {"X-Test": "1"}, 201, [(b"X-Test", b"1")] + CONTENT_TYPE_TEXT_PLAIN_HEADER, [b"hi"], "plain_custom_headers"),
+        (b"hi", 201, {"X-Test": "1"}, 201, [(b"X-Test", b"1")] + CONTENT_TYPE_TEXT_PLAIN_HEADER + [(b"content-length", b"2")], [b"hi"], "plain_custom_headers"),
     ],
     ids=lambda x: x if isinstance(x, str) else None,
 )
@@ -166,9 +268,9 @@ def test_text_plain_response(data, status, headers, expected_status, expected_he
     "data, status, headers, expected_status, expected_headers, expected_body, test_id",
     [
         # Happy path: html, default status, no headers
-        (b"<h1>hi</h1>", 200, None, 200, CONTENT_TYPE_TEXT_HTML_HEADER, [b"<h1>hi</h1>"], "html_no_headers"),
+        (b"<h1>hi</h1>", 200, None, 200, CONTENT_TYPE_TEXT_HTML_HEADER + [(b"content-length", b"11")], [b"<h1>hi</h1>"], "html_no_headers"),
         # Custom status and headers
-        (b"<h2>ok</h2>", 201, {"X-Test": "1"}, 201, [(b"X-Test", b"1")] + CONTENT_TYPE_TEXT_HTML_HEADER, [b"<h2>ok</h2>"], "html_custom_headers"),
+        (b"<h2>ok</h2>", 201, {"X-Test": "1"}, 201, [(b"X-Test", b"1")] + CONTENT_TYPE_TEXT_HTML_HEADER + [(b"content-length", b"11")], [b"<h2>ok</h2>"], "html_custom_headers"),
     ],
     ids=lambda x: x if isinstance(x, str) else None,
 )
@@ -181,6 +283,45 @@ def test_text_html_response(data, status, headers, expected_status, expected_hea
     assert set(result[1]) == set(expected_headers)
     assert result[2] == expected_body
 
+def test_json_response_reuses_cached_header_block():
+    # Act
+    first = json_response({"a": 1}, headers={"X-Test": "1"})
+    second = json_response({"b": 2}, headers={"X-Test": "1"})
+
+    # Assert
+    assert first[1][1] is second[1][1]
+    assert first[1] is not second[1]
+
+def test_per_request_header_values_are_not_cached():
+    # Arrange
+    json_response({}, headers={"time_process": "0"})
+    before = _header_block.cache_info().currsize
+
+    # Act
+    responses = [json_response({}, headers={"time_process": f"{i}"}) for i in range(50)]
+
+    # Assert
+    assert _header_block.cache_info().currsize == before
+    assert responses[7][1][0] == (b"time_process", b"7")
+
+@pytest.mark.asyncio
+async def test_fixed_response_sends_prerendered_messages():
+    # Arrange
+    sent = []
+    async def send(msg):
+        sent.append(msg)
+    endpoint = fixed_response(json_response({"message": "HelloWorld"}))
+
+    # Act
+    await endpoint({}, None, send)
+    await endpoint({}, None, send)
+
+    # Assert
+    assert sent[0] is sent[2]
+    assert sent[1] is sent[3]
+    assert sent[1]["body"] == b'{"message":"HelloWorld"}'
+    assert (b"content-length", b"24") in sent[0]["headers"]
+
 @pytest.mark.asyncio
 async def test_read_body_bytes():
     # Arrange
@@ -215,6 +356,83 @@ async def test_read_body_chunked():
     # Assert
     assert result == {"foo": "bar"}
 
+@pytest.mark.asyncio
+async def test_read_raw_body_single_message_is_zero_copy():
+    # Arrange
+    body_bytes = memoryview(orjson.dumps({"foo": "bar"}))
+    messages = [{"type": "http.request", "body": body_bytes, "more_body": False}]
+    async def receive():
+        return messages.pop(0)
+
+    # Act
+    result = await read_raw_body(receive)
+
+    # Assert
+    assert result is body_bytes
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "chunks, max_size, test_id",
+    [
+        ([b"x" * 11], 10, "single_message_too_large"),
+        ([b"x" * 6, b"x" * 6], 10, "chunked_too_large"),
+    ],
+    ids=lambda x: x if isinstance(x, str) else None,
+)
+async def test_read_raw_body_enforces_max_size(monkeypatch, chunks, max_size, test_id):
+    # Arrange
+    monkeypatch.setattr("app.core.exception.log", type("Log", (), {"error": staticmethod(lambda *a, **kw: None)})())
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+        for i, chunk in enumerate(chunks)
+    ]
+    async def receive():
+        return messages.pop(0)
+
+    # Act & Assert
+    with pytest.raises(AppException) as excinfo:
+        await read_raw_body(receive, max_size=max_size)
+    assert excinfo.value.status_code == 413
+
+@pytest.mark.asyncio
+async def test_read_raw_body_rejects_content_length_before_receiving(monkeypatch):
+    # Arrange
+    monkeypatch.setattr("app.core.exception.log", type("Log", (), {"error": staticmethod(lambda *a, **kw: None)})())
+    receive = AsyncMock()
+    scope = {"headers": [(b"content-length", b"11")], "max_body_size": 10}
+
+    # Act & Assert
+    with pytest.raises(AppException) as excinfo:
+        await read_raw_body(receive, scope=scope)
+    assert excinfo.value.status_code == 413
+    receive.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_read_raw_body_uses_route_limit_from_scope(monkeypatch):
+    # Arrange
+    monkeypatch.setattr("app.core.exception.log", type("Log", (), {"error": staticmethod(lambda *a, **kw: None)})())
+    messages = [{"type": "http.request", "body": b"x" * 6, "more_body": False}]
+    async def receive():
+        return messages.pop(0)
+
+    # Act & Assert
+    with pytest.raises(AppException) as excinfo:
+        await read_raw_body(receive, scope={"headers": [], "max_body_size": 5})
+    assert excinfo.value.status_code == 413
+
+@pytest.mark.asyncio
+async def test_read_body_decodes_into_model():
+    # Arrange
+    messages = [{"type": "http.request", "body": b'{"name": "Ana", "age": 3}', "more_body": False}]
+    async def receive():
+        return messages.pop(0)
+
+    # Act
+    result = await read_body(receive, model=User)
+
+    # Assert
+    assert result == User(name="Ana", age=3)
+
 @pytest.mark.asyncio
 async def test_send_response():
     # Arrange
@@ -232,3 +450,144 @@ async def test_send_response():
     assert sent[0]["headers"] == [(b"content-type", b"text/plain")]
     assert sent[1]["type"] == "http.response.body"
     assert sent[1]["body"] == b"hello"
+
+def test_parse_query_is_cached_in_scope(monkeypatch):
+    # Arrange
+    calls = []
+    monkeypatch.setattr("app.core.utils.parse_qs", lambda q: calls.append(q) or {"a": ["1"]})
+    scope = {"query_string": b"a=1"}
+
+    # Act
+    first = parse_query(scope)
+    second = parse_query(scope)
+
+    # Assert
+    assert first is second
+    assert calls == ["a=1"]
+
+@pytest.mark.parametrize(
+    "query_string, name, expected, test_id",
+    [
+        (b"page=3&limite=20", "page", 3, "integer_coerced"),
+        (b"", "page", 1, "declared_default"),
+        (b"ativo=true", "ativo", True, "boolean_coerced"),
+        (b"nome=ana", "nome", "ana", "string"),
+        (b"x=1", "x", "1", "undeclared_uses_cast"),
+    ],
+    ids=lambda x: x if isinstance(x, str) else None,
+)
+def test_get_query_param_coerces_declared_params(query_string, name, expected, test_id):
+    # Arrange
+    scope = {
+        "query_string": query_string,
+        "query_specs": build_query_specs([
+            QueryParams(name="page", type_field="integer", default=1),
+            QueryParams(name="ativo", type_field="boolean"),
+            QueryParams(name="nome", type_field="string"),
+        ]),
+    }
+
+    # Act
+    result = get_query_param(scope, name)
+
+    # Assert
+    assert result == expected
+
+@pytest.mark.parametrize(
+    "query_string, validador, test_id",
+    [
+        (b"page=abc", "type", "not_integer"),
+        (b"", "required", "missing_required"),
+    ],
+    ids=lambda x: x if isinstance(x, str) else None,
+)
+def test_get_query_param_invalid_raises_422(query_string, validador, test_id):
+    # Arrange
+    scope = {
+        "query_string": query_string,
+        "query_specs": build_query_specs([
+            QueryParams(name="page", type_field="integer", required=True),
+        ]),
+    }
+
+    # Act & Assert
+    with pytest.raises(AppException) as excinfo:
+        get_query_param(scope, "page")
+    assert excinfo.value.status_code == 422
+    assert excinfo.value.detail["error"]["detalhes"][0]["validador"] == validador
+
+@pytest.mark.parametrize(
+    "accept, expected, test_id",
+    [
+        (b"application/msgpack", True, "msgpack_only"),
+        (b"application/x-msgpack, application/json;q=0.5", True, "msgpack_preferred"),
+        (b"application/json, application/msgpack;q=0.5", False, "json_preferred"),
+        (b"*/*", False, "wildcard_keeps_json"),
+        (b"application/msgpack;q=0", False, "msgpack_refused"),
+        (None, False, "no_accept"),
+    ],
+    ids=lambda x: x if isinstance(x, str) else None,
+)
+def test_wants_msgpack(accept, expected, test_id):
+    # Arrange
+    scope = {"headers": [(b"accept", accept)] if accept else []}
+
+    # Act & Assert
+    assert wants_msgpack(scope) is expected
+
+def test_negotiated_response_encodes_msgpack():
+    # Arrange
+    scope = {"headers": [(b"accept", b"application/msgpack")]}
+
+    # Act
+    status, headers, body = negotiated_response(scope, User(name="Ana", age=3))
+
+    # Assert
+    assert status == 200
+    assert (b"content-type", b"application/msgpack") in headers
+    assert (b"vary", b"accept") in headers
+    assert msgspec.msgpack.decode(body[0]) == {"name": "Ana", "age": 3}
+
+def test_negotiated_json_response_varies_on_accept():
+    # Act
+    status, headers, body = negotiated_response(
+        {"headers": [(b"accept", b"application/json")]}, {"a": 1}, headers={"X-Test": "1"}
+    )
+
+    # Assert
+    assert (b"content-type", b"application/json") in headers
+    assert (b"vary", b"accept") in headers
+    assert (b"X-Test", b"1") in headers
+    assert orjson.loads(body[0]) == {"a": 1}
+
+def test_msgpack_response_keeps_extra_headers():
+    # Act
+    _, headers, _ = msgpack_response({"a": 1}, headers={"X-Test": "1"})
+
+    # Assert
+    assert (b"X-Test", b"1") in headers
+    assert (b"vary", b"accept") in headers
+
+@pytest.mark.asyncio
+async def test_validate_schema_decodes_msgpack_body():
+    # Arrange
+    body = msgspec.msgpack.encode({"name": "Ana", "age": 3})
+
+    # Act
+    result = await validate_schema(body, User, msgpack=True)
+
+    # Assert
+    assert result == User(name="Ana", age=3)
+
+@pytest.mark.asyncio
+async def test_validate_schema_msgpack_error_format():
+    # Arrange
+    body = msgspec.msgpack.encode({"name": "Ana"})
+
+    # Act & Assert
+    with pytest.raises(ValidationError) as excinfo:
+        await validate_schema(body, User, msgpack=True)
+    detail = excinfo.value.message["detalhes"][0]
+    assert detail["campo"] == "age"
+    assert detail["validador"] == "required"
+    assert excinfo.value.message["body"] == {"name": "Ana"}
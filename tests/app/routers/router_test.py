@@ -0,0 +1,79 @@
+import msgspec
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from bson import ObjectId
+
+from app.core.codec import encode
+from app.core.routing import routes
+from app.routers import router
+
+
+async def call(endpoint, scope):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await endpoint(scope, None, send)
+    start = messages[0]
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    return start["status"], dict(start["headers"]), body
+
+
+@pytest.mark.asyncio
+async def test_users_get_by_path_round_trips_msgpack():
+    # Arrange
+    user_id = str(ObjectId())
+    user = {"_id": user_id, "empresa": "Porto", "valor": 10.5}
+    cached_json = encode(user)
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": f"/users/{user_id}",
+        "path_params": {"id": user_id},
+        "query_string": b"",
+        "headers": [(b"accept", b"application/msgpack")],
+    }
+
+    # Act
+    with patch.object(
+        type(router.user_service), "get_user_by_id", new=AsyncMock(return_value=msgspec.Raw(cached_json))
+    ):
+        status, headers, body = await call(routes[("/users/{id}", "GET")], scope)
+
+    # Assert
+    assert status == 200
+    assert headers[b"content-type"] == b"application/msgpack"
+    assert msgspec.msgpack.decode(body) == user
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "accept, content_type",
+    [(b"application/json", b"application/json"), (b"application/msgpack", b"application/msgpack")],
+    ids=["json", "msgpack"],
+)
+async def test_users_get_by_path_varies_on_accept(accept, content_type):
+    # Arrange
+    user_id = str(ObjectId())
+    user = {"_id": user_id, "empresa": "Porto", "valor": 10.5}
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": f"/users/{user_id}",
+        "path_params": {"id": user_id},
+        "query_string": b"",
+        "headers": [(b"accept", accept)],
+    }
+
+    # Act
+    with patch.object(
+        type(router.user_service), "get_user_by_id", new=AsyncMock(return_value=msgspec.Raw(encode(user)))
+    ):
+        status, headers, _ = await call(routes[("/users/{id}", "GET")], scope)
+
+    # Assert
+    assert status == 200
+    assert headers[b"content-type"] == content_type
+    assert headers[b"vary"] == b"accept"